@@ -2,22 +2,86 @@ SHELL=/bin/bash
 
 # window size(j) of parallels. refer manual of parallel command for detail.
 N=40
+# bounds of window, when adaptive is defined as true.
+Nmin=4
+Nmax=400
 
 # logs,  folder and jobs file.
 baseDir=${PWD}
+toolDir=$(dir $(abspath $(lastword $(MAKEFILE_LIST))))
 oDir=${baseDir}/logs-$(shell date +%Y%m%d-%H%M%S)
 joblog=${oDir}/00-joblogs.txt
 
 #
 # in below, preproc creates argments for parallel command.
 #
+ifeq ($(expand),true)             # when expand is defined as true, stdin may have CIDR/range/@file, expanded lazily with shuf and limit applied.
+preproc=python3 ${toolDir}myTargetGen.py
+ifeq ($(shuf),true)
+preproc += --shuf
+endif
+ifneq ($(origin limit),undefined)
+preproc += --limit ${limit}
+endif
+ifneq ($(origin resume),undefined) # targets done are skipped before shuf and limit, same as below.
+preproc += --probe $(firstword $(MAKECMDGOALS)) --resume ${resume}
+endif
+else
 preproc=cat /dev/stdin
+ifneq ($(origin resume),undefined) # when resume is defined as previous oDir(s), skip targets already done in them.
+preproc +=| python3 ${toolDir}myResume.py --probe $(firstword $(MAKECMDGOALS)) --prev ${resume}
+endif
 ifeq ($(shuf),true)               # when shuf is defined as true, apply shuf command
 preproc +=| shuf
 endif
 ifneq ($(origin limit),undefined) # when limit is defined, apply it by head command.
 preproc +=| head --lines ${limit}
 endif
+endif
+
+# packets sent by one probe of each target, for pacing.
+cost_ping=21
+cost_checkalives=3
+cost_traceroute=90
+cost_doubletree=45
+cost_dig=1
+cost_exec=1
+ifeq ($(pace),true)               # when pace is defined as true, interleave targets across prefixes and pace them by pps(global) and prefixpps(per prefix).
+preproc +=| python3 ${toolDir}myPacer.py --cost $(or ${cost_$(firstword $(MAKECMDGOALS))},1)
+ifneq ($(origin pps),undefined)
+preproc += --pps ${pps}
+endif
+ifneq ($(origin prefixpps),undefined)
+preproc += --prefix-pps ${prefixpps}
+endif
+endif
+
+ifeq ($(adaptive),true)           # when adaptive is defined as true, window of parallel is adapted by myAdaptiveWindow.py via procfile.
+jobs=${oDir}/00-procfile
+adaptive_ctl=echo ${N} > ${jobs} ; python3 ${toolDir}myAdaptiveWindow.py --ppid $$$$ --probe $(firstword $(MAKECMDGOALS)) --joblog ${joblog} --procfile ${jobs} --init ${N} --min ${Nmin} --max ${Nmax} --log ${oDir}/00-window.txt &
+else
+jobs=${N}
+adaptive_ctl=
+endif
+
+ifneq ($(origin metrics),undefined) # when metrics is defined as path of textfile, myMetrics.py writes Prometheus metrics of the run into it periodically.
+metrics_ctl=python3 ${toolDir}myMetrics.py --ppid $$$$ --probe $(firstword $(MAKECMDGOALS)) --dir ${oDir} --joblog ${joblog} --output ${metrics} $(if $(filter true,${adaptive}),--procfile ${jobs},--window ${N}) 2> /dev/null &
+else
+metrics_ctl=
+endif
+
+# learned state of known hops for doubletree, made by 'python3 myDoubletree.py learn'.
+state=doubletree.json
+
+# output of each job, written into log file in oDir.
+ext_gzip=.gz
+ext_zstd=.zst
+ext_xz=.xz
+ifneq ($(origin compress),undefined) # when compress is defined (gzip|zstd|xz), logs are written compressed, i.e. {}.gz
+logsink=>(tee >(${compress} -c > ${oDir}/{}$(ext_${compress})) >&1)
+else
+logsink=>(tee ${oDir}/{} >&1)
+endif
 
 ifeq ($(sudo),true)               # when sudo is defined as true, execute process with sudo
 cmdsudo="sudo"
@@ -35,6 +99,9 @@ _stop_to_check:
 	@echo "   oDir: ${oDir}"
 	@echo " joblog: ${joblog}"
 	@echo "   sudo: ${sudo} cmdsudo:${cmdsudo}"
+	@echo "   jobs: ${jobs}"
+	@echo "metrics: ${metrics}"
+	@echo "logsink: ${logsink}"
 	@echo ""
 	@echo "how to use this makefile: pipe as below..."
 	@echo ""
@@ -44,6 +111,33 @@ _stop_to_check:
 	@echo " cat dests.txt   | make -f executor.mk traceroute"
 	@echo " cat dests.txt   | make -f executor.mk traceroute shuf=true limits=20"
 	@echo ""
+	@echo " * you can give CIDR/range/@file in stdin, expanded lazily (shuf and limit samples them without full expansion)..."
+	@echo " echo 10.0.0.0/8 | make -f executor.mk ping expand=true shuf=true limit=1000"
+	@echo ""
+	@echo " * you can interleave targets across /24 and pace them, to avoid ICMP rate limiting..."
+	@echo " cat dests.txt   | make -f executor.mk ping pace=true pps=500 prefixpps=5"
+	@echo ""
+	@echo " * you can let the window of parallel adapt to job latency, failures, CPU and file descriptors (changes logged in 00-window.txt)..."
+	@echo " cat dests.txt   | make -f executor.mk traceroute adaptive=true Nmin=8 Nmax=200"
+	@echo ""
+	@echo " * you can export progress of the run (jobs, probes/sec, window, hosts alive/dead, RTT histogram) for node_exporter textfile collector..."
+	@echo " cat dests.txt   | make -f executor.mk ping metrics=/var/lib/node_exporter/textfile/sweep.prom"
+	@echo ""
+	@echo " * you can ping many targets in one process (asyncio ICMP sockets), instead of one ping process for each..."
+	@echo " cat dests.txt   | make -f executor.mk icmp args='--concurrency 20000'"
+	@echo ""
+	@echo " * you can skip hops already known from earlier traceroute results (Doubletree), learn them then trace..."
+	@echo " python3 myDoubletree.py learn --merge logs-20230101-000000 -o doubletree.json"
+	@echo " cat dests.txt   | make -f executor.mk doubletree state=doubletree.json"
+	@echo ""
+	@echo " * you can write logs compressed (gzip|zstd|xz), parsers read them transparently..."
+	@echo " cat dests.txt   | make -f executor.mk ping compress=zstd"
+	@echo " python3 myLogIO.py compress logs-20230101-000000 -c zstd"
+	@echo ""
+	@echo " * you can resume interrupted run(s), only missing/failed/truncated targets are executed again..."
+	@echo " cat dests.txt   | make -f executor.mk ping resume='logs-20230101-000000 logs-20230102-000000'"
+	@echo " python3 myPingLogParser.py --merge logs-20230101-000000 logs-20230102-000000 -o merged.csv"
+	@echo ""
 	@echo " * you can execute any command with parallel as below..."
 	@echo " do some command | make -f executor.mk exec cmd=/usr/bin/... args='-opt1 val -opt2 val2 ...' env='LANG=C OTHERENV=BAR' "
 	@echo ""
@@ -53,19 +147,31 @@ traceroute: ${oDir}
 	$(eval args=-I -n ${args})
 	$(eval env=LANG=C ${env})
 	$(eval cmdsudo=sudo)
-	${preproc} | parallel --eta -k -t -j ${N} --joblog ${joblog}    "${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/{} >&1) " || true
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> ${logsink} " || true
+
+# traceroute starting after known prefix and stopping at known path, refer myDoubletree.py
+doubletree: ${oDir}
+	$(eval cmd=python3 ${toolDir}myDoubletree.py trace --state ${state} --)
+	$(eval args=-I -n ${args})
+	$(eval env=LANG=C ${env})
+	$(eval cmdsudo=sudo)
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> ${logsink} " || true
 
 ping:  ${oDir}
 	$(eval cmd=ping)
 	$(eval args=-O -c 21 ${args})
 	$(eval env=LANG=C ${env})
-	${preproc} | parallel --eta -k -t -j ${N} --joblog ${joblog}    "${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/{} >&1) " || true
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> ${logsink} " || true
+
+# ping all targets in one process by myIcmpProber.py(asyncio), without parallel. logs in oDir are compatible with 'ping -O'.
+icmp: ${oDir}
+	${preproc} | ${cmdsudo} python3 ${toolDir}myIcmpProber.py -c 21 --logdir ${oDir} $(if ${compress},--compress ${compress}) -o ${oDir}/00-icmp.csv ${args}
 
 checkalives: ${oDir}
 	$(eval cmd=ping)
 	$(eval args=-O -c 3 ${args})
 	$(eval env=LANG=C ${env})
-	${preproc} | parallel --eta -k -t -j ${N} --joblog ${joblog}    "${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/{} >&1) " || true
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> ${logsink} " || true
 
 # lookup DNS
 dig: ${oDir}
@@ -75,13 +181,13 @@ dig: ${oDir}
 ifeq ($(rev),true)               # when rev is defined as true, execute process with rev
 	$(eval args+=${args} -x)
 endif
-	${preproc} | parallel --eta -k -t -j ${N} --joblog ${joblog}    "${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/{} >&1) " || true
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> ${logsink} " || true
 
 
 exec:
 ifneq ($(origin cmd),undefined) # only when cmd is defined in somehow...
 	mkdir -p ${oDir}/stdout ${oDir}/stderr
-	${preproc} | parallel --eta -k -t -j ${N} --joblog ${joblog}    "${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/stdout/{} >&1)  2> >(tee ${oDir}/stderr/{} >&2) " || true
+	${adaptive_ctl} ${metrics_ctl} ${preproc} | parallel --eta -k -t -j ${jobs} --joblog ${joblog}    "SWEEP_PROBE=$@ ${cmdsudo} ${env} ${cmd} ${args} {}   1> >(tee ${oDir}/stdout/{} >&1)  2> >(tee ${oDir}/stderr/{} >&2) " || true
 else
 	@echo 'required cmd is not given,  use make -f executor.mk exec cmd="..." '
 endif
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+from    typing   import Any, Union
+import  os
+import  resource
+import  statistics
+import  sys
+import  time
+
+from    myJoblogParser import JoblogParser, JobRecord
+from    myResume       import okExitvals
+
+class _JoblogTail(object):
+    '''read records appended to joblog since last read.'''
+
+    def __init__(self, path:str):
+        self.path   = path
+        self.offset = 0
+        self.rest   = ''
+
+    def read(self) -> list[JobRecord]:
+        if not os.path.isfile(self.path):
+            return []
+        with open(self.path, encoding='utf-8') as fp:
+            fp.seek(self.offset)
+            tmp = fp.read()
+            self.offset = fp.tell()
+
+        tmp = self.rest + tmp
+        lines = tmp.split('\n')
+        self.rest = lines.pop()                                # incomplete last line, read it again next time.
+        rtn = []
+        for line in lines:
+            rec = JoblogParser.parseLine(line)
+            if rec is not None:
+                rtn.append(rec)
+        return rtn
+
+
+class AdaptiveWindow(object):
+    '''AIMD controller of concurrency window(-j) of parallel.
+
+       the window is decreased multiplicatively when one of below congestion signals is detected, and increased additively otherwise.
+
+         - failure rate of finished jobs  > maxFailRate
+         - timeout rate of finished jobs  > maxTimeoutRate, timeout is runtime > timeout(sec)
+         - median runtime of finished jobs > latencyFactor * baseline(best median seen so far)
+         - load average per CPU            > maxLoad
+         - free file descriptors           < num needed for the window
+    '''
+
+    def __init__(self, probe:str, wmin:int=4, wmax:int=400, init:int=40, step:int=2, beta:float=0.7,
+                 maxFailRate:float=0.2, maxTimeoutRate:float=0.1, timeout:Union[float,None]=None,
+                 latencyFactor:float=2.0, maxLoad:float=0.9, fdPerJob:int=8):
+        self.probe          = probe
+        self.wmin           = wmin
+        self.wmax           = wmax
+        self.window         = max(wmin, min(wmax, init))
+        self.step           = step
+        self.beta           = beta
+        self.maxFailRate    = maxFailRate
+        self.maxTimeoutRate = maxTimeoutRate
+        self.timeout        = timeout
+        self.latencyFactor  = latencyFactor
+        self.maxLoad        = maxLoad
+        self.fdPerJob       = fdPerJob
+        self.baseline:Union[float,None] = None                 # best median runtime seen so far.
+
+    def fdHeadroom(self) -> int:
+        '''max num of jobs allowed by file descriptors, both of process limit and system wide.'''
+
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)   # parallel is started by same shell, inherits same limit.
+        rtn = soft // self.fdPerJob
+        try:
+            with open('/proc/sys/fs/file-nr', encoding='utf-8') as fp:
+                allocated, _, fmax = [ int(v) for v in fp.read().split() ]
+            rtn = min(rtn, self.window + (fmax - allocated) // self.fdPerJob)
+        except (OSError, ValueError):
+            pass
+        return rtn
+
+    def update(self, recs:list[JobRecord]) -> tuple[int, str, dict[str,Any]]:
+        '''compute next window from jobs finished since last update.
+
+        Args:
+            recs(list[JobRecord]): finished jobs since last update.
+
+        Returns:
+            tuple(window, reason, metrics): new window, reason of change and observed metrics.
+        '''
+
+        oks = okExitvals.get(self.probe, [0])
+        metrics:dict[str,Any] = { 'finished': len(recs) }
+        reasons = []
+
+        if recs:
+            runtimes = [ r.runtime for r in recs ]
+            med      = statistics.median(runtimes)
+            failed   = sum( 1 for r in recs if r.signal != 0 or r.exitval not in oks )
+            metrics.update(median=round(med,3), failRate=round(failed/len(recs),3))
+
+            if self.baseline is None or med < self.baseline:
+                self.baseline = med
+            if metrics['failRate'] > self.maxFailRate:
+                reasons.append('fail')
+            if self.timeout is not None:
+                metrics['timeoutRate'] = round(sum( 1 for t in runtimes if t > self.timeout ) / len(recs), 3)
+                if metrics['timeoutRate'] > self.maxTimeoutRate:
+                    reasons.append('timeout')
+            if self.baseline > 0 and med > self.latencyFactor * self.baseline:
+                reasons.append('latency')
+
+        load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        fdmax = self.fdHeadroom()
+        metrics.update(load=round(load,3), fdmax=fdmax)
+        if load > self.maxLoad:
+            reasons.append('cpu')
+
+        window = self.window
+        if reasons:
+            window = int(window * self.beta)
+        elif recs:                                             # grow only while jobs are progressing.
+            window = window + self.step
+        if fdmax < window:
+            reasons.append('fd')
+            window = fdmax
+        window = max(self.wmin, min(self.wmax, window))
+
+        reason = ','.join(reasons) if reasons else 'grow'
+        self.window = window
+        return window, reason, metrics
+
+
+def writeProcfile(path:str, window:int):
+    '''write window to procfile of parallel, atomically.'''
+
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fp:
+        fp.write(f'{window}\n')
+    os.replace(tmp, path)
+
+
+def isRunning(pid:int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='adapt concurrency window(-j procfile) of parallel, by watching its joblog.')
+    parser.add_argument('-j','--joblog',            type=str,   required=True,         help='path of joblog written by parallel')
+    parser.add_argument('-f','--procfile',          type=str,   required=True,         help='path of procfile given to parallel as -j')
+    parser.add_argument('-p','--probe',             type=str,   default='ping',        help='kind of probe (ping|checkalives|traceroute|dig|exec)')
+    parser.add_argument(     '--min',               type=int,   default=4,             help='min of window')
+    parser.add_argument(     '--max',               type=int,   default=400,           help='max of window')
+    parser.add_argument(     '--init',              type=int,   default=40,            help='initial window')
+    parser.add_argument(     '--step',              type=int,   default=2,             help='additive increase of window')
+    parser.add_argument(     '--beta',              type=float, default=0.7,           help='multiplicative decrease of window')
+    parser.add_argument(     '--timeout',           type=float, default=None,          help='runtime(sec) to regard the job as timeout')
+    parser.add_argument(     '--max-fail-rate',     type=float, default=0.2,           help='failure rate to decrease window')
+    parser.add_argument(     '--max-timeout-rate',  type=float, default=0.1,           help='timeout rate to decrease window')
+    parser.add_argument(     '--latency-factor',    type=float, default=2.0,           help='median runtime / baseline to decrease window')
+    parser.add_argument(     '--max-load',          type=float, default=0.9,           help='load average per CPU to decrease window')
+    parser.add_argument(     '--fd-per-job',        type=int,   default=8,             help='file descriptors used by one job')
+    parser.add_argument('-t','--interval',          type=float, default=5,             help='interval(sec) to update window')
+    parser.add_argument(     '--ppid',              type=int,   default=None,          help='exit when this process is gone, i.e. shell running parallel')
+    parser.add_argument('-l','--log',               type=str,   default=None,          help='path to log each change of window')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    ctrl = AdaptiveWindow(args.probe, wmin=args.min, wmax=args.max, init=args.init, step=args.step, beta=args.beta,
+                          maxFailRate=args.max_fail_rate, maxTimeoutRate=args.max_timeout_rate, timeout=args.timeout,
+                          latencyFactor=args.latency_factor, maxLoad=args.max_load, fdPerJob=args.fd_per_job)
+    tail = _JoblogTail(args.joblog)
+    logfp = open(args.log, 'a', encoding='utf-8') if args.log else None
+
+    writeProcfile(args.procfile, ctrl.window)
+    while args.ppid is None or isRunning(args.ppid):
+        time.sleep(args.interval)
+        old = ctrl.window
+        window, reason, metrics = ctrl.update(tail.read())
+        if window == old:
+            continue
+
+        writeProcfile(args.procfile, window)
+        msg = f'{time.time():.3f}\t{args.probe}\t{old}\t{window}\t{reason}\t{metrics}'
+        print(f'window {msg}', file=sys.stderr)
+        if logfp:
+            print(msg, file=logfp, flush=True)
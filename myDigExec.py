@@ -2,10 +2,10 @@
 
 import subprocess
 from typing import Any
-import jc
 
 
 def queryDig(dst:str, rev:bool=False) -> list[dict]:
+    import jc   # lazy import, jc takes long time to load.
 
     cmd = [ 'dig' ]
     if rev:
@@ -36,7 +36,6 @@ def extract(ldict:list[str,Any], cond:dict[str,Any], key:str='data' ) -> list[An
 if __name__ == '__main__':
     import argparse
     import sys
-    import jc
 
     parser = argparse.ArgumentParser()
     parser.add_argument('dest',                     type=str,  default=None,    help='destination')
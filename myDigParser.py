@@ -2,10 +2,13 @@
 
 from    pydantic import BaseModel, Extra
 from    collections import defaultdict
-from    typing   import Any, Union
+from    typing   import Any, Iterable, Iterator, Union
 import  re
 import  sys
-import  numpy as np
+
+from    myProfiler import NullProfiler
+from    myLogIO    import openLog
+from    myParserBase import HostBase, mkdict
 
 class DigRespRecord(BaseModel, extra=Extra.allow): # refer pydantic doc for detail.
       '''datamodel for dig  responce in pydantic BaseModel.
@@ -21,41 +24,249 @@ class DigRespRecord(BaseModel, extra=Extra.allow): # refer pydantic doc for deta
       Type:str=None
       Val:str=None
 
+# lines out of sections in dig output, i.e. header and statistics.
+pattern_header  = re.compile(r'^;; ->>HEADER<<- opcode: (?P<opcode>[^,]+), status: (?P<status>[^,]+), id: (?P<id>\d+)')
+pattern_flags   = re.compile(r'^;; flags:(?P<flags>[^;]*);(?P<counts>.*)$')
+pattern_qtime   = re.compile(r'^;; Query time: (?P<qtime>\d+) (?P<unit>msec|usec)')
+pattern_server  = re.compile(r'^;; SERVER: (?P<server>[^#\s]+)#(?P<port>\d+)(?:\([^)]*\))?(?:\s+\((?P<proto>[^)]+)\))?')
+pattern_section = re.compile(r'^;; (?P<section>[A-Z]+) SECTION:$')
+pattern_cmd     = re.compile(r'^; <<>> DiG \S+ <<>> (?P<args>.*)$')
+pattern_commerr = re.compile(r'^;; (?:communications error to (?P<server>[^#\s]+)#(?P<port>\d+): (?P<reason>.+)|connection timed out; .*)$')
+
+def queryOf(args:Union[str,None], qname:Union[str,None]) -> Union[str,None]:
+    '''query of response, the address for reverse lookup(-x), otherwise the name in question section.
+
+    Args:
+       args(str):   arguments of dig in its output, '; <<>> DiG 9.18 <<>> {args}'
+       qname(str):  name in question section.
+    '''
+
+    toks = args.split() if args else []
+    if '-x' in toks[:-1]:
+       return toks[ toks.index('-x') +1 ]
+    if qname:
+       return qname[0:-1] if qname.endswith('.') and len(qname) > 1 else qname
+    plain = [ t for t in toks if t[0] not in '@+-' ]
+    return plain[0] if plain else None
+
+
+class DigScanner(object):
+    '''streaming scanner of dig output, split concatenated responses(i.e. by myDigExec, dig -f) in one pass.
+
+       lines after the last wanted section are skipped until the next response,
+       statistics (query time, server etc.) come after all sections, so they stop the skip only when stats is wanted.
+    '''
+
+    order = {'QUESTION':0, 'ANSWER':1, 'AUTHORITY':2, 'ADDITIONAL':3}
+
+    def __init__(self, sections:list[str]=['ANSWER','AUTHORITY','ADDITIONAL'], stats:bool=True):
+        self.sections = [ x for x in sections if x in self.order and x != 'QUESTION' ]
+        self.stats    = stats
+        self.last     = max( [ self.order[x] for x in self.sections ] + [0] )   # the last section to pick.
+
+    def scan(self, lines:Iterable[str]) -> Iterator[dict[str,Any]]:
+        '''split lines into responses.
+
+        Args:
+           lines(Iterable[str]): lines in log, i.e. file object.
+
+        Returns:
+           Iterator[dict[str,Any]]: response, {'args': args of dig, 'qname': name in question,
+                                     'sections': {section: lines}, 'stats': header and statistics lines, 'lines': num of lines}
+        '''
+
+        resp = None
+        cur  = None                                  # current section,  None for out of sections.
+        done = False                                 # True after the last wanted section (and stats).
+        n    = 0
+        for line in lines:
+            n += 1
+            line = line.rstrip('\n')
+            if line.startswith('; <<>> DiG ') or (line.startswith(';; Got answer:') and (resp is None or resp['header'])):
+               if resp is not None:
+                  resp['lines'] = n -1
+                  yield resp
+               m = pattern_cmd.match(line)
+               resp = {'args': m.group('args') if m else None, 'qname': None, 'sections': { x:[] for x in self.sections }, 'stats': [], 'header': False, 'lines': 0}
+               cur, done, n = None, False, 1
+               continue
+            if done or resp is None:
+               continue
+
+            if line == '':
+               cur = None
+               continue
+            if cur == 'QUESTION':
+               if resp['qname'] is None and line.startswith(';'):
+                  resp['qname'] = line[1:].split(maxsplit=1)[0] if len(line) > 1 else None
+               continue
+            if cur is not None:
+               resp['sections'][cur].append(line)
+               continue
+            if not line.startswith(';;'):
+               continue
+
+            m = pattern_section.match(line)
+            if m:
+               section = m.group('section')
+               if section == 'QUESTION' or section in resp['sections']:
+                  cur = section
+               elif self.order.get(section, 0) > self.last and not self.stats:
+                  done = True                        # no more section to pick.
+               continue
+            if line.startswith(';; Query time:') and not self.stats:
+               done = True
+               continue
+            if line.startswith(';; ->>HEADER<<-'):
+               resp['header'] = True
+            resp['stats'].append(line)
+
+        if resp is not None:
+           resp['lines'] = n
+           yield resp
+
+
 # keep results
-class _Host(object):
+class _Host(HostBase):
    '''Holder of parsed results for each host, and helper functions.'''
 
    def __init__(self):
-       self.params:dict[str,Any] = {'resp':defaultdict(list) } # keep everything. 'resp' for dict[str,list[DigRespRecord]]
+       super().__init__(resp=defaultdict(list), authority=[], additional=[])   # 'resp' for dict[str,list[DigRespRecord]] in answer section.
+
+   def append(self, rec:DigRespRecord, section:str='ANSWER'):
+       '''store parsed result for each dig record, in answer section by type, in others as is.'''
 
-   def set(self, **kwargs):
-       '''setter of parameters.'''
-       self.params.update(kwargs)
+       if section == 'ANSWER':
+          ty = rec.Type
+          self.params['resp'][ty].append(rec)
+       else:
+          self.params[section.lower()].append(rec)
        return self
 
-   def get(self, key:str, default:Any=None):
-       '''getter of parameter.'''
-       return self.params.get(key, default)
 
-   def append(self, rec:DigRespRecord):
-       '''store parsed result for each dig record.'''
+class DigIndex(object):
+    '''reverse index of answers, value => names for each type of record, and name => values.
 
-       ty = rec.Type
-       self.params['resp'][ty].append(rec)
-       return self
+       names(keys of results) and values are interned into tables once, and the index keeps their ids in arrays,
+       so it stays compact for 100k+ names and is sent cheaply between processes.
+    '''
+
+    def __init__(self):
+        self.strs:list[str] = []                         # interned names and values, id => str
+        self.ids:dict[str,int] = {}                      # str => id
+        self.fwd:dict[str,dict[int,Any]] = defaultdict(dict)   # key: type, val: { name id: array of value ids }
+        self.rev:dict[str,dict[int,Any]] = defaultdict(dict)   # key: type, val: { value id: array of name ids }
+
+    def __intern(self, s:str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strs)
+            self.strs.append(sys.intern(s))
+        return i
+
+    def remove(self, name:str):
+        '''remove all values of name, i.e. the name is parsed again.'''
+
+        nid = self.ids.get(name)
+        if nid is None:
+            return self
+        for ty, fwd in self.fwd.items():
+            vids = fwd.pop(nid, None)
+            if vids is None:
+                continue
+            rev = self.rev[ty]
+            for vid in set(vids):
+                rev[vid].remove(nid)
+                if not rev[vid]:
+                    del rev[vid]
+        return self
+
+    def put(self, name:str, resp:dict[str,list[DigRespRecord]]):
+        '''index answers of name, replacing the ones indexed before.
+
+        Args:
+            name(str):   key of results, dest or query.
+            resp(dict):  records in answer section by type, _Host.get('resp')
+        '''
+
+        return self.__put(name, { ty: [ r.Val for r in recs if r.Val is not None ] for ty, recs in resp.items() })
+
+    def __put(self, name:str, values:dict[str,list[str]]):
+        from array import array
+
+        self.remove(name)
+        nid = self.__intern(name)
+        for ty, vals in values.items():
+            vids = array('I', dict.fromkeys( self.__intern(v) for v in vals ))   # unique, in order of answer.
+            if not vids:
+                continue
+            self.fwd[ty][nid] = vids
+            rev = self.rev[ty]
+            for vid in vids:
+                rev.setdefault(vid, array('I')).append(nid)
+        return self
+
+    def merge(self, other:'DigIndex'):
+        '''merge index built by other parser, i.e. in other process. names in other replace the ones here.'''
+
+        names = dict.fromkeys( nid for fwd in other.fwd.values() for nid in fwd )
+        for nid in names:
+            self.__put(other.strs[nid], { ty: [ other.strs[v] for v in fwd[nid] ] for ty, fwd in other.fwd.items() if nid in fwd })
+        return self
+
+    def namesOf(self, value:str, type:str='A') -> list[str]:
+        '''names which have value in answer of type, i.e. names resolved to an IP, or sharing a CNAME target.'''
+
+        vid = self.ids.get(value)
+        if vid is None:
+            return []
+        return [ self.strs[n] for n in self.rev.get(type, {}).get(vid, ()) ]
+
+    def valuesOf(self, name:str, type:str='A') -> list[str]:
+        '''values in answer of type for name.'''
+
+        nid = self.ids.get(name)
+        if nid is None:
+            return []
+        return [ self.strs[v] for v in self.fwd.get(type, {}).get(nid, ()) ]
+
+    def shared(self, type:str='CNAME', min:int=2) -> dict[str,list[str]]:
+        '''values shared by min or more names, i.e. names sharing a CNAME target.'''
+
+        return { self.strs[vid]: [ self.strs[n] for n in nids ] for vid, nids in self.rev.get(type, {}).items() if len(nids) >= min }
+
+    def missing(self, type:str='A', by:str='PTR') -> list[str]:
+        '''values of type which have no answer of type 'by' as name, i.e. IPs resolved by A without PTR.'''
+
+        has = self.fwd.get(by, {})
+        return [ self.strs[vid] for vid in self.rev.get(type, {}) if vid not in has ]
+
+    def mkData(self, types:Union[list[str],None]=None) -> list[dict[str,Any]]:
+        '''make data for output, one row for each (type, value, name) in reverse index.'''
+
+        rtn = []
+        for ty in (types if types is not None else list(self.rev.keys())):
+            for vid, nids in self.rev.get(ty, {}).items():
+                for nid in nids:
+                    rtn.append( {'type': ty, 'value': self.strs[vid], 'target': self.strs[nid]} )
+        return rtn
 
 
 # Dig LogFile Parser.
 class DigLogParser(object):
-    def __init__(self):
-        self.results:dict[str,_Host] = {}             # holder for all parsed results,  key:destIP
+    def __init__(self, profiler:NullProfiler=None, sections:list[str]=['ANSWER','AUTHORITY','ADDITIONAL'], stats:bool=True, byQuery:bool=False, index:bool=False):
+        self.results:dict[str,_Host] = {}             # holder for all parsed results,  key:destIP or query
         self.maxCount = defaultdict(int)              # holder for max records for each type, to use pretty-print
+        self.profiler = profiler or NullProfiler()    # phase/counter profiler, for --profile
+        self.scanner  = DigScanner(sections=sections, stats=stats)
+        self.byQuery  = byQuery                       # key also the first response in log by its query, instead of dest.
+        self.index    = DigIndex() if index else None # reverse index of answers, built while parsing.
 
     def getResults(self):
         return self.results, self.maxCount
 
     def run(self, logpath:str, dest:str, verbose:bool=False):
-        '''Parse one Logfile of ping.
+        '''Parse one Logfile of dig, streaming, the log may have multiple responses.
            one of main function of this class.
 
         Args:
@@ -67,52 +278,125 @@ class DigLogParser(object):
         if verbose:
            print(f'start parsing for {dest} in {logpath}', file=sys.stderr)
 
-        # phase1) get contents from logfile
-        logs:list[str] = None
-        with open(logpath, encoding='utf-8') as logfp:
-             tmp = logfp.read().splitlines()
-
-        if not any(tmp):
-            return
-
-        # phase2) pick line in section (answer or authority)
-        logs = []
-        flg = False
-        for line in tmp:
-            if flg in [ False ]:
-               if line.startswith(';; ANSWER SECTION:'):
-                     flg=True
-               continue
-            if flg in [ True ]:
-               if line == '':
-                  flg=False
-                  continue
-               logs.append(line)
-
-               if verbose:
-                   print(f'{dest} {line}  => {p}    {logpath}', file=sys.stderr)
-        # end of picking line.
-
-        # phase3) pick data from picked line.
-        hrec = _Host().set(dest=dest, log=logpath)
-        self.results [ dest ] = hrec
-
-        resp = self.__parseResp(logs, hrec)
-        for k,v in resp.items():
-              l = len(v)
-              if self.maxCount[k] < l:
-                    self.maxCount[k] = l
+        prof = self.profiler
+
+        with prof.phase('read'):
+            logfp = openLog(logpath)                     # .gz/.xz/.zst are decompressed in stream.
+        prof.count('files')
+        with logfp:
+            self.parse(self.__readLines(logfp), logpath, dest, verbose=verbose)
+        return
+
+    def __readLines(self, logfp:Iterable[str], hint:int=1<<16) -> Iterator[str]:
+        '''lines of log file read in blocks while parsing, time of reading goes to 'read' phase, not 'parse'.'''
+
+        prof = self.profiler
+        while True:
+            with prof.phase('read'):
+                block = logfp.readlines(hint)
+            if not block:
+                return
+            yield from block
+
+    def parse(self, tmp:Iterable[str], logpath:str, dest:str, verbose:bool=False):
+        '''Parse contents of one Logfile of dig, list of lines or file object.
+
+           the first response is kept as dest, and the others(i.e. reverse lookups by myDigExec) as their query.
+           all responses are kept as their query when byQuery.
+
+        Args:
+           tmp(Iterable[str]):  lines in logfile.
+           logpath(str):        log of dig result   (i.e digCmd dest > logfile. )
+           dest(str):           target of dig       (i.e digCmd dest > logfile. )
+           verbose(bool):       verbose print while parsing or not
+        '''
+
+        prof = self.profiler
+        with prof.phase('parse'):
+            for i, resp in enumerate(self.scanner.scan(tmp)):
+                prof.count('lines', resp['lines'])
+                prof.count('responses')
+                query = queryOf(resp['args'], resp['qname'])
+                key = dest if i == 0 and not self.byQuery else (query or dest)
+
+                hrec = _Host().set(dest=key, query=query, log=logpath)
+                self.results [ key ] = hrec
+
+                for line in resp['stats']:
+                    self.__parseStats(line, hrec)
+                for section, block in resp['sections'].items():
+                    if verbose:
+                        for line in block:
+                            print(f'{key} {line}    {logpath}', file=sys.stderr)
+                    self.__parseResp(block, hrec, section)
+
+                resp = hrec.get('resp')
+                for k,v in resp.items():
+                      l = len(v)
+                      if self.maxCount[k] < l:
+                            self.maxCount[k] = l
+                if self.index is not None:
+                    self.index.put(key, resp)
 
         return
 
-    def __parseResp(self, block:list[str], hrec: _Host):
-        '''parse each line in dig answer section.
+    def merge(self, other:'DigLogParser'):
+        '''merge results parsed by other parser, i.e. in other process.'''
+
+        self.results.update(other.results)
+        for k,v in other.maxCount.items():
+              if self.maxCount[k] < v:
+                    self.maxCount[k] = v
+        if self.index is not None and other.index is not None:
+              self.index.merge(other.index)
+        return self
+
+    def __parseStats(self, line:str, hrec: _Host):
+        '''parse line out of sections, status and flags in header, query time and server.
+
+        Args:
+           line(str):        line starting with ';;'
+           hrec(_Host):      record to keep result.
+        '''
+
+        m = pattern_header.match(line)
+        if m:
+           hrec.set(opcode=m.group('opcode'), status=m.group('status'))
+           return
+        m = pattern_flags.match(line)
+        if m:
+           hrec.set(flags=m.group('flags').strip())
+           for kv in m.group('counts').split(','):       # QUERY: 1, ANSWER: 2, AUTHORITY: 0, ADDITIONAL: 1
+               k, _, v = kv.partition(':')
+               if v.strip().isdigit():
+                  hrec.set(**{ 'count_' + k.strip().lower(): int(v) })
+           return
+        m = pattern_qtime.match(line)
+        if m:
+           qtime = float(m.group('qtime'))
+           hrec.set(qtime=qtime if m.group('unit') == 'msec' else qtime / 1000)
+           return
+        m = pattern_server.match(line)
+        if m:
+           hrec.set(server=m.group('server'), port=int(m.group('port')), proto=m.group('proto'))
+           return
+        m = pattern_commerr.match(line)
+        if m and hrec.get('status') is None:           # no response at all.
+           reason = m.group('reason')
+           hrec.set(status='TIMEOUT' if reason is None or 'timed out' in reason else 'COMMERR')
+           if m.group('server'):
+              hrec.set(server=m.group('server'), port=int(m.group('port')))
+        return
+
+    def __parseResp(self, block:list[str], hrec: _Host, section:str='ANSWER'):
+        '''parse each line in dig answer, authority or additional section.
 
            cf. https://github.com/kellyjonbrazil/jc/blob/master/jc/parsers/dig.py#L473
 
         Args:
-           block(list[str]): lines in answer section.
+           block(list[str]): lines in the section.
            hrec(_Host):      record to keep result.
+           section(str):     name of section (ANSWER|AUTHORITY|ADDITIONAL)
 
         Returns:
            dict[str, list[DigRespRecord]]: records in answer section, groupby type(IN|CNAME etc)
@@ -120,29 +404,27 @@ class DigLogParser(object):
         
         for log in block:
               l = log.split(maxsplit=4)
+              if len(l) < 5:
+                 print(f'#error ####### unknown record detected, {log}', file=sys.stderr)
+                 self.profiler.count('unknown')
+                 continue
+              self.profiler.count('records')
               #if l[3] in 'CNAME':
               #      l[4] = l[4][0:-1] # chop last '.' from CNAME DATA.
               if l[4].endswith('.'):
                  l[4] = l[4][0:-1]     # chop last '.'.
               d = DigRespRecord(Name=l[0], Class=l[2], Type=l[3], Val=l[4], Ttl=l[1])
-              hrec.append(d)
+              hrec.append(d, section)
         return hrec.get('resp')
 
           
-    def mkdict(self, keys:list[str], vals:list[Any]) -> dict[str,Any]:
-        '''make dict from list of keys and values
+    def mkData(self, fields:list[str]=['A','CNAME'], rtoh:dict[str,str]={'CNAME':'cname', 'A':'ip'}, includes_stats:bool=False ):
+        '''make data for output.
 
         Args:
-            keys: key of dict
-            vals: val of dict
-        '''
-
-        if len(keys) != len(vals):
-              raise RuntimeError(f'num of keys and vals is mismatched, keys:{keys}   vals:{vals}')
-        return dict(zip(keys, vals))
-
-    def mkData(self, fields:list[str]=['A','CNAME'], rtoh:dict[str,str]={'CNAME':'cname', 'A':'ip'} ):
-        '''make data for output.
+           fields(list[str]):     types of record to output.
+           rtoh(dict[str,str]):   type of record => column name.
+           includes_stats(bool):  output status, flags, query time, server and num of authority/additional records, or not.
 
         Returns:
            list[dict[str,Any]]: data to output
@@ -151,7 +433,7 @@ class DigLogParser(object):
         rtn = []
 
         recs, count = self.getResults()                        # get all results
-        if not any(recs) or not any(count):
+        if not any(recs) or (not any(count) and not includes_stats):
            print(f'########### no records found !')
            return rtn
 
@@ -171,6 +453,11 @@ class DigLogParser(object):
               for cn in range(1,c+1):
                     h = nformat.format(cn)
                     keys.append(h)
+
+        statKeys = []
+        if includes_stats:
+              statKeys = ['status', 'flags', 'query_time', 'server', 'proto', 'num_authority', 'num_additional']
+              keys.extend(statKeys)
         #end, making keys.
 
         #
@@ -191,25 +478,63 @@ class DigLogParser(object):
                       vals.append(d.Val)    # fill exact data.
                 for n in range(l,count[k]): # fill None if num of record < MAX count.
                       vals.append(None)
-            d = self.mkdict(keys,vals)
+            if includes_stats:
+                vals.extend( [ hrec.get('status'), hrec.get('flags'), hrec.get('qtime'), hrec.get('server'), hrec.get('proto'),
+                               len(hrec.get('authority')), len(hrec.get('additional')) ] )
+            d = mkdict(keys,vals)
             rtn.append(d)
         #end, making data part
         return rtn
 
+    def getLatencyStats(self, quantiles:list[float]=[0.5, 0.9, 0.99]):
+        '''resolver latency distribution for each (server, status), vectorized by pandas groupby.
+
+        Args:
+           quantiles(list[float]): quantiles of query time to output, as p50, p90 ...
+
+        Returns:
+           DataFrame: server, status, count, share(in server), mean, min, max and quantiles of query time in msec.
+        '''
+
+        import pandas as pd
+
+        df = pd.DataFrame( [ (h.get('server'), h.get('status'), h.get('qtime')) for h in self.results.values() ],
+                           columns=['server', 'status', 'query_time'] )
+        df['server'] = df['server'].fillna('-')                     # i.e. no servers could be reached.
+        df['status'] = df['status'].fillna('UNKNOWN')               # i.e. broken log.
+        df['query_time'] = df['query_time'].astype(float)
+
+        g  = df.groupby(['server', 'status'])['query_time']
+        st = g.agg(['size', 'mean', 'min', 'max']).rename(columns={'size': 'count'})
+        if len(df):
+           q = g.quantile(quantiles).unstack()
+           q.columns = [ 'p' + format(c*100, 'g') for c in q.columns ]
+           st = st.join(q)
+        st.insert(1, 'share', st['count'] / st.groupby(level='server')['count'].transform('sum'))
+        return st.reset_index()
+
 # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 
 if __name__ == '__main__':
     import argparse
-    import os
     from   collections import OrderedDict
-    import pandas as pd
+    from   myProfiler import PhaseProfiler
+    from   myLogIO    import writeData, readPathList
 
 
     parser = argparse.ArgumentParser(description='Ping multiple hosts and collect responses.')
     parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of log files list')
     parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output')
     parser.add_argument('-r','--rev',               type=bool,default=False,           help='parse for reverse-resolve')
+    parser.add_argument('-T','--stats',             action="store_true",               help='output status, flags, query time and server of each query')
+    parser.add_argument('-Q','--byQuery',           action="store_true",               help='key results by query in log, instead of file name')
+    parser.add_argument('-L','--latency',           type=str, default=None,            help='path of CSV file to output resolver latency for each server and status')
+    parser.add_argument('-I','--index',             type=str, default=None,            help='path of CSV file to output reverse index of answers (type, value, target)')
     parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
+    parser.add_argument('-S','--store',             type=str, default=None,            help='root directory of historical results store, to append results of this run')
+    parser.add_argument('-P','--profile',           type=str, default=None,            help='path to output profile of each phase in JSON, "-" for stderr')
+    parser.add_argument('-C','--cprofile',          type=str, default=None,            help='path to dump cProfile stats of parsing')
+    parser.add_argument('-m','--merge',             type=str, nargs='+', default=None, help='merge output directories of executor.mk(older one first), instead of --input')
     args = parser.parse_args()
     print(args, file=sys.stderr)
 
@@ -238,27 +563,32 @@ if __name__ == '__main__':
     #
 
 
+    prof = PhaseProfiler() if args.profile or args.cprofile else NullProfiler()
     logFiles:dict[str,str] = OrderedDict() # dict of { log-path, fqdn }
 
-    if not args.input:
-        raise RuntimeError('dig log files required')
+    with prof.phase('pathlist'):
+        if args.merge:
+            from myResume import mergeLogFiles
+            logFiles = mergeLogFiles(args.merge, probe='dig')
+        else:
+            if not args.input:
+                raise RuntimeError('dig log files required')
 
-    with open(args.input, encoding='utf-8') as fp:
-        content = fp.read().splitlines()
-
-    if not any(content):
-        print('... empty content', file=sys.stderr)
-    for path in content:
-        f = os.path.basename(path)
-        logFiles[path] = f
+            logFiles = readPathList(args.input)
 
     if args.verbose:
         print(logFiles)
 
 
-    logparser = DigLogParser()
+    sections  = ['ANSWER','AUTHORITY','ADDITIONAL'] if args.stats else ['ANSWER']       # stop scanning at the end of needed sections.
+    logparser = DigLogParser(profiler=prof, sections=sections, stats=args.stats or args.latency is not None, byQuery=args.byQuery,
+                            index=args.index is not None)
+    if args.cprofile:
+        prof.startCProfile()
     for path, dest in logFiles.items():
         logparser.run(path, dest, verbose=args.verbose)
+    if args.cprofile:
+        prof.stopCProfile(args.cprofile)
 
 
     #outheader = {'A':'ip', 'CNAME':'cname', 'PTR': 'name'}
@@ -267,10 +597,23 @@ if __name__ == '__main__':
     if args.rev:
         outheader = {'PTR':'name'}
 
-    ldict = logparser.mkData(fields=outheader.keys(), rtoh=outheader)
+    with prof.phase('mkData'):
+        ldict = logparser.mkData(fields=outheader.keys(), rtoh=outheader, includes_stats=args.stats)
+
+    writeData(ldict, args.output, profiler=prof)
+
+    if args.latency:
+        with prof.phase('latency'):
+            logparser.getLatencyStats().to_csv(args.latency, index=False)
+
+    if args.index:
+        with prof.phase('index'):
+            writeData(logparser.index.mkData(), args.index)
+
+    if args.store:
+        from myResultStore import ResultStore, runTsOf
+        with prof.phase('store'):
+            ResultStore(args.store).append('dig', ldict, runTsOf(list(logFiles.keys())), dstColName='target')
 
-    df = pd.DataFrame( ldict)
-    if args.output.endswith('.xlsx'):
-        df.to_excel(args.output, index=False)
-    else:
-        df.to_csv(args.output, index=False)
+    if args.profile:
+        prof.dump(args.profile)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+from    collections import Counter, defaultdict
+from    typing   import Any, TextIO, Union
+import  ipaddress
+import  json
+import  os
+import  sys
+
+from    myPacer  import PrefixMapper
+
+#
+# Doubletree-style traceroute from one vantage point, cf. Donnet et al., "Efficient algorithms for large-scale topology discovery".
+#
+#   - hops near the vantage point are shared by almost all traces. they are learned from earlier results as 'prefix',
+#     then new traces start after them (traceroute -f), the prefix is written into the log to rebuild the full path.
+#   - global stop set of (interface, dest prefix) is learned from earlier traces. when a trace reaches an interface
+#     already known on the way to the same dest prefix, the rest of known path(without its dest) is written as 'suffix',
+#     and the trace goes on after it (traceroute -f) until the dest itself answers, known hops are not probed again.
+#
+#   lines written by trace() in addition to output of traceroute, parsed by TracerouteLogParser:
+#     #doubletree first  {first TTL}
+#     #doubletree prefix {hop} {ip}
+#     #doubletree stop   {hop} {ip}
+#     #doubletree suffix {hop} {ip}
+#   prefix and suffix hops are rebuilt from known path, not probed in this trace.
+#
+timeoutIp = '0.0.0.0'
+
+def hopOf(line:str) -> tuple[Union[int,None], Union[str,None]]:
+    '''hop count and the first responding IP in a line of traceroute output, (None, None) for others.'''
+
+    l = line.split()
+    if not l or not l[0].isdigit():
+        return None, None
+    for t in l[1:]:
+        if t == '*':
+            continue
+        try:
+            return int(l[0]), str(ipaddress.ip_address(t))
+        except ValueError:
+            break
+    return int(l[0]), None
+
+
+class DoubletreeState(object):
+    '''known hops learned from earlier traceroute results, shared prefix and global stop set.'''
+
+    def __init__(self, prefix:list[str]=[], stops:dict[str,dict[str,Any]]={}, v4len:int=24, v6len:int=48):
+        self.prefix = list(prefix)                   # IPs of hop 1..k, shared by most traces.
+        self.stops  = stops                          # key: dest prefix, val: { ip: {'suffix': [ip...], 'reached': bool} }
+        self.mapper = PrefixMapper(v4len=v4len, v6len=v6len)
+
+    @property
+    def first(self) -> int:
+        '''first TTL of new traces.'''
+        return len(self.prefix) +1
+
+    @classmethod
+    def learn(cls, traces:dict[str,list[str]], threshold:float=0.9, maxFirst:int=8, v4len:int=24, v6len:int=48):
+        '''learn known hops from earlier traces.
+
+        Args:
+            traces(dict[str,list[str]]): key: dest,  val: IP of hop 1..n, timeoutIp for no response.
+            threshold(float):            a hop is in prefix when this ratio of traces share it.
+            maxFirst(int):               max first TTL, i.e. num of prefix hops +1
+            v4len/v6len(int):            prefix length of dest to share stop set.
+
+        Returns:
+            DoubletreeState: learned state.
+        '''
+
+        rtn = cls(v4len=v4len, v6len=v6len)
+
+        for i in range(maxFirst -1):                 # phase1) shared prefix, hop by hop.
+            hops = [ p[i] for p in traces.values() if len(p) > i+1 ]     # exclude traces which reach its dest at this hop.
+            if not hops:
+                break
+            ip, n = Counter(hops).most_common(1)[0]
+            if ip == timeoutIp or n < threshold * len(traces):
+                break
+            rtn.prefix.append(ip)
+
+        stops:dict[str,dict[str,Any]] = defaultdict(dict)
+        for dest, path in traces.items():            # phase2) stop set, the later trace wins.
+            key = rtn.mapper.keyOf(dest)
+            reached = len(path) > 0 and path[-1] == dest
+            for i in range(len(rtn.prefix), len(path) -1):
+                ip = path[i]
+                if ip == timeoutIp or ip == dest:
+                    continue
+                suffix = path[i+1:-1] if reached else path[i+1:]
+                stops[key][ip] = {'suffix': suffix, 'reached': reached}
+        rtn.stops = dict(stops)
+        return rtn
+
+    def stopOf(self, dest:str, ip:str) -> Union[list[str],None]:
+        '''rest of known path to dest prefix after ip, None when (ip, dest prefix) is not in stop set.
+
+           the known path may be for other dest in the same prefix, its dest is never in the suffix.
+        '''
+
+        known = self.stops.get(self.mapper.keyOf(dest), {}).get(ip)
+        if known is None:
+            return None
+        return list(known['suffix'])
+
+    def save(self, path:str):
+        '''save state in JSON, atomically.'''
+
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            json.dump({'prefix': self.prefix, 'v4len': self.mapper.v4len, 'v6len': self.mapper.v6len, 'stops': self.stops}, fp)
+        os.replace(tmp, path)
+        return self
+
+    @classmethod
+    def load(cls, path:str):
+        with open(path, encoding='utf-8') as fp:
+            d = json.load(fp)
+        return cls(prefix=d['prefix'], stops=d['stops'], v4len=d['v4len'], v6len=d['v6len'])
+
+
+def trace(state:DoubletreeState, dest:str, targs:list[str], traceroute:str='traceroute', out:TextIO=sys.stdout) -> int:
+    '''run traceroute from the first TTL, skip the rest of known path when a hop joins it, and go on to dest.
+
+    Args:
+        state(DoubletreeState): known hops.
+        dest(str):              destination.
+        targs(list[str]):       other arguments of traceroute.
+        traceroute(str):        traceroute command.
+        out(TextIO):            output of traceroute and doubletree lines.
+
+    Returns:
+        int: exit value of the last traceroute.
+    '''
+
+    import shutil
+    import subprocess                                # lazy import, only for trace.
+
+    def run(first:int, stop:bool) -> tuple[int, Union[int,None]]:
+        '''traceroute from first TTL, (exit value, TTL to go on from) when stopped by stop set, (exit value, None) otherwise.'''
+
+        cmd = [traceroute, '-f', str(first)] + targs + [dest]
+        if shutil.which('stdbuf'):
+            cmd = ['stdbuf', '-oL'] + cmd            # traceroute output hop by hop into pipe.
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, bufsize=1)
+        after = None
+        for line in proc.stdout:
+            out.write(line)
+            out.flush()
+            hop, ip = hopOf(line)
+            if not stop or ip is None or ip == dest:
+                continue
+            suffix = state.stopOf(dest, ip)
+            if not suffix:                           # not known, or nothing to skip.
+                continue
+
+            print(f'#doubletree stop {hop} {ip}', file=out)
+            for j, s in enumerate(suffix):
+                print(f'#doubletree suffix {hop+j+1} {s}', file=out)
+            out.flush()
+            proc.terminate()
+            after = hop + len(suffix) +1
+            break
+        proc.stdout.close()
+        return proc.wait(), after
+
+    print(f'#doubletree first {state.first}', file=out)
+    for i, ip in enumerate(state.prefix):
+        print(f'#doubletree prefix {i+1} {ip}', file=out)
+    out.flush()
+
+    rc, after = run(state.first, stop=True)
+    if after is not None:
+        rc, _ = run(after, stop=False)               # hops after known path, dest is in the log only when it answers.
+    return rc
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Doubletree-style traceroute, skipping hops already known from earlier results.')
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    p = sub.add_parser('learn',                     help='learn known hops from earlier traceroute logs')
+    p.add_argument('-i','--input',                  type=str, default='/dev/stdin',    help='path of log files list')
+    p.add_argument('-m','--merge',                  type=str, nargs='+', default=None, help='output directories of executor.mk(older one first), instead of --input')
+    p.add_argument('-o','--output',                 type=str, default='doubletree.json', help='path of state to output')
+    p.add_argument('-t','--threshold',              type=float, default=0.9,           help='ratio of traces sharing a hop, to be in prefix')
+    p.add_argument(     '--max-first',              type=int, default=8,               help='max first TTL')
+    p.add_argument(     '--v4len',                  type=int, default=24,              help='IPv4 prefix length of dest sharing stop set')
+    p.add_argument(     '--v6len',                  type=int, default=48,              help='IPv6 prefix length of dest sharing stop set')
+
+    p = sub.add_parser('trace',                     help='traceroute one dest with learned state, i.e. from executor.mk')
+    p.add_argument('-s','--state',                  type=str, default='doubletree.json', help='path of learned state')
+    p.add_argument(     '--traceroute',             type=str, default='traceroute',    help='traceroute command')
+    p.add_argument('targs',                         nargs=argparse.REMAINDER,          help='arguments of traceroute, the last one is dest')
+
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    if args.mode == 'learn':
+        from myTracerouteLogParser import TracerouteLogParser
+        from myLogIO import readPathList
+
+        if args.merge:
+            from myResume import mergeLogFiles
+            logFiles = mergeLogFiles(args.merge, probe='traceroute')
+        else:
+            logFiles = readPathList(args.input)
+
+        logparser = TracerouteLogParser()
+        for path, dest in logFiles.items():
+            logparser.run(path, dest)
+        recs, _ = logparser.getResults()
+        traces = { dest: [ str(ip) if ip is not None else timeoutIp for ip in hrec.getTrace() ] for dest, hrec in recs.items() }
+
+        state = DoubletreeState.learn(traces, threshold=args.threshold, maxFirst=args.max_first, v4len=args.v4len, v6len=args.v6len)
+        state.save(args.output)
+        print(f'... first TTL: {state.first}, prefix: {state.prefix}, stop set: {sum(len(v) for v in state.stops.values())} in {len(state.stops)} dest prefixes', file=sys.stderr)
+
+    else:
+        targs = [ a for a in args.targs if a != '--' ]
+        if not targs:
+            raise RuntimeError('dest required')
+        state = DoubletreeState.load(args.state)
+        sys.exit( trace(state, targs[-1], targs[:-1], traceroute=args.traceroute) )
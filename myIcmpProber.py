@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+
+from    typing   import Iterable, Union
+import  asyncio
+import  ipaddress
+import  os
+import  socket
+import  struct
+import  sys
+import  time
+
+from    myPingLogParser import PingLogParser, PingRespRecord, _Host
+from    myProfiler      import NullProfiler
+from    myLogIO         import openLog, extOf
+
+#
+# ICMP echo in one process on asyncio event loop, instead of parallel => ping process for each target.
+#
+#   unprivileged datagram ICMP socket(SOCK_DGRAM, IPPROTO_ICMP) is used when net.ipv4.ping_group_range allows,
+#   raw socket otherwise (needs root or CAP_NET_RAW). one socket for each address family is shared by all targets,
+#   replies are matched by (address, seq). errors(i.e. unreachable) come from error queue(IP_RECVERR) of datagram socket.
+#
+ICMP_ECHO      = { socket.AF_INET: 8, socket.AF_INET6: 128 }
+ICMP_ECHOREPLY = { socket.AF_INET: 0, socket.AF_INET6: 129 }
+ICMP_ERRORS    = { socket.AF_INET: [3, 11], socket.AF_INET6: [1, 3] }     # unreachable, time exceeded.
+
+IP_RECVERR        = 11
+IPV6_RECVERR      = 25
+IP_RECVTTL        = getattr(socket, 'IP_RECVTTL', 12)
+IPV6_RECVHOPLIMIT = getattr(socket, 'IPV6_RECVHOPLIMIT', 51)
+IPV6_HOPLIMIT     = getattr(socket, 'IPV6_HOPLIMIT', 52)
+SO_TIMESTAMPNS    = getattr(socket, 'SO_TIMESTAMPNS', 35)
+SO_EE_ORIGIN_LOCAL = 1
+
+# error messages as ping(iputils) prints, key: (family, type, code), code None for any.
+errMsgs:dict[tuple[int,int,Union[int,None]],str] = {
+    (socket.AF_INET,  3,  0):    'Destination Net Unreachable',
+    (socket.AF_INET,  3,  1):    'Destination Host Unreachable',
+    (socket.AF_INET,  3,  2):    'Destination Protocol Unreachable',
+    (socket.AF_INET,  3,  3):    'Destination Port Unreachable',
+    (socket.AF_INET,  3,  4):    'Frag needed',
+    (socket.AF_INET,  3,  9):    'Destination Net Prohibited',
+    (socket.AF_INET,  3, 10):    'Destination Host Prohibited',
+    (socket.AF_INET,  3, 13):    'Packet filtered',
+    (socket.AF_INET, 11, None):  'Time to live exceeded',
+    (socket.AF_INET6, 1,  0):    'Destination unreachable: No route',
+    (socket.AF_INET6, 1,  1):    'Destination unreachable: Administratively prohibited',
+    (socket.AF_INET6, 1,  3):    'Destination unreachable: Address unreachable',
+    (socket.AF_INET6, 1,  4):    'Destination unreachable: Port unreachable',
+    (socket.AF_INET6, 3, None):  'Time exceeded: Hop limit',
+}
+
+def errMsgOf(family:int, ty:int, code:int) -> str:
+    return errMsgs.get( (family, ty, code) ) or errMsgs.get( (family, ty, None) ) or f'Bad ICMP type: {ty}, code: {code}'
+
+def checksum(data:bytes) -> int:
+    '''internet checksum(RFC 1071).'''
+
+    if len(data) % 2:
+        data += b'\x00'
+    s = sum( struct.unpack(f'!{len(data)//2}H', data) )
+    s = (s >> 16) + (s & 0xffff)
+    s += s >> 16
+    return ~s & 0xffff
+
+def mkEcho(family:int, ident:int, seq:int, size:int) -> bytes:
+    '''ICMP(v6) echo request, payload of size bytes. checksum of ICMPv6 is filled by kernel.'''
+
+    payload = (struct.pack('!d', time.time()) + bytes(range(256)) * (size // 256 +1))[:size]
+    hdr = struct.pack('!BBHHH', ICMP_ECHO[family], 0, 0, ident, seq)
+    if family == socket.AF_INET:
+        hdr = struct.pack('!BBHHH', ICMP_ECHO[family], 0, checksum(hdr + payload), ident, seq)
+    return hdr + payload
+
+
+class _Target(object):
+    '''state of one target in flight.'''
+
+    def __init__(self, dest:str, addr:str, family:int, hrec:_Host):
+        self.dest        = dest
+        self.addr        = addr
+        self.family      = family
+        self.hrec        = hrec
+        self.times:dict[int,float] = {}     # key: seq, val: time sent.
+        self.outstanding:set[int] = set()   # seq waiting reply.
+        self.transmitted = 0
+        self.received    = 0
+        self.errors      = 0
+        self.sentAll     = False            # all requests are sent (or failed).
+        self.rtts:list[float] = []
+        self.lines:list[str] = []           # log lines, as 'ping -O'
+        self.done        = asyncio.Event()  # set when no reply is outstanding after the last request.
+        self.start       = time.time()
+
+
+class IcmpProber(object):
+    '''asyncio ICMP echo prober, keeps many targets in flight from one process, feeds PingRespRecord into PingLogParser.'''
+
+    def __init__(self, count:int=21, interval:float=1.0, timeout:float=2.0, concurrency:int=10000, size:int=56,
+                 raw:Union[bool,None]=None, logdir:Union[str,None]=None, timestamps:bool=False, compress:Union[str,None]=None,
+                 parser:Union[PingLogParser,None]=None, profiler:NullProfiler=None):
+        '''
+        Args:
+            count(int):          num of echo requests for each target, as 'ping -c'
+            interval(float):     interval of requests in sec, as 'ping -i'
+            timeout(float):      wait for replies after the last request in sec.
+            concurrency(int):    max num of targets in flight.
+            size(int):           payload size, as 'ping -s'
+            raw(bool):           True for raw socket, False for datagram socket, None to try datagram then raw.
+            logdir(str):         directory to write logs compatible with 'ping -O', one file for each target.
+            timestamps(bool):    logs with timestamps, as 'ping -D'
+            compress(str):       write logs compressed (gzip|zstd|xz), None for plain text.
+            parser(PingLogParser): store of results, new one when None.
+        '''
+
+        if sys.version_info < (3, 11):
+            raise RuntimeError(f'python 3.11 or later is required for loop.sock_sendto(), running {sys.version.split()[0]}')
+
+        self.count       = count
+        self.interval    = interval
+        self.timeout     = timeout
+        self.concurrency = concurrency
+        self.size        = size
+        self.rawMode     = raw
+        self.logdir      = logdir
+        self.timestamps  = timestamps
+        self.compress    = compress
+        self.profiler    = profiler or NullProfiler()
+        self.parser      = parser or PingLogParser(profiler=self.profiler)
+
+        self.ident = os.getpid() & 0xffff          # id of echo, replaced by kernel for datagram socket.
+        self.socks:dict[int,socket.socket] = {}    # key: family
+        self.raw:dict[int,bool] = {}               # key: family, val: raw socket or not.
+        self.inflight:dict[str,_Target] = {}       # key: address
+
+    def getResults(self):
+        return self.parser.getResults()
+
+    def run(self, dests:Iterable[str]) -> PingLogParser:
+        '''probe all dests, the main function of this class.
+
+        Args:
+            dests(Iterable[str]): destinations, IP address or host name.
+
+        Returns:
+            PingLogParser: parser having results of all dests.
+        '''
+
+        with self.profiler.phase('probe'):
+            asyncio.run( self.__run(dests) )
+        return self.parser
+
+    async def __run(self, dests:Iterable[str]):
+        it = iter(dests)
+
+        async def worker():
+            for dest in it:                         # shared iterator, one dest for each worker at a time.
+                await self.probe(dest)
+
+        try:
+            await asyncio.gather( *[ worker() for _ in range(self.concurrency) ] )
+        finally:
+            loop = asyncio.get_running_loop()
+            for sock in self.socks.values():
+                loop.remove_reader(sock.fileno())
+                sock.close()
+            self.socks.clear()
+
+    def __socket(self, family:int) -> socket.socket:
+        '''shared socket for the family, opened at first use.'''
+
+        sock = self.socks.get(family)
+        if sock is not None:
+            return sock
+
+        proto = socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+        raw = self.rawMode is True
+        if not raw:
+            try:
+                sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+            except PermissionError:
+                if self.rawMode is False:
+                    raise
+                raw = True                          # not in ping_group_range, try raw one.
+        if raw:
+            sock = socket.socket(family, socket.SOCK_RAW, proto)
+
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)   # replies of many targets at once.
+        except OSError:
+            pass
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+        if family == socket.AF_INET:
+            if not raw:
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVTTL, 1)
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+        else:
+            sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVHOPLIMIT, 1)
+            if not raw:
+                sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+
+        self.socks[family] = sock
+        self.raw[family]   = raw
+        asyncio.get_running_loop().add_reader(sock.fileno(), self.__onReadable, family)
+        return sock
+
+    async def __resolve(self, dest:str) -> tuple[Union[str,None], int]:
+        try:
+            addr = ipaddress.ip_address(dest)
+            return str(addr), (socket.AF_INET if addr.version == 4 else socket.AF_INET6)
+        except ValueError:
+            pass
+        try:
+            info = await asyncio.get_running_loop().getaddrinfo(dest, None, type=socket.SOCK_DGRAM)
+        except socket.gaierror as e:
+            print(f'ping: {dest}: {e.strerror}', file=sys.stderr)
+            return None, 0
+        family, _, _, _, sa = info[0]
+        return str(ipaddress.ip_address(sa[0])), family
+
+    async def probe(self, dest:str):
+        '''probe one dest, as 'ping -O -c count dest'.'''
+
+        loop = asyncio.get_running_loop()
+        addr, family = await self.__resolve(dest)
+        if addr is None:
+            return
+        while addr in self.inflight:                # same address by other name, replies can not be told apart.
+            await asyncio.sleep(self.interval)
+
+        logpath = os.path.join(self.logdir, dest + extOf.get(self.compress, '')) if self.logdir else None
+        hrec = _Host().set(dest=dest, log=logpath)
+        self.parser.results[dest] = hrec
+        t = _Target(dest, addr, family, hrec)
+        self.inflight[addr] = t
+        t.lines.append(f'PING {dest} ({addr}) {self.size}({self.size+28}) bytes of data.')
+
+        try:
+            sock = self.__socket(family)
+            start = loop.time()
+            for seq in range(1, self.count+1):
+                delay = start + (seq-1) * self.interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.__expire(t, seq)               # as 'ping -O', report outstanding reply before the next request.
+
+                pkt = mkEcho(family, self.ident, seq, self.size)
+                t.times[seq] = time.time()
+                t.outstanding.add(seq)
+                try:
+                    await loop.sock_sendto(sock, pkt, (addr, 0))
+                except OSError as e:             # i.e. no route to host, as error reported by localhost.
+                    t.outstanding.discard(seq)
+                    t.errors += 1
+                    self.__record(t, PingRespRecord(seq=seq, errMsg=e.strerror, reporter='localhost', ts=time.time()),
+                                  f'From localhost icmp_seq={seq} {e.strerror}')
+                    continue
+                t.transmitted += 1
+
+            t.sentAll = True
+            if t.outstanding:
+                try:
+                    await asyncio.wait_for(t.done.wait(), self.timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self.__expire(t, self.count+1)
+        finally:
+            del self.inflight[addr]
+        self.__finish(t)
+
+    def __record(self, t:_Target, rec:PingRespRecord, line:str):
+        ts = f'[{rec.ts:.6f}] ' if self.timestamps else ''
+        t.lines.append(ts + line)
+        t.hrec.append(rec)
+        self.parser.maxCount = max(self.parser.maxCount, rec.seq)
+        self.profiler.count('records')
+
+    def __expire(self, t:_Target, seq:int):
+        '''no answer for outstanding requests before seq.'''
+
+        if t.outstanding and t.family in self.socks:
+            self.__onReadable(t.family)             # replies already received, but not yet read by busy event loop.
+        for s in sorted( x for x in t.outstanding if x < seq ):
+            t.outstanding.discard(s)
+            self.__record(t, PingRespRecord(seq=s, errMsg='no answer yet', ts=time.time()), f'no answer yet for icmp_seq={s}')
+
+    def __onReply(self, addr:str, seq:int, ttl:Union[int,None], ts:float, nbytes:int):
+        t = self.inflight.get(addr)
+        if t is None or seq not in t.times:
+            return                                  # stray reply, i.e. of finished target.
+        rtt = max(ts - t.times[seq], 0) * 1000
+        t.outstanding.discard(seq)
+        t.received += 1
+        t.rtts.append(rtt)
+        self.__record(t, PingRespRecord(seq=seq, rtt=round(rtt, 3), ttl=ttl, ts=ts),
+                      f'{nbytes} bytes from {addr}: icmp_seq={seq} ttl={ttl} time={rtt:.3f} ms')
+        if not t.outstanding and t.sentAll:
+            t.done.set()
+
+    def __onError(self, addr:str, seq:int, reporter:str, msg:str, ts:float):
+        t = self.inflight.get(addr)
+        if t is None or seq not in t.times:
+            return
+        t.outstanding.discard(seq)
+        t.errors += 1
+        self.__record(t, PingRespRecord(seq=seq, errMsg=msg, reporter=reporter, ts=ts), f'From {reporter} icmp_seq={seq} {msg}')
+        if not t.outstanding and t.sentAll:
+            t.done.set()
+
+    def __onReadable(self, family:int):
+        '''read all replies and errors available, called by event loop.'''
+
+        sock = self.socks[family]
+        while True:
+            try:
+                data, anc, _, src = sock.recvmsg(65535, 1024)
+            except BlockingIOError:
+                break
+            except OSError:                         # pending error of datagram socket, detail is in error queue.
+                continue
+            self.__onPacket(family, data, anc, src)
+
+        if self.raw[family]:
+            return
+        while True:
+            try:
+                data, anc, _, src = sock.recvmsg(65535, 1024, socket.MSG_ERRQUEUE)
+            except (BlockingIOError, OSError):
+                break
+            self.__onErrQueue(family, data, anc, src)
+
+    @staticmethod
+    def __ancillary(anc:list[tuple[int,int,bytes]]) -> tuple[Union[int,None], float]:
+        '''ttl(hop limit) and kernel timestamp of received packet.'''
+
+        ttl, ts = None, None
+        for level, ty, data in anc:
+            if level == socket.SOL_SOCKET and ty == SO_TIMESTAMPNS:
+                sec, nsec = struct.unpack('=qq', data[:16])
+                ts = sec + nsec / 1e9
+            elif (level, ty) in [ (socket.IPPROTO_IP, socket.IP_TTL), (socket.IPPROTO_IPV6, IPV6_HOPLIMIT) ]:
+                ttl = struct.unpack('=i', data[:4])[0]
+        return ttl, (ts or time.time())
+
+    def __onPacket(self, family:int, data:bytes, anc:list, src:tuple):
+        ttl, ts = self.__ancillary(anc)
+        raw = self.raw[family]
+        if raw and family == socket.AF_INET:        # raw IPv4 socket has IP header.
+            ihl = (data[0] & 0x0f) * 4
+            ttl = data[8]
+            data = data[ihl:]
+        if len(data) < 8:
+            return
+
+        ty, code, _, ident, seq = struct.unpack('!BBHHH', data[:8])
+        if ty == ICMP_ECHOREPLY[family]:
+            if raw and ident != self.ident:
+                return                              # reply for other process.
+            self.__onReply(src[0], seq, ttl, ts, len(data))
+            return
+
+        if not raw or ty not in ICMP_ERRORS[family]:
+            return
+        inner = data[8:]                            # original IP header and ICMP header of our request.
+        if family == socket.AF_INET:
+            if len(inner) < 20:
+                return
+            ihl = (inner[0] & 0x0f) * 4
+            dst, echo = socket.inet_ntop(family, inner[16:20]), inner[ihl:ihl+8]
+        else:
+            dst, echo = socket.inet_ntop(family, inner[24:40]), inner[40:48]
+        if len(echo) < 8:
+            return
+        ety, _, _, ident, seq = struct.unpack('!BBHHH', echo)
+        if ety != ICMP_ECHO[family] or ident != self.ident:
+            return
+        self.__onError(dst, seq, src[0], errMsgOf(family, ty, code), ts)
+
+    def __onErrQueue(self, family:int, data:bytes, anc:list, src:tuple):
+        '''error of datagram socket, data is our request and src is its dest.'''
+
+        if len(data) < 8:
+            return
+        seq = struct.unpack('!H', data[6:8])[0]
+        _, ts = self.__ancillary(anc)
+        for level, ty, c in anc:
+            if (level, ty) not in [ (socket.IPPROTO_IP, IP_RECVERR), (socket.IPPROTO_IPV6, IPV6_RECVERR) ]:
+                continue
+            errno, origin, ety, code = struct.unpack('=IBBB', c[:7])
+            if origin == SO_EE_ORIGIN_LOCAL:
+                reporter, msg = 'localhost', os.strerror(errno)
+            elif family == socket.AF_INET:
+                reporter, msg = socket.inet_ntop(family, c[20:24]), errMsgOf(family, ety, code)   # offender in sockaddr_in
+            else:
+                reporter, msg = socket.inet_ntop(family, c[24:40]), errMsgOf(family, ety, code)   # offender in sockaddr_in6
+            self.__onError(src[0], seq, reporter, msg, ts)
+            return
+
+    def __finish(self, t:_Target):
+        '''statistics as ping, and write log.'''
+
+        self.profiler.count('targets')
+        if not self.logdir:
+            return
+
+        loss = 100.0 * (t.transmitted - t.received) / t.transmitted if t.transmitted else 0.0
+        errs = f'+{t.errors} errors, ' if t.errors else ''
+        t.lines += [ '', f'--- {t.dest} ping statistics ---',
+                     f'{t.transmitted} packets transmitted, {t.received} received, {errs}{loss:g}% packet loss, time {int((time.time()-t.start)*1000)}ms' ]
+        if t.rtts:
+            n    = len(t.rtts)
+            avg  = sum(t.rtts) / n
+            mdev = ( sum( r*r for r in t.rtts ) / n - avg*avg ) ** 0.5 if n > 1 else 0.0
+            t.lines.append(f'rtt min/avg/max/mdev = {min(t.rtts):.3f}/{avg:.3f}/{max(t.rtts):.3f}/{mdev:.3f} ms')
+
+        with openLog(t.hrec.get('log'), 'wt') as fp:
+            fp.write('\n'.join(t.lines) + '\n')
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    from   collections import OrderedDict
+    from   myProfiler import PhaseProfiler
+    from   myLogIO    import writeData, readList
+
+    parser = argparse.ArgumentParser(description='ping multiple hosts in one process by asyncio, and output results as myPingLogParser.py')
+    parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of dests list, one in each line')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output')
+    parser.add_argument('-c','--count',             type=int, default=21,              help='num of echo requests for each dest')
+    parser.add_argument('-I','--interval',          type=float, default=1.0,           help='interval of requests in sec')
+    parser.add_argument('-W','--timeout',           type=float, default=2.0,           help='wait for replies after the last request in sec')
+    parser.add_argument('-n','--concurrency',       type=int, default=10000,           help='max num of dests in flight')
+    parser.add_argument(     '--size',              type=int, default=56,              help='payload size of echo request')
+    parser.add_argument(     '--raw',               action="store_true",               help='use raw socket, instead of datagram ICMP socket')
+    parser.add_argument('-l','--logdir',            type=str, default=None,            help='directory to write logs compatible with ping -O')
+    parser.add_argument('-z','--compress',          type=str, default=None,            help='write logs compressed (gzip|zstd|xz)')
+    parser.add_argument('-D','--timestamps',        action="store_true",               help='logs with timestamps, as ping -D')
+    parser.add_argument('-d','--dstColName',        type=str, default='dest',          help='column name of dest in output csv header')
+    parser.add_argument('-a','--aliveColName',      type=str, default='alive',         help='column name of alive in output csv header')
+    parser.add_argument('-p','--prefixDataColName', type=str, default='rtt',           help='prefix for data column names in output csv header')
+    parser.add_argument('-s','--src',               type=str, default=None,            help='sender node IP address, to record in CSV')
+    parser.add_argument('-M','--metrics',           action="store_true",               help='output jitter, loss bursts, reordering and ttl changes')
+    parser.add_argument('-S','--store',             type=str, default=None,            help='root directory of historical results store, to append results of this run')
+    parser.add_argument('-P','--profile',           type=str, default=None,            help='path to output profile of each phase in JSON, "-" for stderr')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    prof = PhaseProfiler() if args.profile else NullProfiler()
+
+    dests = list( OrderedDict.fromkeys( readList(args.input) ) )
+    if args.logdir:
+        os.makedirs(args.logdir, exist_ok=True)
+
+    prober = IcmpProber(count=args.count, interval=args.interval, timeout=args.timeout, concurrency=args.concurrency, size=args.size,
+                        raw=True if args.raw else None, logdir=args.logdir, timestamps=args.timestamps, compress=args.compress, profiler=prof)
+    logparser = prober.run(dests)
+
+    with prof.phase('mkData'):
+        ldict = logparser.mkData(dstColName=args.dstColName, aliveColName=args.aliveColName, src=args.src, prefixDataColName=args.prefixDataColName,
+                                 includes_err=True, includes_metrics=args.metrics)
+    writeData(ldict, args.output, profiler=prof)
+
+    if args.store:
+        from myResultStore import ResultStore
+        with prof.phase('store'):
+            ResultStore(args.store).append('ping', ldict, time.time(), src=args.src, dstColName=args.dstColName)
+
+    if args.profile:
+        prof.dump(args.profile)
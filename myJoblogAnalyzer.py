@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import  sys
+import  numpy    as     np
+import  pandas   as     pd
+
+from    myJoblogParser import JoblogParser
+
+class JoblogAnalyzer(object):
+    '''analytics on joblog of parallel, in columnar table(DataFrame) with one row per job.'''
+
+    def __init__(self, dstColName:str='dest'):
+        self.dstColName = dstColName
+        self.columns    = ['seq', dstColName, 'probe', 'host', 'starttime', 'runtime', 'exitval', 'signal']   # as JoblogParser.mkData()
+        self.df:pd.DataFrame = None
+
+    def run(self, logpaths:list[str], verbose:bool=False):
+        '''load joblogs into table.
+
+        Args:
+            logpaths(list[str]): paths of joblog.
+            verbose(bool):       verbose print while parsing or not
+        '''
+
+        dfs = []
+        for logpath in logpaths:
+            jparser = JoblogParser()
+            jparser.run(logpath, verbose=verbose)
+            df = pd.DataFrame( jparser.mkData(dstColName=self.dstColName), columns=self.columns )
+            df['joblog'] = logpath
+            dfs.append(df)
+
+        df = pd.concat(dfs, ignore_index=True)
+        df['endtime'] = df['starttime'] + df['runtime']
+        df['elapsed'] = df['starttime'] - df['starttime'].min()    # from the first job, in sec.
+        self.df = df
+        return self
+
+    def getThroughput(self, binsec:float=10) -> pd.DataFrame:
+        '''throughput over time.
+
+        Args:
+            binsec(float): width of time bin in sec.
+
+        Returns:
+            DataFrame: for each bin, num of jobs started/finished, finished per sec and running jobs at the bin start.
+        '''
+
+        df = self.df
+        t0 = df['starttime'].min()
+        t1 = df['endtime'].max()
+        edges = np.arange(t0, t1 + binsec, binsec)
+
+        starts = np.sort(df['starttime'].to_numpy())
+        ends   = np.sort(df['endtime'].to_numpy())
+        started,  _ = np.histogram(starts, bins=edges)
+        finished, _ = np.histogram(ends,   bins=edges)
+        running = np.searchsorted(starts, edges[:-1], side='right') - np.searchsorted(ends, edges[:-1], side='right')
+
+        return pd.DataFrame({ 'elapsed': edges[:-1] - t0, 'started': started, 'finished': finished,
+                              'finished_per_sec': finished / binsec, 'running': running })
+
+    def getRuntimeStatistics(self) -> pd.DataFrame:
+        '''runtime distribution for each probe.'''
+
+        g = self.df.groupby('probe')['runtime']
+        rtn = g.describe(percentiles=[0.5, 0.9, 0.99])
+        rtn['sum'] = g.sum()
+        return rtn.reset_index()
+
+    def markStragglers(self, k:float=3.0) -> pd.DataFrame:
+        '''mark stragglers, i.e. runtime > Q3 + k * IQR in the same probe.
+
+        Args:
+            k(float): factor of IQR.
+
+        Returns:
+            DataFrame: all jobs with 'straggler' and 'fence' columns.
+        '''
+
+        df = self.df
+        g  = df.groupby('probe')['runtime']
+        q1 = g.transform(lambda x: x.quantile(0.25))
+        q3 = g.transform(lambda x: x.quantile(0.75))
+        df['fence']     = q3 + k * (q3 - q1)
+        df['straggler'] = df['runtime'] > df['fence']
+        return df
+
+    def getStragglers(self, k:float=3.0) -> pd.DataFrame:
+        df = self.markStragglers(k)
+        return df[ df['straggler'] ].sort_values('runtime', ascending=False)
+
+    def getExitvals(self) -> pd.DataFrame:
+        '''breakdown of exit values and signals for each probe.'''
+
+        rtn = self.df.groupby(['probe', 'exitval', 'signal']).agg(jobs=('runtime', 'size'), runtime_mean=('runtime', 'mean'))
+        rtn['ratio'] = rtn['jobs'] / rtn.groupby(level='probe')['jobs'].transform('sum')
+        return rtn.reset_index()
+
+    def join(self, df:pd.DataFrame) -> pd.DataFrame:
+        '''join jobs with output of other parsers(myPingLogParser.py etc.) on dest column.'''
+
+        return self.df.merge(df, on=self.dstColName, how='left')
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='report runtime, stragglers and throughput from joblog of parallel.')
+    parser.add_argument('joblogs',                  type=str, nargs='+',               help='path of joblogs (00-joblogs.txt)')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output jobs')
+    parser.add_argument('-d','--dstColName',        type=str, default='dest',          help='column name of dest in output csv header')
+    parser.add_argument('-r','--report',            type=str, default=None,            help='prefix of CSV files to output reports, i.e. logs-xxx/00-report')
+    parser.add_argument('-j','--join',              type=str, default=None,            help='path of CSV by other parsers, joined with jobs on dest column')
+    parser.add_argument('-b','--bin',               type=float, default=10,            help='width(sec) of time bin for throughput')
+    parser.add_argument('-k','--iqr',               type=float, default=3.0,           help='stragglers are runtime > Q3 + k * IQR')
+    parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    analyzer = JoblogAnalyzer(dstColName=args.dstColName).run(args.joblogs, verbose=args.verbose)
+    if analyzer.df.empty:                            # i.e. the run was killed before the first job finished.
+        print('... no jobs in joblog', file=sys.stderr)
+        print('stragglers: 0 / 0', file=sys.stderr)
+        analyzer.df.to_csv(args.output, index=False)
+        sys.exit(0)
+    df = analyzer.markStragglers(k=args.iqr)
+
+    if args.report:
+        reports = { 'throughput': analyzer.getThroughput(binsec=args.bin),
+                    'runtime':    analyzer.getRuntimeStatistics(),
+                    'stragglers': analyzer.getStragglers(k=args.iqr),
+                    'exitvals':   analyzer.getExitvals() }
+        for name, r in reports.items():
+            r.to_csv(f'{args.report}-{name}.csv', index=False)
+    else:
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(analyzer.getRuntimeStatistics(), file=sys.stderr)
+            print(analyzer.getExitvals(), file=sys.stderr)
+            print(f'stragglers: {int(df["straggler"].sum())} / {len(df)}', file=sys.stderr)
+
+    if args.join:
+        df = analyzer.join( pd.read_csv(args.join) )
+    df.to_csv(args.output, index=False)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+from    typing   import Any, Union
+import  os
+import  re
+import  sys
+
+from    myLogIO  import destOf
+
+class JobRecord(object):
+    '''one record(line) in joblog of GNU parallel.
+
+    Parameters:
+        seq:        sequence number of the job in parallel.
+        host:       host executed the job (':' for localhost).
+        starttime:  epoch time when the job started.
+        runtime:    elapsed time of the job in sec.
+        exitval:    exit value of the job.
+        signal:     signal number when the job was killed.
+        command:    command line executed.
+        target:     target of the job, i.e. argument given from preproc.
+    '''
+
+    def __init__(self, seq:int, host:str, starttime:float, runtime:float, send:int, receive:int, exitval:int, signal:int, command:str):
+        self.seq       = seq
+        self.host      = host
+        self.starttime = starttime
+        self.runtime   = runtime
+        self.send      = send
+        self.receive   = receive
+        self.exitval   = exitval
+        self.signal    = signal
+        self.command   = command
+        self.target    = JoblogParser.targetOf(command)
+        self.probe     = JoblogParser.probeOf(command)
+
+    def __repr__(self):
+        return f'JobRecord(seq={self.seq}, target={self.target}, exitval={self.exitval}, signal={self.signal}, runtime={self.runtime})'
+
+
+# Joblog Parser.
+class JoblogParser(object):
+    '''parser of joblog(00-joblogs.txt) written by 'parallel --joblog' in executor.mk.'''
+
+    #
+    # CAUTION: executor.mk writes the output of each job by '1> >(tee ${oDir}/{} >&1)',
+    #          or '1> >(tee >(gzip -c > ${oDir}/{}.gz) >&1)' when compressed.
+    #          the target is picked from the path given to tee(or compressor), without compression extension.
+    #          each command starts with 'SWEEP_PROBE={make goal}', the probe is picked from it(ping and checkalives
+    #          run the same command). the command name is taken in joblogs written before it.
+    #
+    pattern_target = re.compile(r'>\(tee (?:>\(\S+(?: -\S+)* > )?(?P<path>[^\s)]+)')   # tee into log, or into compressor of log.
+    header = ['Seq', 'Host', 'Starttime', 'JobRuntime', 'Send', 'Receive', 'Exitval', 'Signal', 'Command']
+
+    def __init__(self):
+        self.results:dict[str,JobRecord] = {}        # holder for all parsed results, key:target. the last one wins.
+        self.records:list[JobRecord] = []            # holder for all parsed results, in order of joblog.
+
+    def getResults(self):
+        return self.results
+
+    @classmethod
+    def targetOf(cls, command:str) -> Union[str,None]:
+        '''pick target from command line in joblog.
+
+        Args:
+            command(str):  command line recorded in joblog.
+
+        Returns:
+            str or None:  target of the job, None when unknown.
+        '''
+
+        m = cls.pattern_target.search(command)
+        if m is None:
+            return None
+        return destOf(m.group('path'))
+
+    @classmethod
+    def probeOf(cls, command:str) -> Union[str,None]:
+        '''pick probe from command line in joblog, make goal in SWEEP_PROBE, or the command name skipping sudo and env assignments.
+
+        Args:
+            command(str):  command line recorded in joblog.
+
+        Returns:
+            str or None:  probe, i.e. ping or checkalives, None when unknown.
+        '''
+
+        for token in command.split():
+            if token.startswith('SWEEP_PROBE='):
+                return token.split('=', 1)[1] or None
+            if token in ['sudo'] or '=' in token:
+                continue
+            return os.path.basename(token)
+        return None
+
+    @classmethod
+    def parseLine(cls, line:str) -> Union[JobRecord,None]:
+        '''parse one line in joblog.
+
+        Args:
+            line(str): one line in joblog.
+
+        Returns:
+            JobRecord or None: None when the line is header or broken.
+        '''
+
+        line = line.rstrip('\n')
+        cols = line.split('\t', len(cls.header)-1)
+        if len(cols) != len(cls.header) or cols[0] == cls.header[0]:
+            return None
+        try:
+            return JobRecord(seq=int(cols[0]), host=cols[1], starttime=float(cols[2]), runtime=float(cols[3]),
+                             send=int(cols[4]), receive=int(cols[5]), exitval=int(cols[6]), signal=int(cols[7]), command=cols[8])
+        except ValueError:
+            print(f'#error ####### broken record in joblog, {line}', file=sys.stderr)
+            return None
+
+    def run(self, logpath:str, verbose:bool=False):
+        '''Parse one joblog file.
+
+        Args:
+           logpath(str):   path of joblog.
+           verbose(bool):  verbose print while parsing or not
+        '''
+
+        with open(logpath, encoding='utf-8') as logfp:
+            for line in logfp:
+                rec = self.parseLine(line)
+                if verbose:
+                    print(f'{line.rstrip()} => {rec}', file=sys.stderr)
+                if rec is None:
+                    continue
+                self.records.append(rec)
+                if rec.target is not None:
+                    self.results[rec.target] = rec
+        return
+
+    def mkData(self, dstColName:str='dest') -> list[dict[str,Any]]:
+        '''make data for output from records as list of dict
+
+        Args:
+            dstColName(str):  the name of dest(target) column, to join with outputs of other parsers.
+
+        Returns:
+            list[dict[str, Any]]:
+        '''
+
+        rtn = []
+        for r in self.records:
+            rtn.append( { 'seq': r.seq, dstColName: r.target, 'probe': r.probe, 'host': r.host, 'starttime': r.starttime,
+                          'runtime': r.runtime, 'exitval': r.exitval, 'signal': r.signal } )
+        return rtn
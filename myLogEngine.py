@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+from    collections import OrderedDict
+from    typing   import Any, Callable, Union
+import  os
+import  sys
+
+from    myLogIO  import openLog, destOf, readPathList, logErrors
+from    myResume import isHopLine
+
+class Grammar(object):
+    '''pluggable grammar of log file for LogEngine.
+
+    Parameters:
+        name:    name of grammar, i.e. kind of probe (ping|traceroute|dig)
+        sniff:   function(first non-empty line) -> bool, True when the log is for this grammar.
+        factory: function() -> parser, parser has parse(logs, logpath, dest), merge(other) and results.
+        mkData:  function(parser, **kwargs) -> list[dict[str,Any]], data to output.
+    '''
+
+    def __init__(self, name:str, sniff:Callable[[str],bool], factory:Callable[[],Any], mkData:Callable[...,list[dict[str,Any]]]):
+        self.name    = name
+        self.sniff   = sniff
+        self.factory = factory
+        self.mkData  = mkData
+
+
+grammars:dict[str,Grammar] = OrderedDict()     # registered grammars, sniffed in this order.
+
+def registerGrammar(grammar:Grammar):
+    '''register grammar, replace the one with same name.'''
+
+    grammars[grammar.name] = grammar
+    return grammar
+
+#
+# built-in grammars,  parser modules are loaded when the grammar is used at first.
+#
+def _pingParser():
+    from myPingLogParser import PingLogParser
+    return PingLogParser()
+
+def _tracerouteParser():
+    from myTracerouteLogParser import TracerouteLogParser
+    return TracerouteLogParser()
+
+def _digParser():
+    from myDigParser import DigLogParser
+    return DigLogParser()
+
+registerGrammar( Grammar('ping',       lambda line: line.startswith('PING '),
+                         _pingParser,       lambda p, src=None, **kw: p.mkData(dstColName='dest', aliveColName='alive', src=src, **kw)) )
+#   traceroute writes its header to stderr, the log usually starts with a hop (or known hops of myDoubletree.py).
+registerGrammar( Grammar('traceroute', lambda line: isHopLine(line) or line.startswith(('traceroute to ', '#doubletree ')),
+                         _tracerouteParser, lambda p, src=None, **kw: p.mkData(dstColName='dest', src=src, **kw)) )
+registerGrammar( Grammar('dig',        lambda line: line.startswith(('; <<>> DiG ', ';; Got answer:')),
+                         _digParser,        lambda p, src=None, **kw: p.mkData(**dict({'fields': ['A','CNAME','PTR'], 'rtoh': {'A':'ip', 'CNAME':'cname', 'PTR':'name'}}, **kw))) )
+
+
+def sniff(logs:list[str]) -> Union[str,None]:
+    '''name of grammar for the log, from its first non-empty line. None when unknown.'''
+
+    for line in logs:
+        if not line.strip():
+            continue
+        for g in grammars.values():
+            if g.sniff(line):
+                return g.name
+        return None
+    return None
+
+
+def _parseChunk(items:list[tuple[str,str]], verbose:bool=False) -> tuple[dict[str,Any], list[str]]:
+    '''parse chunk of log files, each file is read once and sent to parser of its grammar.
+
+       module level function, to be called in worker process.
+
+    Returns:
+        tuple(stores, unknown):  parsers for each grammar, and paths of log with unknown grammar.
+    '''
+
+    stores:dict[str,Any] = {}
+    unknown:list[str] = []
+    for path, dest in items:
+        try:
+            with openLog(path, errors='replace') as fp:
+                logs = fp.read().splitlines()
+        except logErrors() as e:
+            print(f'#error ####### unreadable log, skipped {path}: {e}', file=sys.stderr)
+            continue
+        name = sniff(logs)
+        if name is None:
+            unknown.append(path)
+            continue
+        parser = stores.get(name)
+        if parser is None:
+            parser = stores[name] = grammars[name].factory()
+        parser.parse(logs, path, dest, verbose=verbose)
+    return stores, unknown
+
+
+class LogEngine(object):
+    '''parse log files of mixed kinds in one pass, in parallel processes.'''
+
+    def __init__(self, jobs:int=1, chunksize:int=256):
+        self.jobs      = jobs
+        self.chunksize = chunksize
+        self.stores:dict[str,Any] = OrderedDict()      # key: grammar name, val: parser holding results.
+        self.unknown:list[str] = []
+
+    def getResults(self):
+        return self.stores, self.unknown
+
+    def run(self, logFiles:dict[str,str], verbose:bool=False):
+        '''parse log files.
+
+        Args:
+            logFiles(dict[str,str]): { log-path, dest }
+            verbose(bool):           verbose print while parsing or not
+        '''
+
+        import functools
+
+        items  = list(logFiles.items())
+        chunks = [ items[i:i+self.chunksize] for i in range(0, len(items), self.chunksize) ]
+        work   = functools.partial(_parseChunk, verbose=verbose)
+
+        if self.jobs == 1 or len(chunks) <= 1:
+            results = map(work, chunks)
+            self.__merge(results)
+        else:
+            import multiprocessing
+            with multiprocessing.Pool(self.jobs) as pool:
+                self.__merge( pool.imap(work, chunks) )   # imap keeps order of chunks, the later log wins as parsers do.
+        return self
+
+    def __merge(self, results):
+        for stores, unknown in results:
+            for name, parser in stores.items():
+                if name in self.stores:
+                    self.stores[name].merge(parser)
+                else:
+                    self.stores[name] = parser
+            self.unknown.extend(unknown)
+
+    def mkData(self, src:Union[str,None]=None) -> dict[str,list[dict[str,Any]]]:
+        '''make data for output for each grammar.
+
+        Returns:
+            dict[str, list[dict[str,Any]]]: key: grammar name.
+        '''
+
+        rtn = OrderedDict()
+        for name, parser in self.stores.items():
+            rtn[name] = grammars[name].mkData(parser, src=src)
+        return rtn
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    from   myLogIO    import writeData
+
+    parser = argparse.ArgumentParser(description='parse mixed log files (ping, traceroute, dig) in one pass.')
+    parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of log files list')
+    parser.add_argument('-D','--dir',               type=str, nargs='+', default=None, help='output directories of executor.mk, instead of --input')
+    parser.add_argument('-o','--output',            type=str, default='parsed',        help='prefix of output files, {prefix}-{kind}.csv')
+    parser.add_argument('-x','--xlsx',              action="store_true",               help='output in xlsx instead of CSV')
+    parser.add_argument('-j','--jobs',              type=int, default=os.cpu_count(),  help='num of processes to parse')
+    parser.add_argument('-s','--src',               type=str, default=None,            help='sender of probes, to record it within data')
+    parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    if args.dir:
+        from myResume import listLogFiles
+        logFiles:dict[str,str] = OrderedDict()
+        for d in args.dir:
+            for path in listLogFiles(d):
+                logFiles[path] = destOf(path)
+    else:
+        logFiles = readPathList(args.input)
+
+    engine = LogEngine(jobs=args.jobs).run(logFiles, verbose=args.verbose)
+    stores, unknown = engine.getResults()
+    for path in unknown:
+        print(f'#error ####### unknown kind of log, {path}', file=sys.stderr)
+
+    ext = 'xlsx' if args.xlsx else 'csv'
+    for name, ldict in engine.mkData(src=args.src).items():
+        output = f'{args.output}-{name}.{ext}'
+        writeData(ldict, output)
+        print(f'... {name}: {len(stores[name].results)} logs => {output}', file=sys.stderr)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+from    typing   import Any, IO, Union
+import  csv
+import  os
+import  sys
+
+from    myProfiler import NullProfiler
+
+# compression of log files by extension, written by executor.mk(compress=...) or 'myLogIO.py compress'.
+codecs:dict[str,str] = { '.gz': 'gzip', '.xz': 'xz', '.zst': 'zstd' }
+extOf:dict[str,str]  = { v:k for k,v in codecs.items() }
+
+def destOf(path:str) -> str:
+    '''dest of log file, i.e. file name without compression extension.'''
+
+    name = os.path.basename(path)
+    root, ext = os.path.splitext(name)
+    return root if ext in codecs else name
+
+def readList(input:str) -> list[str]:
+    '''read list of items(log paths or targets), one in each line. blank lines are skipped.'''
+
+    with open(input, encoding='utf-8') as fp:
+        content = [ line.strip() for line in fp.read().splitlines() ]
+    if not any(content):
+        print('... empty content', file=sys.stderr)
+    return [ line for line in content if line ]
+
+def readPathList(input:str) -> dict[str,str]:
+    '''read list of log paths, one path in each line. the file name(without compression extension) is taken as dest.
+
+    Returns:
+        dict[str,str]: { log-path, dest }
+    '''
+
+    return { path: destOf(path) for path in readList(input) }
+
+def openLog(path:str, mode:str='rt', encoding:str='utf-8', errors:Union[str,None]=None) -> IO:
+    '''open log file, stream (de)compressed transparently by its extension (.gz, .xz, .zst).
+
+       .zst needs zstandard, optional dependency.
+
+    Args:
+        path(str):      path of log file.
+        mode(str):      'rt' to read, 'wt' to write, or 'rb'/'wb' in binary.
+        encoding(str):  encoding of log, in text mode.
+        errors(str):    error handling of decoding, as open()
+
+    Returns:
+        IO: file object.
+    '''
+
+    if 'b' in mode:
+        encoding = errors = None
+    ext = os.path.splitext(path)[1]
+    if ext == '.gz':
+        import gzip
+        return gzip.open(path, mode, encoding=encoding, errors=errors)
+    if ext == '.xz':
+        import lzma
+        return lzma.open(path, mode, encoding=encoding, errors=errors)
+    if ext == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f'zstandard is required for {path}, pip install zstandard')
+        return zstandard.open(path, mode, encoding=encoding, errors=errors)
+    return open(path, mode, encoding=encoding, errors=errors)
+
+_logErrors:Union[tuple[type,...],None] = None
+
+def logErrors() -> tuple[type,...]:
+    '''errors of reading a broken log, i.e. truncated by interrupted compressor, to catch around openLog() and read.
+
+       EOFError for truncated .gz/.xz, OSError for others(gzip.BadGzipFile etc.), and errors of each codec.
+    '''
+
+    global _logErrors
+    if _logErrors is None:
+        import lzma
+        errs:list[type] = [OSError, EOFError, lzma.LZMAError]
+        try:
+            import zstandard
+            errs.append(zstandard.ZstdError)
+        except ImportError:
+            pass                                         # .zst logs are not readable at all without it.
+        _logErrors = tuple(errs)
+    return _logErrors
+
+def writeData(ldict:Union[list[dict[str,Any]],None], output:str, profiler:NullProfiler=None):
+    '''write data made by mkData() of parsers into output.
+
+       CSV is written by csv module, to avoid loading pandas just for it.
+       pandas(and openpyxl) is loaded only when output is .xlsx
+
+    Args:
+        ldict(list[dict[str,Any]]): data to output, None or empty for no data.
+        output(str):                path to output,  .xlsx for excel, CSV otherwise.
+        profiler(NullProfiler):     profiler for 'dataframe' and 'write' phases.
+    '''
+
+    prof = profiler or NullProfiler()
+    if output.endswith('.xlsx'):
+        with prof.phase('dataframe'):
+            import pandas as pd
+            df = pd.DataFrame(ldict)
+        with prof.phase('write'):
+            df.to_excel(output, index=False)
+        return
+
+    with prof.phase('write'):
+        with open(output, 'w', encoding='utf-8', newline='') as fp:
+            if not ldict:
+                return
+            writer = csv.DictWriter(fp, fieldnames=list(ldict[0].keys()), lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(ldict)
+
+
+def compressLog(path:str, codec:str, keep:bool=False) -> str:
+    '''compress one log file, then remove original unless keep.
+
+    Args:
+        path(str):   path of log file.
+        codec(str):  gzip, xz or zstd.
+        keep(bool):  keep original or not.
+
+    Returns:
+        str: path of compressed log.
+    '''
+
+    import shutil
+
+    dst = path + extOf[codec]
+    tmp = dst + '.tmp' + extOf[codec]                        # keep extension, for openLog.
+    with open(path, 'rb') as ifp, openLog(tmp, 'wb') as ofp:
+        shutil.copyfileobj(ifp, ofp, 1 << 20)
+    shutil.copystat(path, tmp)
+    os.replace(tmp, dst)
+    if not keep:
+        os.remove(path)
+    return dst
+
+def evictCache(paths:list[str]):
+    '''drop page cache of files, to measure on cold cache. effective on disk based storage(not tmpfs).'''
+
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+def ioCounters() -> dict[str,int]:
+    '''I/O counters of this process, rchar: bytes by read(), read_bytes: bytes from storage.'''
+
+    try:
+        with open('/proc/self/io', encoding='utf-8') as fp:
+            return { k: int(v) for k,v in ( line.split(':') for line in fp ) }
+    except OSError:
+        return {}
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    import shutil
+    import tempfile
+    import time
+    from   myResume import listLogFiles
+
+    parser = argparse.ArgumentParser(description='compress log files in output directories of executor.mk, or benchmark parsing of compressed logs.')
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    p = sub.add_parser('compress',                  help='compress log files in place')
+    p.add_argument('dirs',                          type=str, nargs='+',               help='output directories of executor.mk')
+    p.add_argument('-c','--codec',                  type=str, default='gzip',          help='codec (gzip|xz|zstd)')
+    p.add_argument('-k','--keep',                   action="store_true",               help='keep original logs')
+
+    p = sub.add_parser('bench',                     help='parse logs stored in each codec on cold cache, and report bytes read and time')
+    p.add_argument('dir',                           type=str,                          help='output directory of executor.mk, logs not compressed')
+    p.add_argument('-c','--codecs',                 type=str, nargs='+', default=['none', 'gzip', 'xz', 'zstd'], help='codecs to compare')
+    p.add_argument('-w','--workdir',                type=str, default=None,            help='directory for copies in each codec, on the same storage as logs. temporary one when not given')
+    p.add_argument('-r','--repeat',                 type=int, default=3,               help='num of measurement for each codec, the best one is taken')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    if args.mode == 'compress':
+        for d in args.dirs:
+            paths = [ p for p in listLogFiles(d) if os.path.splitext(p)[1] not in codecs ]
+            for path in paths:
+                compressLog(path, args.codec, keep=args.keep)
+            print(f'... {d}: {len(paths)} logs compressed by {args.codec}', file=sys.stderr)
+        sys.exit(0)
+
+    from myLogEngine import LogEngine
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='logbench-', dir=os.path.dirname(os.path.abspath(args.dir)))
+    srcs = listLogFiles(args.dir)
+    print('codec\tfiles\tbytes\trchar\tread_bytes\tsec\tsame', flush=True)
+    base = None
+    try:
+        for codec in args.codecs:
+            cdir = os.path.join(workdir, codec)
+            os.makedirs(cdir, exist_ok=True)
+            try:
+                for path in srcs:
+                    dst = os.path.join(cdir, os.path.basename(path))
+                    shutil.copyfile(path, dst)
+                    if codec != 'none':
+                        compressLog(dst, codec)
+            except RuntimeError as e:
+                print(f'... skip {codec}, {e}', file=sys.stderr)
+                continue
+
+            paths = listLogFiles(cdir)
+            logFiles = { p: destOf(p) for p in paths }
+            nbytes = sum( os.path.getsize(p) for p in paths )
+            best = None
+            for _ in range(args.repeat):
+                evictCache(paths)
+                io0 = ioCounters()
+                t0 = time.perf_counter()
+                data = LogEngine(jobs=1).run(logFiles).mkData()
+                sec = time.perf_counter() - t0
+                io1 = ioCounters()
+                if best is None or sec < best[0]:
+                    best = (sec, io1.get('rchar', 0) - io0.get('rchar', 0), io1.get('read_bytes', 0) - io0.get('read_bytes', 0))
+            if base is None:
+                base = data
+            print(f'{codec}\t{len(paths)}\t{nbytes}\t{best[1]}\t{best[2]}\t{best[0]:.3f}\t{data == base}', flush=True)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
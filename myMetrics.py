@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+
+from    collections import OrderedDict
+from    typing   import Any, Union
+import  bisect
+import  os
+import  sys
+import  time
+
+#
+# metrics of runs and parses in Prometheus text format(0.0.4), written into a file for textfile collector of node_exporter.
+#
+#   sweep_jobs_started{probe}               log files created in oDir(oDir/stdout for exec) since the watcher started.
+#   sweep_jobs_finished_total{probe}        records in joblog.
+#   sweep_jobs_failed_total{probe}          records in joblog with signal or exit value not in okExitvals.
+#   sweep_probe_rate{probe}                 jobs finished per sec, in the last interval.
+#   sweep_window{probe}                     concurrency window of parallel(procfile, or -j).
+#   sweep_parse_lines_total{probe}          lines of logs parsed.
+#   sweep_parse_line_rate{probe}            lines parsed per sec, in the last interval.
+#   sweep_hosts{probe,state}                hosts alive/dead so far(ping and checkalives).
+#   sweep_rtt_milliseconds{probe}           histogram of RTT(ping and checkalives).
+#   sweep_last_update_timestamp_seconds     epoch time of the last update, to alert on a dead watcher.
+#   sweep_last_progress_timestamp_seconds   epoch time of the last update with jobs finished or lines parsed, to alert on stalled sweeps.
+#
+defaultBuckets:list[float] = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+pingProbes = ['ping', 'checkalives']
+
+def _labels(labels:dict[str,Any]) -> str:
+    if not labels:
+        return ''
+    body = ','.join( '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k,v in labels.items() )
+    return '{' + body + '}'
+
+def _value(v:float) -> str:
+    if v != v:
+        return 'NaN'
+    if v in (float('inf'), float('-inf')):
+        return '+Inf' if v > 0 else '-Inf'
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class Metrics(object):
+    '''registry of counters, gauges and histograms, rendered in Prometheus text format.'''
+
+    def __init__(self, prefix:str='sweep'):
+        self.prefix = prefix
+        self.meta:dict[str,tuple[str,str,Union[list[float],None]]] = OrderedDict()   # key: name, val: (type, help, buckets)
+        self.values:dict[str,dict[tuple,Any]] = OrderedDict()                         # key: name, val: { labels: value }
+
+    def declare(self, name:str, mtype:str, help:str, buckets:Union[list[float],None]=None):
+        '''declare metric.
+
+        Args:
+            name(str):      name without prefix.
+            mtype(str):     counter | gauge | histogram
+            help(str):      description.
+            buckets(list):  upper bounds of histogram buckets, +Inf is added.
+        '''
+
+        if mtype not in ('counter', 'gauge', 'histogram'):
+            raise RuntimeError(f'unknown type of metric: {mtype}')
+        self.meta[name]   = (mtype, help, sorted(buckets or defaultBuckets) if mtype == 'histogram' else None)
+        self.values[name] = OrderedDict()
+        return self
+
+    def set(self, name:str, value:float, **labels):
+        self.values[name][tuple(labels.items())] = value
+        return self
+
+    def inc(self, name:str, n:float=1, **labels):
+        key = tuple(labels.items())
+        self.values[name][key] = self.values[name].get(key, 0) + n
+        return self
+
+    def get(self, name:str, **labels) -> Any:
+        return self.values[name].get(tuple(labels.items()), 0)
+
+    def observe(self, name:str, value:float, **labels):
+        '''observe one value into histogram.'''
+
+        key = tuple(labels.items())
+        h = self.values[name].get(key)
+        if h is None:
+            h = self.values[name][key] = {'counts': [0] * (len(self.meta[name][2]) +1), 'sum': 0.0, 'count': 0}
+        h['counts'][ bisect.bisect_left(self.meta[name][2], value) ] += 1      # bucket with le >= value.
+        h['sum']   += value
+        h['count'] += 1
+        return self
+
+    def render(self) -> str:
+        '''metrics in Prometheus text format.'''
+
+        lines = []
+        for name, (mtype, help, buckets) in self.meta.items():
+            full = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full} {help}')
+            lines.append(f'# TYPE {full} {mtype}')
+            for key, v in self.values[name].items():
+                labels = dict(key)
+                if mtype != 'histogram':
+                    lines.append(f'{full}{_labels(labels)} {_value(v)}')
+                    continue
+                acc = 0
+                for le, n in zip(buckets + [float('inf')], v['counts']):
+                    acc += n
+                    lines.append(f'{full}_bucket{_labels(dict(labels, le=_value(le)))} {acc}')
+                lines.append(f'{full}_sum{_labels(labels)} {_value(v["sum"])}')
+                lines.append(f'{full}_count{_labels(labels)} {v["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path:str):
+        '''write metrics atomically, the collector never reads a partial file.'''
+
+        if path in ('-', '/dev/stdout'):
+            sys.stdout.write(self.render())
+            sys.stdout.flush()
+            return self
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            fp.write(self.render())
+        os.replace(tmp, path)
+        return self
+
+
+class RunMetrics(Metrics):
+    '''metrics of one run of executor.mk, or of one parse.'''
+
+    def __init__(self, probe:str, buckets:Union[list[float],None]=None, prefix:str='sweep'):
+        super().__init__(prefix=prefix)
+        self.probe = probe
+        self.declare('jobs_started',         'gauge',     'jobs started, i.e. log files created in output directory since the watcher started')
+        self.declare('jobs_finished_total',  'counter',   'jobs finished, i.e. records in joblog')
+        self.declare('jobs_failed_total',    'counter',   'jobs finished with signal or unexpected exit value')
+        self.declare('probe_rate',           'gauge',     'jobs finished per second in the last interval')
+        self.declare('window',               'gauge',     'concurrency window of parallel')
+        self.declare('parse_lines_total',    'counter',   'lines of logs parsed')
+        self.declare('parse_line_rate',      'gauge',     'lines parsed per second in the last interval')
+        self.declare('hosts',                'gauge',     'hosts alive or dead so far')
+        self.declare('rtt_milliseconds',     'histogram', 'RTT of replies in milliseconds', buckets=buckets)
+        self.declare('last_update_timestamp_seconds', 'gauge', 'epoch time of the last update')
+        self.declare('last_progress_timestamp_seconds', 'gauge', 'epoch time of the last update with jobs finished or lines parsed')
+        self.set('parse_lines_total', 0, probe=probe)
+        for state in ['alive', 'dead']:
+            self.set('hosts', 0, probe=probe, state=state)
+
+    def observeJobs(self, recs:list[Any], elapsed:float=0):
+        '''count records(JobRecord) appended to joblog in the last interval.'''
+
+        from myResume import okExitvals
+
+        ok = okExitvals.get(self.probe, [0])
+        for rec in recs:
+            self.inc('jobs_finished_total', probe=self.probe)
+            if rec.signal != 0 or rec.exitval not in ok:
+                self.inc('jobs_failed_total', probe=self.probe)
+        if elapsed > 0:
+            self.set('probe_rate', len(recs) / elapsed, probe=self.probe)
+        self.set('last_update_timestamp_seconds', time.time())
+        if recs:
+            self.set('last_progress_timestamp_seconds', time.time())
+        return self
+
+    def observeHost(self, hrec:Any):
+        '''count alive/dead and RTTs of one host parsed by PingLogParser.'''
+
+        self.inc('hosts', probe=self.probe, state='alive' if hrec.isAlive() else 'dead')
+        for rtt in hrec.getRTT(seq=False, noNone=True):
+            self.observe('rtt_milliseconds', rtt, probe=self.probe)
+        return self
+
+    def observeParse(self, lines:int, elapsed:float=0):
+        '''count lines parsed in the last interval.'''
+
+        self.inc('parse_lines_total', lines, probe=self.probe)
+        if elapsed > 0:
+            self.set('parse_line_rate', lines / elapsed, probe=self.probe)
+        self.set('last_update_timestamp_seconds', time.time())
+        if lines:
+            self.set('last_progress_timestamp_seconds', time.time())
+        return self
+
+
+def readWindow(procfile:Union[str,None], default:Union[int,None]=None) -> Union[int,None]:
+    '''current window in procfile of parallel, default when it is not readable.'''
+
+    if procfile is None:
+        return default
+    try:
+        with open(procfile, encoding='utf-8') as fp:
+            return int(fp.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return default
+
+
+class RunWatcher(object):
+    '''watch output directory of executor.mk, update RunMetrics incrementally.'''
+
+    retries = 3                                      # updates to retry a log not readable yet, then it is dropped.
+
+    def __init__(self, oDir:str, probe:str, metrics:RunMetrics, joblog:Union[str,None]=None, procfile:Union[str,None]=None,
+                 window:Union[int,None]=None, parse:bool=True, baseline:bool=True):
+        '''
+        Args:
+            baseline(bool): log files already in oDir are not counted as started, i.e. left by an earlier run in the same oDir.
+        '''
+
+        from myAdaptiveWindow import _JoblogTail
+        from myResume import logDirOf
+
+        self.oDir     = oDir
+        self.logdir   = logDirOf(oDir, probe)        # exec tees stdout into oDir/stdout/.
+        self.probe    = probe
+        self.metrics  = metrics
+        self.tail     = _JoblogTail(joblog or os.path.join(oDir, '00-joblogs.txt'))
+        self.procfile = procfile
+        self.window   = window
+        self.parse    = parse
+        self.last:Union[float,None] = None           # no rates at the first update, it reads backlog of joblog.
+        self.pending:dict[str,int] = {}              # key: path of log not readable yet, val: retries left.
+        self.existing:set[str] = set(self.__logs()) if baseline else set()
+        for name in ['jobs_started', 'jobs_finished_total', 'jobs_failed_total']:
+            metrics.set(name, 0, probe=probe)        # series exist from the start, for alerts on absent or stalled values.
+        metrics.set('last_progress_timestamp_seconds', time.time())   # stalled since the start, when nothing finishes.
+
+    def __logs(self) -> list[str]:
+        '''names of log files in logdir, skip files of executor itself (00-*).'''
+
+        if not os.path.isdir(self.logdir):
+            return []
+        with os.scandir(self.logdir) as it:
+            return [ e.name for e in it if not e.name.startswith('00-') and e.is_file() ]
+
+    def __logpath(self, rec:Any) -> Union[str,None]:
+        from myJoblogParser import JoblogParser
+
+        m = JoblogParser.pattern_target.search(rec.command)
+        return m.group('path') if m else None
+
+    def __parseLog(self, path:str) -> Union[int,None]:
+        '''parse one finished log, returns num of lines, None when it is not readable yet.
+
+           parallel records the job when it exits, the compressor in '>(gzip -c > ...)' may be still writing the log.
+        '''
+
+        from myLogIO import openLog, logErrors
+
+        try:
+            with openLog(path, errors='replace') as fp:
+                logs = fp.read().splitlines()
+        except logErrors():
+            return None
+
+        if self.probe in pingProbes:
+            from myPingLogParser import PingLogParser
+            logparser = PingLogParser()
+            logparser.parse(logs, path, path)
+            for hrec in logparser.results.values():
+                self.metrics.observeHost(hrec)
+        return len(logs)
+
+    def update(self):
+        '''read joblog and oDir since last update.'''
+
+        m = self.metrics
+        now = time.monotonic()
+        elapsed = now - self.last if self.last is not None else 0
+        self.last = now
+
+        recs = self.tail.read()
+        m.observeJobs(recs, elapsed)
+
+        started = sum( 1 for name in self.__logs() if name not in self.existing )
+        m.set('jobs_started', started, probe=self.probe)
+
+        window = readWindow(self.procfile, self.window)
+        if window is not None:
+            m.set('window', window, probe=self.probe)
+
+        lines = 0
+        if self.parse:
+            paths = list(dict.fromkeys( list(self.pending) + [ p for p in map(self.__logpath, recs) if p is not None ] ))
+            for path in paths:
+                n = self.__parseLog(path)
+                if n is not None:
+                    lines += n
+                    self.pending.pop(path, None)
+                    continue
+                left = self.pending.get(path, self.retries +1) -1
+                if left > 0:
+                    self.pending[path] = left        # retry at the next update.
+                else:
+                    self.pending.pop(path, None)
+                    print(f'#error ####### unreadable log, skipped {path}', file=sys.stderr)
+        m.observeParse(lines, elapsed)
+        return self
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='write Prometheus textfile of a running executor.mk sweep, periodically.')
+    parser.add_argument('-D','--dir',               type=str,   required=True,         help='output directory of executor.mk (oDir)')
+    parser.add_argument('-o','--output',            type=str,   required=True,         help='path of textfile, i.e. in --collector.textfile.directory of node_exporter')
+    parser.add_argument('-p','--probe',             type=str,   default='ping',        help='kind of probe (ping|checkalives|traceroute|doubletree|dig|exec)')
+    parser.add_argument('-j','--joblog',            type=str,   default=None,          help='path of joblog, default {dir}/00-joblogs.txt')
+    parser.add_argument('-f','--procfile',          type=str,   default=None,          help='path of procfile given to parallel as -j')
+    parser.add_argument('-N','--window',            type=int,   default=None,          help='window of parallel, when procfile is not used')
+    parser.add_argument('-b','--buckets',           type=float, nargs='+', default=None, help='upper bounds of RTT histogram buckets in msec')
+    parser.add_argument(     '--no-parse',          action="store_true",               help='do not parse finished logs, only jobs are counted')
+    parser.add_argument('-t','--interval',          type=float, default=15,            help='interval(sec) to write textfile')
+    parser.add_argument(     '--ppid',              type=int,   default=None,          help='exit when this process is gone, i.e. shell running parallel')
+    parser.add_argument(     '--once',              action="store_true",               help='update once and exit, all logs in dir are counted as started')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    from myAdaptiveWindow import isRunning
+
+    metrics = RunMetrics(args.probe, buckets=args.buckets)
+    watcher = RunWatcher(args.dir, args.probe, metrics, joblog=args.joblog, procfile=args.procfile, window=args.window, parse=not args.no_parse,
+                         baseline=not args.once)
+    while True:
+        running = not args.once and (args.ppid is None or isRunning(args.ppid))   # checked before update, not to miss the last jobs.
+        watcher.update()
+        metrics.write(args.output)
+        if not running:
+            break
+        time.sleep(args.interval)
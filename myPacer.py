@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+from    collections import OrderedDict, deque
+from    typing   import Any, Iterator, Union
+import  ipaddress
+import  sys
+import  time
+
+class _TokenBucket(object):
+    '''token bucket,  rate in tokens(packets) per second, burst as its capacity. no limit when rate is None.'''
+
+    def __init__(self, rate:Union[float,None], burst:float, now:float):
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = burst
+        self.last   = now
+
+    def __refill(self, now:float):
+        if self.rate is None:
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last   = now
+
+    def wait(self, n:float, now:float) -> float:
+        '''seconds to wait until n tokens are available, 0 when available now.'''
+
+        if self.rate is None:
+            return 0.0
+        self.__refill(now)
+        if self.tokens >= n:
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+    def take(self, n:float, now:float):
+        if self.rate is None:
+            return self
+        self.__refill(now)
+        self.tokens -= n
+        return self
+
+
+class PrefixMapper(object):
+    '''map target to its group key, i.e. prefix( /24 etc. ) or ASN given by map file.'''
+
+    def __init__(self, v4len:int=24, v6len:int=48, asnmap:Union[str,None]=None):
+        self.v4len = v4len
+        self.v6len = v6len
+        self.asn:dict[Any,str] = {}                    # key: network,  val: ASN
+        self.lens:list[int] = []                       # prefix lengths in asn map, longer first.
+
+        if asnmap:
+            self.load(asnmap)
+
+    def load(self, path:str):
+        '''load ASN map file,  each line has 'prefix asn', i.e. '192.0.2.0/24 AS64500'.'''
+
+        with open(path, encoding='utf-8') as fp:
+            for line in fp:
+                l = line.split()
+                if len(l) < 2 or l[0].startswith('#'):
+                    continue
+                net = ipaddress.ip_network(l[0], strict=False)
+                self.asn[net] = l[1]
+        self.lens = sorted( { n.prefixlen for n in self.asn.keys() }, reverse=True)
+        return self
+
+    def keyOf(self, target:str) -> str:
+        '''group key of the target,  the target itself when it is not IP address.'''
+
+        try:
+            addr = ipaddress.ip_address(target)
+        except ValueError:
+            return target
+
+        for plen in self.lens:                                 # longest match in ASN map.
+            if plen > addr.max_prefixlen:
+                continue
+            asn = self.asn.get( ipaddress.ip_network(f'{addr}/{plen}', strict=False) )
+            if asn is not None:
+                return asn
+
+        plen = self.v4len if addr.version == 4 else self.v6len
+        return str(ipaddress.ip_network(f'{addr}/{plen}', strict=False))
+
+
+class Pacer(object):
+    '''interleave targets across prefixes, and pace them by global and per-prefix token buckets.
+
+       each target consumes 'cost' tokens when it is released,  i.e. num of packets sent by one probe.
+       so rates are in packets per second.
+    '''
+
+    def __init__(self, mapper:PrefixMapper, pps:Union[float,None]=None, prefixPps:Union[float,None]=None,
+                 cost:float=1, burst:Union[float,None]=None, window:int=10000):
+        self.mapper    = mapper
+        self.pps       = pps
+        self.prefixPps = prefixPps
+        self.cost      = cost
+        self.burst     = max(burst or cost, cost)              # one probe has to fit in bucket.
+        self.window    = window                                # max num of targets to look ahead.
+
+        now = time.monotonic()
+        self.gbucket = _TokenBucket(pps, max(self.burst, cost), now)
+        self.pbuckets:dict[str,_TokenBucket] = {}
+        self.queues:dict[str,deque] = OrderedDict()            # key: prefix, round-robin by rotating this.
+        self.buffered = 0
+
+    def __push(self, target:str):
+        key = self.mapper.keyOf(target)
+        q = self.queues.get(key)
+        if q is None:
+            q = self.queues[key] = deque()
+        q.append(target)
+        self.buffered += 1
+        if key not in self.pbuckets:
+            if len(self.pbuckets) > 2 * self.window:
+                self.__prune()
+            self.pbuckets[key] = _TokenBucket(self.prefixPps, self.burst, time.monotonic())
+
+    def __prune(self):
+        '''drop buckets of idle prefixes which are refilled fully, to keep memory bounded.'''
+
+        now = time.monotonic()
+        for key in [ k for k,b in self.pbuckets.items() if k not in self.queues and b.wait(self.burst, now) == 0 ]:
+            del self.pbuckets[key]
+
+    def __pop(self) -> tuple[Union[str,None], float]:
+        '''pick next target in round-robin whose prefix has tokens.
+
+        Returns:
+            tuple(target, wait): target is None when all prefixes have to wait, then wait is seconds to sleep.
+        '''
+
+        now = time.monotonic()
+        gwait = self.gbucket.wait(self.cost, now)
+        if gwait > 0:
+            return None, gwait
+
+        wait = None
+        for _ in range(len(self.queues)):
+            key, q = next(iter(self.queues.items()))
+            self.queues.move_to_end(key)                       # rotate
+            pbucket = self.pbuckets[key]
+            w = pbucket.wait(self.cost, now)
+            if w > 0:
+                wait = w if wait is None else min(wait, w)
+                continue
+
+            target = q.popleft()
+            self.buffered -= 1
+            if not q:
+                del self.queues[key]                           # bucket is kept, the prefix may come again soon.
+            pbucket.take(self.cost, now)
+            self.gbucket.take(self.cost, now)
+            return target, 0.0
+        return None, wait or 0.0
+
+    def run(self, lines:Iterator[str]) -> Iterator[str]:
+        '''pace targets in lines.
+
+        Args:
+            lines:  targets, one in each line.
+
+        Returns:
+            targets in paced order.
+        '''
+
+        it = iter(lines)
+        eof = False
+        while True:
+            while not eof and self.buffered < self.window:     # fill look ahead window.
+                line = next(it, None)
+                if line is None:
+                    eof = True
+                    break
+                line = line.strip()
+                if line:
+                    self.__push(line)
+
+            if self.buffered == 0:
+                return
+
+            target, wait = self.__pop()
+            if target is None:
+                time.sleep(wait)
+                continue
+            yield target
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='interleave targets across prefixes and pace them, for executor.mk')
+    parser.add_argument('-i','--input',             type=str,   default='/dev/stdin',  help='path of targets list')
+    parser.add_argument('-g','--pps',               type=float, default=None,          help='global packets per second, no limit when not given')
+    parser.add_argument('-p','--prefix-pps',        type=float, default=None,          help='packets per second for each prefix, no limit when not given')
+    parser.add_argument('-c','--cost',              type=float, default=1,             help='packets sent by one probe, i.e. count of ping')
+    parser.add_argument('-b','--burst',             type=float, default=None,          help='capacity of token buckets, cost when not given')
+    parser.add_argument('-w','--window',            type=int,   default=10000,         help='num of targets to look ahead for interleaving')
+    parser.add_argument('-4','--v4len',             type=int,   default=24,            help='prefix length to group IPv4 targets')
+    parser.add_argument('-6','--v6len',             type=int,   default=48,            help='prefix length to group IPv6 targets')
+    parser.add_argument('-a','--asnmap',            type=str,   default=None,          help='path of "prefix ASN" map, group targets by ASN')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    mapper = PrefixMapper(v4len=args.v4len, v6len=args.v6len, asnmap=args.asnmap)
+    pacer  = Pacer(mapper, pps=args.pps, prefixPps=args.prefix_pps, cost=args.cost, burst=args.burst, window=args.window)
+
+    try:
+        with open(args.input, encoding='utf-8') as fp:
+            for target in pacer.run(fp):
+                print(target, flush=True)                      # flush each, parallel starts the job on it.
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
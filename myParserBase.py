@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+from    typing   import Any
+
+class HostBase(object):
+    '''base of holders of parsed results for each host, shared by parsers of each probe.'''
+
+    def __init__(self, **params:Any):
+        self.params:dict[str,Any] = params           # keep everything, reserved keys are up to each parser.
+
+    def set(self, **kwargs):
+        '''setter of parameters.'''
+        self.params.update(kwargs)
+        return self
+
+    def get(self, key:str, default:Any=None):
+        '''getter of parameter.'''
+        return self.params.get(key, default)
+
+
+def mkdict(keys:list[str], vals:list[Any]) -> dict[str,Any]:
+    '''make dict from list of keys and values, for a row of output.
+
+    Args:
+        keys: key of dict
+        vals: val of dict
+
+    Returns:
+        dict[str,Any]: generated dict.
+    '''
+
+    if len(keys) != len(vals):
+        raise RuntimeError(f'num of keys and vals is mismatched, lkeys:{len(keys)}, lvals:{len(vals)}, keys:{keys}   vals:{vals}')
+    return dict(zip(keys, vals))
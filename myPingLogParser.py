@@ -4,7 +4,10 @@ from    pydantic import BaseModel, Extra
 from    typing   import Any, Union
 import  re
 import  sys
-import  numpy as np
+
+from    myProfiler import NullProfiler
+from    myLogIO    import openLog
+from    myParserBase import HostBase, mkdict
 
 class PingRespRecord(BaseModel, extra=Extra.allow): # refer pydantic doc for detail.
       '''datamodel for raw ping responce in pydantic BaseModel.
@@ -14,33 +17,31 @@ class PingRespRecord(BaseModel, extra=Extra.allow): # refer pydantic doc for det
           err:  indicator of error or not
           rtt:  raw RTT data
           errMsg: error message if received.
+          ts:   timestamp of the line, when taken by 'ping -D'.
+          ttl:  ttl in reply.
       '''
       seq:int=None
       err:bool=False
       rtt:Union[float,None]=None
       errMsg:Union[str,None]=None
+      ts:Union[float,None]=None
+      ttl:Union[int,None]=None
 
 # keep results
-class _Host(object):
+class _Host(HostBase):
    '''Holder of parsed results for each host, and helper functions.'''
 
    def __init__(self):
-       self.params:dict[str,Any] = {'resp':[], 'maxSeq':0 } # keep everything. 'resp' and 'maxSeq' is reserved for list[PingRespRecord] and seq:int
-
-   def set(self, **kwargs):
-       '''setter of parameters.'''
-       self.params.update(kwargs)
-       return self
-
-   def get(self, key:str, default:Any=None):
-       '''getter of parameter.'''
-       return self.params.get(key, default)
+       super().__init__(resp=[], maxSeq=0, arrival=[])   # 'resp', 'maxSeq' and 'arrival' is reserved for list[PingRespRecord], seq:int and list[seq]
 
    def append(self, rec:PingRespRecord):
        '''store parsed result for each ping record.'''
 
        seq:Union[int,None] = rec.seq
 
+       if seq is not None and rec.rtt is not None:  # seq of replies in order of arrival, to detect reordering.
+           self.params['arrival'].append(seq)
+
        if seq is not None and seq <= self.get('maxSeq'):
            print(f'seq dupplication detected,  discard current result {rec}', file=sys.stderr)
            return self
@@ -117,6 +118,8 @@ class _Host(object):
            tuple[float] or None:  see below source code for detail.
        '''
 
+       import numpy as np                              # lazy import, for fast startup.
+
        data = self.getRTT(seq=False, noNone=False)     # no-seq, include None.
        valid_data = [x for x in data if x is not None] # notNone values
        num_data  = len(data)
@@ -128,6 +131,107 @@ class _Host(object):
        return None
 
 
+   def getArrays(self) -> dict[str,Any]:
+       '''records in numpy arrays, in order of seq.
+
+       Returns:
+           dict[str, ndarray]: seq, rtt(NaN when no reply), ts(NaN when no timestamp), ttl(NaN when no reply) and arrival(seq in order of arrival).
+       '''
+
+       import numpy as np                              # lazy import, for fast startup.
+
+       resps:list[PingRespRecord] = self.params['resp']
+       nan = float('nan')
+       return {
+           'seq':     np.array([ r.seq for r in resps ], dtype=float),
+           'rtt':     np.array([ nan if r.rtt is None else r.rtt for r in resps ], dtype=float),
+           'ts':      np.array([ nan if r.ts  is None else r.ts  for r in resps ], dtype=float),
+           'ttl':     np.array([ nan if r.ttl is None else r.ttl for r in resps ], dtype=float),
+           'arrival': np.array(self.params['arrival'], dtype=float),
+       }
+
+   def getMetrics(self, count:int=0, jitterGain:float=1/16) -> dict[str,Any]:
+       '''delay variation, loss bursts, reordering and ttl changes, vectorized on arrays.
+
+       Args:
+           count(int):        num of probes sent, to count trailing losses. maxSeq is taken when it is bigger.
+           jitterGain(float): gain of jitter estimator, 1/16 as RFC 3550.
+
+       Returns:
+           dict[str,Any]:
+               jitter:      RFC 3550 interarrival jitter, on RTT of consecutive replies.
+               ipdv_mean:   mean of |RTT difference| of consecutive replies.
+               loss_rate:   lost / sent.
+               burst_count: num of loss bursts(consecutive lost seq).
+               burst_max:   length of the longest loss burst.
+               burst_mean:  mean length of loss bursts.
+               reordered:   num of replies arrived after a reply with bigger seq.
+               late:        num of replies discarded, arrived after its timeout or duplicated.
+               ttl_changes: num of ttl changes between consecutive replies.
+               gap_max:     max interval(sec) between timestamps of consecutive replies, NaN without 'ping -D'.
+       '''
+
+       import numpy as np                              # lazy import, for fast startup.
+
+       a = self.getArrays()
+       ok  = ~np.isnan(a['rtt'])
+       rtt = a['rtt'][ok]
+
+       # jitter: J(i) = J(i-1) + (|D(i)| - J(i-1)) * g,  J(0) = 0  =>  J(n) = sum( |D(k)| * g * (1-g)^(n-k) )
+       d = np.abs(np.diff(rtt))
+       weights = jitterGain * (1 - jitterGain) ** np.arange(len(d)-1, -1, -1)
+       jitter = float(np.dot(d, weights)) if len(d) else float('nan')
+       ipdv   = float(d.mean()) if len(d) else float('nan')
+
+       sent, nrecv, bursts = self.__lossBursts(a, count)
+
+       # reordering: arrived after a bigger seq.
+       arr = a['arrival']
+       reordered = int(np.count_nonzero(arr[1:] < np.maximum.accumulate(arr)[:-1])) if len(arr) > 1 else 0
+
+       ttl = a['ttl'][ok]
+       ts  = a['ts'][ok]
+       ts  = ts[~np.isnan(ts)]
+
+       return {
+           'jitter':      jitter,
+           'ipdv_mean':   ipdv,
+           'loss_rate':   float(1 - nrecv / sent) if sent else float('nan'),
+           'burst_count': int(len(bursts)),
+           'burst_max':   int(bursts.max()) if len(bursts) else 0,
+           'burst_mean':  float(bursts.mean()) if len(bursts) else 0.0,
+           'reordered':   reordered,
+           'late':        int(len(arr) - np.count_nonzero(ok)),
+           'ttl_changes': int(np.count_nonzero(np.diff(ttl))),
+           'gap_max':     float(np.diff(ts).max()) if len(ts) > 1 else float('nan'),
+       }
+
+   def __lossBursts(self, a:dict[str,Any], count:int) -> tuple[int, int, Any]:
+       '''runs of lost seq in 1..sent.
+
+       Returns:
+           tuple(sent, received, bursts): num of sent and received, and length of each loss burst in ndarray.
+       '''
+
+       import numpy as np                              # lazy import, for fast startup.
+
+       sent = int(max(count, np.nanmax(a['seq']) if len(a['seq']) else 0))
+       received = np.zeros(sent + 2, dtype=bool)
+       received[0] = received[-1] = True                # sentinels
+       seqs = a['seq'][ ~np.isnan(a['rtt']) ].astype(int)
+       received[ seqs[(seqs >= 1) & (seqs <= sent)] ] = True
+       edges = np.diff(received.astype(np.int8))
+       bursts = np.flatnonzero(edges == 1) - np.flatnonzero(edges == -1)
+       return sent, int(np.count_nonzero(received[1:-1])), bursts
+
+   def getBurstDistribution(self, count:int=0) -> Any:
+       '''distribution of loss burst length,  i.e. rtn[n] is num of bursts of length n.'''
+
+       import numpy as np                              # lazy import, for fast startup.
+
+       _, _, bursts = self.__lossBursts(self.getArrays(), count)
+       return np.bincount(bursts, minlength=1)
+
    def getHistogramData(self, min_val:float=0, max_val:float=1000, bin_width:float=10):
        '''building histogram data(numbers) for this host.
 
@@ -140,6 +244,8 @@ class _Host(object):
            ...: refer numpy documents.
        '''
 
+       import numpy as np                              # lazy import, for fast startup.
+
        data = self.getRTT(seq=False, noNone=False)
        valid_data = [x for x in data if x is not None] # notNone values
        num_none = len(data) - len(valid_data)          # None
@@ -193,9 +299,10 @@ class _Host(object):
 
 # Ping LogFile Parser.
 class PingLogParser(object):
-    def __init__(self):
+    def __init__(self, profiler:NullProfiler=None):
         self.results:dict[str,_Host] = {}             # holder for all parsed results,  key:destIP
         self.maxCount:int = 0                         # holder for max sequence number, to use pretty-print
+        self.profiler = profiler or NullProfiler()    # phase/counter profiler, for --profile
 
     def getResults(self):
         return self.results, self.maxCount
@@ -213,32 +320,65 @@ class PingLogParser(object):
         if verbose:
            print(f'start parsing for {dest} in {logpath}', file=sys.stderr)
 
+        prof = self.profiler
+
         # phase1) get contents from logfile
 
         logs:list[str] = None
-        with open(logpath, encoding='utf-8') as logfp:
-             tmp = logfp.read()
-             logs = tmp.splitlines()
+        with prof.phase('read'):
+            with openLog(logpath) as logfp:                 # .gz/.xz/.zst are decompressed in stream.
+                 tmp = logfp.read()
+                 logs = tmp.splitlines()
+        prof.count('files')
+
+        # phase2) parse contents line by line
+        self.parse(logs, logpath, dest, verbose=verbose)
+
+        # end of contents
+        return
+
+    def parse(self, logs:list[str], logpath:str, dest:str, verbose:bool=False):
+        '''Parse contents of one Logfile of ping, already read.
+
+        Args:
+           logs(list[str]): lines in logfile.
+           logpath(str):    log of ping result   (i.e pingCmd dest > logfile. )
+           dest(str):       destination of ping. (i.e pingCmd dest > logfile. )
+           verbose(bool):   verbose print while parsing or not
+        '''
 
+        prof = self.profiler
         if not any(logs):
             return
 
-        # phase2) parse contents line by line
         hrec = _Host().set(dest=dest, log=logpath)
         self.results[ dest ] = hrec
 
-        for line in logs:
-            p, seq, end = self.__parseResp(line, hrec)
-            self.__updateCounter(seq)
-            
-            if verbose:
-                print(f'{dest} {line}  => {p}    {logpath}', file=sys.stderr)
-            if end:
-                break
-
-        # end of contents
+        nrecs = 0                                     # counters for profiler.
+        nunknown = 0
+        with prof.phase('parse'):
+            for line in logs:
+                p, seq, end = self.__parseResp(line, hrec)
+                self.__updateCounter(seq)
+
+                if seq is not None:
+                    nrecs += 1
+                elif isinstance(p, dict):             # 'NG?', unknown line.
+                    nunknown += 1
+                if verbose:
+                    print(f'{dest} {line}  => {p}    {logpath}', file=sys.stderr)
+                if end:
+                    break
+        prof.count('lines', len(logs)).count('records', nrecs).count('unknown', nunknown)
         return
 
+    def merge(self, other:'PingLogParser'):
+        '''merge results parsed by other parser, i.e. in other process.'''
+
+        self.results.update(other.results)
+        self.maxCount = max(self.maxCount, other.maxCount)
+        return self
+
     def __updateCounter(self, seq:Union[int,None] ):
         '''helper function to update most biggest sequence numbers, for later use (pretty-print).'''
         if seq is None:
@@ -267,10 +407,13 @@ class PingLogParser(object):
         # CAUTION:   MOST IMPORTANT DEFINITIONS.
         # regex expression to get meaningful info from each responce line.
         #
+        #   each pattern may start with timestamp, i.e. '[1697000000.123456] ', when 'ping -D'
+        #
         #pattern_ok    = r"^(?P<size>\d+) bytes from (?P<dest>[^:]+):.*icmp_seq=(?P<seq>\d+).*ttl=(?P<ttl>\d+).*time=(?P<rtt>\S+) ms"     # ttl is that in line.
-        pattern_ok     = r"^(?P<size>\d+) bytes from (?P<dest>[^:]+):.*icmp_seq=(?P<seq>\d+).*ttl=(?P<ttl>\d+).*time=(?P<rtt>[0-9.]+) ms" # ttl is that in line.
-        pattern_ng     = r"^[Ff]rom (?P<reporter>\S+).*icmp_seq=(?P<seq>\d+)[\s]+(?P<msg>.*)$"  # in error, 'from' may be one of routers between dest and src.
-        pattern_timeout= r"^[nN]o [aA]nswer yet for icmp_seq=(?P<seq>\d+)"                                                                # timeout when 'ping -O'
+        pattern_ts     = r"^(?:\[(?P<ts>[0-9.]+)\]\s*)?"
+        pattern_ok     = pattern_ts + r"(?P<size>\d+) bytes from (?P<dest>.+?): .*icmp_seq=(?P<seq>\d+).*ttl=(?P<ttl>\d+).*time=(?P<rtt>[0-9.]+) ms" # ttl is that in line.
+        pattern_ng     = pattern_ts + r"[Ff]rom (?P<reporter>\S+).*icmp_seq=(?P<seq>\d+)[\s]+(?P<msg>.*)$"  # in error, 'from' may be one of routers between dest and src.
+        pattern_timeout= pattern_ts + r"[nN]o [aA]nswer yet for icmp_seq=(?P<seq>\d+)"                                                 # timeout when 'ping -O'
 
         # initializing value
         end:bool = False                  # if log reached to the last raw records(True) or not (False)
@@ -284,19 +427,19 @@ class PingLogParser(object):
             result = ok.groupdict()
             result['result'] = 'ok'
             seq = int(result['seq'])
-            hrec.append( PingRespRecord(seq=seq, rtt=result['rtt'] ))
+            hrec.append( PingRespRecord(seq=seq, rtt=result['rtt'], ttl=result['ttl'], ts=result['ts'] ))
 
         elif ng:
             result = ng.groupdict()
             result['result'] = 'NG'
             seq = int(result['seq'])
-            hrec.append( PingRespRecord(seq=seq, errMsg=result['msg'], reporter=result['reporter'] ))
+            hrec.append( PingRespRecord(seq=seq, errMsg=result['msg'], reporter=result['reporter'], ts=result['ts'] ))
 
         elif timeout:
             result = timeout.groupdict()
             result['result'] = 'NG'
             seq = int(result['seq'])
-            hrec.append( PingRespRecord(seq=seq, errMsg='no answer yet' ))
+            hrec.append( PingRespRecord(seq=seq, errMsg='no answer yet', ts=result['ts'] ))
 
         else:
             if line.startswith('PING'): # first line
@@ -309,20 +452,7 @@ class PingLogParser(object):
 
         return result, seq, end
 
-    def mkdict(self, keys:list[str], vals:list[Any]) -> dict[str,Any]:
-        '''make dict from list of keys and values
-
-        Args:
-            keys: key of dict
-            vals: val of dict
-        '''
-
-        if len(keys) != len(vals):
-              raise RuntimeError(f'num of keys and vals is mismatched, keys:{keys}   vals:{vals}')
-        return dict(zip(keys, vals))
-
-
-    def mkData(self, dstColName:str, aliveColName:str, src:str=None, prefixDataColName:str='rtt', includes_err:bool=True) -> list[dict[str,Any]]:
+    def mkData(self, dstColName:str, aliveColName:str, src:str=None, prefixDataColName:str='rtt', includes_err:bool=True, includes_metrics:bool=False) -> list[dict[str,Any]]:
         '''make data for output from records as list of dict
 
         Args:
@@ -332,6 +462,7 @@ class PingLogParser(object):
             src(str):               the sender of ping, to record it within data.
             prefixDataColName(str): the name of Data columns, for CSV header.
             includes_error(bool):   output error messages found in Ping Log file(True), or not(False).
+            includes_metrics(bool): output metrics by _Host.getMetrics() (jitter, loss bursts etc.), or not.
 
         Returns:
             list[dict[str, Any]]:
@@ -361,6 +492,10 @@ class PingLogParser(object):
 
         if includes_err:
             keys.append('err')
+        metricKeys = []
+        if includes_metrics:
+            metricKeys = ['jitter', 'ipdv_mean', 'loss_rate', 'burst_count', 'burst_max', 'burst_mean', 'reordered', 'late', 'ttl_changes', 'gap_max']
+            keys.extend(metricKeys)
         # mk keys done.
 
         #
@@ -383,7 +518,10 @@ class PingLogParser(object):
                       vals.append(errs)
                   else:
                       vals.append(None)
-              rtn.append ( self.mkdict(keys,vals) )                # register data
+              if includes_metrics:
+                  m = hrec.getMetrics(count=count)
+                  vals.extend( [ m[k] for k in metricKeys ] )
+              rtn.append ( mkdict(keys,vals) )                # register data
         #end loop to make data.
 
         return rtn
@@ -393,9 +531,9 @@ class PingLogParser(object):
 
 if __name__ == '__main__':
     import argparse
-    import os
     from   collections import OrderedDict
-    import pandas as pd
+    from   myProfiler import PhaseProfiler
+    from   myLogIO    import writeData, readPathList
 
 
     parser = argparse.ArgumentParser(description='Ping multiple hosts and collect responses.')
@@ -407,6 +545,12 @@ if __name__ == '__main__':
     parser.add_argument('-s','--src',               type=str, default=None,            help='sender of ping, to record it within data')
     parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
     parser.add_argument('-H','--histogram',         action="store_true",               help='print histograms in stdout')
+    parser.add_argument('-M','--metrics',           action="store_true",               help='output jitter, loss bursts, reordering and ttl changes')
+    parser.add_argument('-S','--store',             type=str, default=None,            help='root directory of historical results store, to append results of this run')
+    parser.add_argument('-P','--profile',           type=str, default=None,            help='path to output profile of each phase in JSON, "-" for stderr')
+    parser.add_argument(     '--prom',              type=str, default=None,            help='path to write Prometheus textfile of parse metrics (lines, hosts alive/dead, RTT histogram)')
+    parser.add_argument('-C','--cprofile',          type=str, default=None,            help='path to dump cProfile stats of parsing')
+    parser.add_argument('-m','--merge',             type=str, nargs='+', default=None, help='merge output directories of executor.mk(older one first), instead of --input')
     args = parser.parse_args()
     print(args, file=sys.stderr)
 
@@ -437,37 +581,52 @@ if __name__ == '__main__':
     #
 
 
+    prof = PhaseProfiler() if args.profile or args.cprofile or args.prom else NullProfiler()
     logFiles:dict[str,str] = OrderedDict() # dict of { log-path, destIP }
 
-    if not args.input:
-        raise RuntimeError('ping log files required')
-
-    with open(args.input, encoding='utf-8') as fp:
-        tmp = fp.read()
-        content = tmp.splitlines()
+    with prof.phase('pathlist'):
+        if args.merge:
+            from myResume import mergeLogFiles
+            logFiles = mergeLogFiles(args.merge, probe='ping')
+        else:
+            if not args.input:
+                raise RuntimeError('ping log files required')
 
-    if not any(content):
-        print('... empty content', file=sys.stderr)
-    for path in content:
-        f = os.path.basename(path)
-        logFiles[path] = f
+            logFiles = readPathList(args.input)
 
     if args.verbose:
         print(logFiles)
 
 
-    logparser = PingLogParser()
+    logparser = PingLogParser(profiler=prof)
+    if args.cprofile:
+        prof.startCProfile()
     for path, dest in logFiles.items():
         logparser.run(path, dest, verbose=args.verbose)
+    if args.cprofile:
+        prof.stopCProfile(args.cprofile)
 
-    ldict = logparser.mkData(dstColName=args.dstColName, aliveColName=args.aliveColName, src=args.src, prefixDataColName=args.prefixDataColName, includes_err=True)
-    df = pd.DataFrame( ldict)
-    if args.output.endswith('.xlsx'):
-        df.to_excel(args.output, index=False)
-    else:
-        df.to_csv(args.output, index=False)
+    with prof.phase('mkData'):
+        ldict = logparser.mkData(dstColName=args.dstColName, aliveColName=args.aliveColName, src=args.src, prefixDataColName=args.prefixDataColName, includes_err=True, includes_metrics=args.metrics)
+    writeData(ldict, args.output, profiler=prof)
+
+    if args.store:
+        from myResultStore import ResultStore, runTsOf
+        with prof.phase('store'):
+            ResultStore(args.store).append('ping', ldict, runTsOf(list(logFiles.keys())), src=args.src, dstColName=args.dstColName)
 
     if args.histogram:
         recs,_ = logparser.getResults()
         for k,rec in recs.items():
             rec.displayHistogramData()
+
+    if args.prom:
+        from myMetrics import RunMetrics
+        metrics = RunMetrics('ping')
+        for hrec in logparser.results.values():
+            metrics.observeHost(hrec)
+        metrics.observeParse(prof.counters['lines'], prof.phases.get('read', {}).get('wall', 0) + prof.phases.get('parse', {}).get('wall', 0))
+        metrics.write(args.prom)
+
+    if args.profile:
+        prof.dump(args.profile)
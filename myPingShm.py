@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+from    typing   import Any, Union
+import  os
+import  sys
+
+from    myPingLogParser import PingLogParser
+from    myLogIO  import openLog, logErrors
+
+#
+# shared memory layout, one block for each array. row: index of log in path list, col: seq-1.
+#
+#   rtt      float64[hosts, count]   RTT in msec, NaN when no reply.
+#   err      int8   [hosts, count]   error code of seq, index of errMsgs, 0 for none.
+#   alive    bool   [hosts]          any reply received.
+#   parsed   bool   [hosts]          results of the log are stored, False for empty or missing log(no row in output, as PingLogParser).
+#   maxseq   int32  [hosts]          the biggest seq in log, 0 when the log is empty or missing.
+#   overflow int32  [hosts]          num of seq beyond count, dropped.
+#
+# error messages by code, errors not listed here are kept as 'unknown error'.
+errMsgs:list[Union[str,None]] = [ None, 'no answer yet',
+    'Destination Host Unreachable', 'Destination Net Unreachable', 'Destination Port Unreachable', 'Destination Protocol Unreachable',
+    'Destination Host Prohibited', 'Destination Net Prohibited', 'Packet filtered', 'Frag needed', 'Time to live exceeded',
+    'unknown error' ]
+errCodes:dict[str,int] = { m:i for i,m in enumerate(errMsgs) if m is not None }
+
+
+class PingMatrix(object):
+    '''hosts x seq RTT matrix and side arrays in multiprocessing.shared_memory, created by parent and attached by workers.'''
+
+    layout = [ ('rtt', 'float64', 2), ('err', 'int8', 2), ('alive', 'bool', 1), ('parsed', 'bool', 1), ('maxseq', 'int32', 1), ('overflow', 'int32', 1) ]
+
+    def __init__(self, hosts:int, count:int, names:Union[dict[str,str],None]=None):
+        '''
+        Args:
+            hosts(int):  num of rows, i.e. num of log files.
+            count(int):  num of columns, max seq to keep.
+            names(dict[str,str]): names of shared memory to attach, None to create.
+        '''
+
+        import numpy as np                               # lazy import, for fast startup.
+        from   multiprocessing import shared_memory
+
+        self.hosts  = hosts
+        self.count  = count
+        self.owner  = names is None
+        self.shms:dict[str,Any] = {}
+        self.arrays:dict[str,Any] = {}
+        for key, dtype, ndim in self.layout:
+            shape  = (hosts, count) if ndim == 2 else (hosts,)
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            if self.owner:
+                shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            else:
+                shm = shared_memory.SharedMemory(name=names[key])
+            self.shms[key]   = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+        if self.owner:
+            self.arrays['rtt'][:] = np.nan
+            for key in ['err', 'alive', 'parsed', 'maxseq', 'overflow']:
+                self.arrays[key][:] = 0
+
+    def __getattr__(self, key:str):
+        arrays = self.__dict__.get('arrays', {})
+        if key in arrays:
+            return arrays[key]
+        raise AttributeError(key)
+
+    def names(self) -> dict[str,str]:
+        '''names of shared memory, to attach in workers.'''
+        return { k: shm.name for k, shm in self.shms.items() }
+
+    def close(self):
+        '''detach shared memory, and remove it when owner.'''
+
+        self.arrays.clear()                              # views have to be released before close.
+        for shm in self.shms.values():
+            shm.close()
+            if self.owner:
+                shm.unlink()
+        self.shms.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def store(self, row:int, hrec:Any):
+        '''write parsed results of one host(_Host of myPingLogParser) into its row.'''
+
+        rtt, err = self.arrays['rtt'][row], self.arrays['err'][row]
+        maxseq = overflow = 0
+        for r in hrec.get('resp'):
+            if r.seq is None or r.seq < 1:
+                continue
+            maxseq = max(maxseq, r.seq)
+            if r.seq > self.count:
+                overflow += 1
+                continue
+            if r.rtt is not None:
+                rtt[r.seq-1] = r.rtt
+            if r.errMsg is not None:
+                err[r.seq-1] = errCodes.get(r.errMsg, errCodes['unknown error'])
+        self.arrays['alive'][row]    = bool( (rtt == rtt).any() )    # any not NaN.
+        self.arrays['parsed'][row]   = True
+        self.arrays['maxseq'][row]   = maxseq
+        self.arrays['overflow'][row] = overflow
+        return self
+
+    def getCount(self) -> int:
+        '''num of seq columns to output, as maxCount of PingLogParser.'''
+        return int(min(self.arrays['maxseq'].max(initial=0), self.count))
+
+    def getRTTStatistics(self) -> dict[str,Any]:
+        '''statistics of each host, vectorized on the matrix in place.
+
+        Returns:
+            dict[str, ndarray]: num_none, num_data, num_valid, min, max, median and mean for each row, NaN when no reply.
+        '''
+
+        import numpy as np                               # lazy import, for fast startup.
+
+        rtt  = self.arrays['rtt']
+        ok   = ~np.isnan(rtt)
+        cols = np.arange(self.count)
+        data = (cols[None,:] < self.arrays['maxseq'][:,None]).sum(axis=1)   # seq 1..maxseq
+        nval = ok.sum(axis=1)
+
+        s    = np.sort(rtt, axis=1)                      # NaN goes last, median by sort instead of nanmedian(slow in 2-D)
+        rows = np.arange(self.hosts)
+        lo   = s[rows, np.maximum((nval-1)//2, 0)]
+        hi   = s[rows, np.minimum(nval//2, max(self.count-1, 0))]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'num_none':  data - nval,
+                'num_data':  data,
+                'num_valid': nval,
+                'min':       np.where(nval > 0, np.fmin.reduce(rtt, axis=1, initial=np.inf), np.nan),
+                'max':       np.where(nval > 0, np.fmax.reduce(rtt, axis=1, initial=-np.inf), np.nan),
+                'median':    np.where(nval > 0, (lo + hi) / 2, np.nan),
+                'mean':      np.where(nval > 0, np.nansum(rtt, axis=1) / nval, np.nan),
+            }
+
+    def getHistograms(self, min_val:float=0, max_val:float=1000, bin_width:float=10) -> tuple[Any, Any]:
+        '''RTT histogram of each host, in one pass of bincount over the matrix.
+
+        Returns:
+            tuple(histograms, bins): histograms[hosts, len(bins)], the last column is num of no reply, as _Host.getHistogramData()
+        '''
+
+        import numpy as np                               # lazy import, for fast startup.
+
+        bins  = np.arange(min_val, max_val + bin_width, bin_width)
+        nbins = len(bins) - 1
+        rtt   = self.arrays['rtt']
+        rows, cols = np.nonzero( (rtt >= bins[0]) & (rtt <= bins[-1]) )
+        idx   = np.clip(np.searchsorted(bins, rtt[rows, cols], side='right') - 1, 0, nbins - 1)   # the last bin includes its right edge.
+        hist  = np.bincount(rows * (nbins + 1) + idx, minlength=self.hosts * (nbins + 1)).reshape(self.hosts, nbins + 1)
+        stats = self.getRTTStatistics()
+        hist[:, nbins] = stats['num_none']
+        return hist, bins
+
+    def mkData(self, dests:list[str], dstColName:str, aliveColName:str, src:str=None, prefixDataColName:str='rtt', includes_err:bool=True) -> list[dict[str,Any]]:
+        '''make data for output, same columns as PingLogParser.mkData().
+
+           RTTs are placed by seq, so lost lines(i.e. without ping -O) do not shift later RTTs.
+
+        Args:
+            dests(list[str]):  dest of each row.
+            others:            refer PingLogParser.mkData()
+
+        Returns:
+            list[dict[str,Any]]: data to output, one row for each log parsed.
+        '''
+
+        import numpy as np                               # lazy import, for fast startup.
+
+        count = self.getCount()
+        if count == 0:
+            print(f'########### no records found !')
+            return []
+
+        ndigits = len(str(count-1))
+        nformat = '{:02d}' if ndigits==1 else '{:0'+str(ndigits)+'d}'
+        rttKeys = [ prefixDataColName + nformat.format(c) for c in range(1, count+1) ]
+
+        rtts   = self.arrays['rtt'][:, :count]
+        filled = np.where(np.isnan(rtts), None, rtts.astype(object)).tolist()    # NaN => None, as PingLogParser.
+        errs   = self.arrays['err'][:, :count]
+        alive  = self.arrays['alive'].tolist()
+        parsed = self.arrays['parsed']
+
+        rtn = []
+        for row, dst in enumerate(dests):
+            if not parsed[row]:                          # empty log, skipped by PingLogParser.
+                continue
+            d = { dstColName: dst, aliveColName: alive[row] }
+            if src is not None:
+                d['src'] = src
+            d.update( zip(rttKeys, filled[row]) )
+            if includes_err:
+                codes = np.unique(errs[row])
+                msgs  = [ errMsgs[c] for c in codes if c != 0 ]
+                d['err'] = ','.join(msgs) if msgs else None
+            rtn.append(d)
+        return rtn
+
+
+#
+# worker side, the matrix is attached once in each worker process.
+#
+_matrix:Union[PingMatrix,None] = None
+
+def _attach(hosts:int, count:int, names:dict[str,str]):
+    global _matrix
+    _matrix = PingMatrix(hosts, count, names=names)
+
+def _parseRows(items:list[tuple[int,str,str]]) -> int:
+    '''parse logs and write results into rows of shared matrix, only num of parsed logs is sent back.'''
+
+    n = 0
+    for row, path, dest in items:
+        logparser = PingLogParser()
+        try:
+            with openLog(path, errors='replace') as fp:
+                logs = fp.read().splitlines()
+        except logErrors() as e:                          # missing or truncated, the row is left unparsed.
+            print(f'#error ####### unreadable log, skipped {path}: {e}', file=sys.stderr)
+            continue
+        logparser.parse(logs, path, dest)
+        hrec = logparser.results.get(dest)
+        if hrec is not None:
+            _matrix.store(row, hrec)
+            n += 1
+    return n
+
+
+class PingShmAggregator(object):
+    '''parse ping logs in worker processes, aggregating results in shared memory matrix instead of pickling _Host.'''
+
+    def __init__(self, count:int=21, jobs:int=1, chunksize:int=256):
+        self.count     = count
+        self.jobs      = jobs
+        self.chunksize = chunksize
+
+    def run(self, logFiles:dict[str,str]) -> tuple[PingMatrix, list[str]]:
+        '''parse logs.
+
+        Args:
+            logFiles(dict[str,str]): { log-path, dest }, row of each log is its index.
+
+        Returns:
+            tuple(matrix, dests): matrix owned by caller(close it after use), and dest of each row.
+        '''
+
+        import multiprocessing
+
+        items  = [ (row, path, dest) for row, (path, dest) in enumerate(logFiles.items()) ]
+        dests  = [ dest for _, _, dest in items ]
+        matrix = PingMatrix(len(items), self.count)
+        chunks = [ items[i:i+self.chunksize] for i in range(0, len(items), self.chunksize) ]
+
+        try:
+            if self.jobs == 1 or len(chunks) <= 1:
+                global _matrix
+                _matrix = matrix
+                try:
+                    for chunk in chunks:
+                        _parseRows(chunk)
+                finally:
+                    _matrix = None
+            else:
+                with multiprocessing.Pool(self.jobs, initializer=_attach, initargs=(matrix.hosts, matrix.count, matrix.names())) as pool:
+                    for _ in pool.imap_unordered(_parseRows, chunks):
+                        pass
+        except BaseException:
+            matrix.close()                               # unlink shared memory, nobody owns it after raise.
+            raise
+
+        over = int(matrix.overflow.sum())
+        if over:
+            print(f'#error ####### {over} replies beyond seq {self.count} dropped, increase count', file=sys.stderr)
+        return matrix, dests
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    from   myLogIO    import writeData, readPathList
+
+    parser = argparse.ArgumentParser(description='parse ping logs in parallel, aggregating RTTs in shared memory matrix.')
+    parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of log files list')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output')
+    parser.add_argument('-j','--jobs',              type=int, default=os.cpu_count(),  help='num of processes to parse')
+    parser.add_argument('-c','--count',             type=int, default=21,              help='max seq to keep, as ping -c')
+    parser.add_argument('-d','--dstColName',        type=str, default='dest',          help='column name of dest in output csv header')
+    parser.add_argument('-a','--aliveColName',      type=str, default='alive',         help='column name of alive in output csv header')
+    parser.add_argument('-p','--prefixDataColName', type=str, default='rtt',           help='prefix for data column names in output csv header')
+    parser.add_argument('-s','--src',               type=str, default=None,            help='sender node IP address, to record in CSV')
+    parser.add_argument('-T','--stats',             type=str, default=None,            help='path of CSV file to output RTT statistics of each host')
+    parser.add_argument('-H','--histogram',         type=str, default=None,            help='path of CSV file to output RTT histogram of each host')
+    parser.add_argument(     '--bin',               type=float, nargs=3, default=[0, 1000, 10], metavar=('MIN', 'MAX', 'WIDTH'), help='bins of histogram')
+    parser.add_argument('-m','--merge',             type=str, nargs='+', default=None, help='merge output directories of executor.mk(older one first), instead of --input')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    if args.merge:
+        from myResume import mergeLogFiles
+        logFiles = mergeLogFiles(args.merge, probe='ping')
+    else:
+        logFiles = readPathList(args.input)
+
+    matrix, dests = PingShmAggregator(count=args.count, jobs=args.jobs).run(logFiles)
+    with matrix:
+        ldict = matrix.mkData(dests, dstColName=args.dstColName, aliveColName=args.aliveColName, src=args.src, prefixDataColName=args.prefixDataColName)
+        writeData(ldict, args.output)
+
+        if args.stats:
+            stats = matrix.getRTTStatistics()
+            writeData( [ dict({args.dstColName: d}, **{ k: v[row].item() for k,v in stats.items() }) for row, d in enumerate(dests) if matrix.parsed[row] ], args.stats )
+
+        if args.histogram:
+            hist, bins = matrix.getHistograms(*args.bin)
+            keys = [ f'{bins[i]:g}-{bins[i+1]:g}' for i in range(len(bins)-1) ] + ['None']
+            writeData( [ dict({args.dstColName: d}, **dict(zip(keys, hist[row].tolist()))) for row, d in enumerate(dests) if matrix.parsed[row] ], args.histogram )
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+from    collections import OrderedDict, defaultdict
+from    contextlib  import contextmanager, nullcontext
+from    typing   import Any
+import  json
+import  sys
+import  time
+
+class NullProfiler(object):
+    '''profiler doing nothing, used when --profile is not given.'''
+
+    enabled = False
+
+    def phase(self, name:str):
+        return nullcontext()
+
+    def count(self, name:str, n:int=1):
+        return self
+
+
+class PhaseProfiler(NullProfiler):
+    '''wall/cpu time for each phase and counters, reported in JSON.
+
+       usage:
+           prof = PhaseProfiler()
+           with prof.phase('read'):
+               ...
+           prof.count('lines', len(lines))
+           prof.dump('/dev/stderr')
+    '''
+
+    enabled = True
+
+    def __init__(self):
+        self.phases:dict[str,dict[str,float]] = OrderedDict()   # key: phase, val: {'wall', 'cpu', 'calls'}
+        self.counters:dict[str,int] = defaultdict(int)
+        self.wall0 = time.perf_counter()
+        self.cpu0  = time.process_time()
+        self.cprof = None
+        self.nested:list[list[float]] = []                      # [wall, cpu] of phases nested in each open phase.
+
+    @contextmanager
+    def phase(self, name:str):
+        '''measure wall and cpu time of the block, accumulated by name.
+
+           time of phases nested in the block is excluded from it, i.e. 'read' of a stream inside 'parse'.
+        '''
+
+        wall = time.perf_counter()
+        cpu  = time.process_time()
+        inner = [0.0, 0.0]
+        self.nested.append(inner)
+        try:
+            yield self
+        finally:
+            self.nested.pop()
+            wall = time.perf_counter() - wall
+            cpu  = time.process_time() - cpu
+            p = self.phases.setdefault(name, {'wall':0.0, 'cpu':0.0, 'calls':0})
+            p['wall']  += wall - inner[0]
+            p['cpu']   += cpu  - inner[1]
+            p['calls'] += 1
+            if self.nested:
+                self.nested[-1][0] += wall
+                self.nested[-1][1] += cpu
+
+    def count(self, name:str, n:int=1):
+        self.counters[name] += n
+        return self
+
+    def startCProfile(self):
+        '''start cProfile, for hot path.'''
+
+        import cProfile
+        self.cprof = cProfile.Profile()
+        self.cprof.enable()
+        return self
+
+    def stopCProfile(self, path:str):
+        '''stop cProfile and dump its stats into path, readable by pstats.'''
+
+        if self.cprof is None:
+            return self
+        self.cprof.disable()
+        self.cprof.dump_stats(path)
+        self.cprof = None
+        return self
+
+    def report(self) -> dict[str,Any]:
+        '''report in dict,  lines_per_sec is computed from 'lines' counter and wall time of 'read' and 'parse' phases.'''
+
+        rtn:dict[str,Any] = {
+            'wall':     round(time.perf_counter() - self.wall0, 6),
+            'cpu':      round(time.process_time() - self.cpu0, 6),
+            'phases':   { k: { kk: round(vv, 6) for kk,vv in v.items() } for k,v in self.phases.items() },
+            'counters': dict(self.counters),
+        }
+        wall = sum( self.phases.get(k, {}).get('wall', 0.0) for k in ['read', 'parse'] )
+        if wall > 0 and 'lines' in self.counters:
+            rtn['lines_per_sec'] = round(self.counters['lines'] / wall, 1)
+        return rtn
+
+    def dump(self, path:str):
+        '''dump report in JSON, '-' for stderr.'''
+
+        if path == '-':
+            print(json.dumps(self.report()), file=sys.stderr)
+            return self
+        with open(path, 'w', encoding='utf-8') as fp:
+            json.dump(self.report(), fp, indent=2)
+        return self
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+from    typing   import Any, Union
+import  datetime
+import  json
+import  os
+import  re
+import  sys
+import  time
+
+#
+# layout of the store:
+#
+#   root/
+#     {kind}/                                    kind: ping | traceroute | dig
+#       _manifest.jsonl                          append-only index, one line for each run file.
+#       date=YYYY-MM-DD/                         date partition by run timestamp(UTC).
+#         run-{run_ts}[-{src}].parquet           rows sorted by dest, split into row groups.
+#
+#   each line of manifest has the run timestamp and dest range(min, max) of each row group,
+#   so history queries pick partitions, files and row groups without opening other files.
+#
+
+pattern_logdir = re.compile(r'logs-(?P<ts>\d{8}-\d{6})')
+
+def runTsOf(paths:list[str]) -> float:
+    '''run timestamp of log files, from name of output directory of executor.mk (logs-YYYYmmdd-HHMMSS).
+
+       current time is taken when it is not found.
+    '''
+
+    for path in paths:
+        m = pattern_logdir.search(path)
+        if m:
+            return datetime.datetime.strptime(m.group('ts'), '%Y%m%d-%H%M%S').timestamp()
+    return time.time()
+
+
+class ResultStore(object):
+    '''append-only, date partitioned, columnar(parquet) store of parsed results, indexed by dest and run timestamp.'''
+
+    def __init__(self, root:str, rowGroupSize:int=65536):
+        self.root = root
+        self.rowGroupSize = rowGroupSize
+
+    def __manifest(self, kind:str) -> str:
+        return os.path.join(self.root, kind, '_manifest.jsonl')
+
+    def append(self, kind:str, ldict:list[dict[str,Any]], runTs:float, src:Union[str,None]=None, dstColName:str='dest') -> Union[str,None]:
+        '''append results of one run.
+
+        Args:
+            kind(str):                   kind of results (ping|traceroute|dig)
+            ldict(list[dict[str,Any]]):  data made by mkData() of parser.
+            runTs(float):                run timestamp in epoch sec.
+            src(str):                    sender of probes, if any.
+            dstColName(str):             the name of dest column in ldict.
+
+        Returns:
+            str or None: path of written file, None when no data.
+        '''
+
+        import pandas         as pd
+        import pyarrow        as pa
+        import pyarrow.parquet as pq
+
+        if not ldict:
+            return None
+
+        df = pd.DataFrame(ldict).rename(columns={dstColName: 'dest'})
+        for c in df.columns[ df.dtypes == object ]:                # i.e. IPv4Address in traceroute, keep None.
+            df[c] = df[c].map( lambda v: v if v is None or isinstance(v, (str, bool, int, float)) else str(v) )
+        df['dest']   = df['dest'].astype(str)
+        df['run_ts'] = pd.Series(int(runTs), index=df.index, dtype='int64')
+        if src is not None and 'src' not in df.columns:
+            df['src'] = src
+        df = df.sort_values('dest', kind='stable').reset_index(drop=True)
+
+        date = datetime.datetime.fromtimestamp(runTs, tz=datetime.timezone.utc).strftime('%Y-%m-%d')
+        name = f'run-{int(runTs)}' + (f'-{src}' if src else '') + '.parquet'
+        rel  = os.path.join(f'date={date}', name)
+        path = os.path.join(self.root, kind, rel)
+        if os.path.exists(path):
+            raise RuntimeError(f'already stored, append-only: {path}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, path, row_group_size=self.rowGroupSize)
+
+        groups = []
+        dests = df['dest']
+        for start in range(0, len(df), self.rowGroupSize):
+            end = min(start + self.rowGroupSize, len(df))
+            groups.append( {'min': dests.iat[start], 'max': dests.iat[end-1], 'rows': end-start} )
+
+        entry = {'file': rel, 'run_ts': int(runTs), 'date': date, 'src': src, 'rows': len(df), 'groups': groups}
+        with open(self.__manifest(kind), 'a', encoding='utf-8') as fp:
+            fp.write(json.dumps(entry) + '\n')
+        return path
+
+    def entries(self, kind:str, since:Union[float,None]=None, until:Union[float,None]=None) -> list[dict[str,Any]]:
+        '''manifest entries of runs in [since, until).'''
+
+        path = self.__manifest(kind)
+        if not os.path.isfile(path):
+            return []
+        rtn = []
+        with open(path, encoding='utf-8') as fp:
+            for line in fp:
+                e = json.loads(line)
+                if since is not None and e['run_ts'] < since:
+                    continue
+                if until is not None and e['run_ts'] >= until:
+                    continue
+                rtn.append(e)
+        return rtn
+
+    def history(self, kind:str, dest:str, since:Union[float,None]=None, until:Union[float,None]=None,
+                columns:Union[list[str],None]=None):
+        '''results of one dest across runs, reading only row groups which may have it.
+
+        Args:
+            kind(str):           kind of results (ping|traceroute|dig)
+            dest(str):           destination.
+            since/until(float):  range of run timestamp, [since, until).
+            columns(list[str]):  columns to read, all when None.
+
+        Returns:
+            DataFrame: one row for each run, sorted by run_ts.
+        '''
+
+        import pandas         as pd
+        import pyarrow.parquet as pq
+
+        if columns is not None:
+            columns = list(dict.fromkeys(['dest', 'run_ts'] + columns))
+
+        dfs = []
+        for e in self.entries(kind, since, until):
+            idx = [ i for i,g in enumerate(e['groups']) if g['min'] <= dest <= g['max'] ]
+            if not idx:
+                continue
+            pf = pq.ParquetFile(os.path.join(self.root, kind, e['file']))
+            df = pf.read_row_groups(idx, columns=columns).to_pandas()
+            dfs.append( df[ df['dest'] == dest ] )
+
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True).sort_values('run_ts').reset_index(drop=True)
+
+    def scan(self, kind:str, since:Union[float,None]=None, until:Union[float,None]=None,
+             columns:Union[list[str],None]=None):
+        '''results of all dests in runs of [since, until), for aggregates across runs.
+
+        Returns:
+            DataFrame: one row for each (dest, run).
+        '''
+
+        import pandas         as pd
+        import pyarrow.parquet as pq
+
+        dfs = []
+        for e in self.entries(kind, since, until):
+            path = os.path.join(self.root, kind, e['file'])
+            cols = columns
+            if cols is not None:                                    # column set may differ among runs, i.e. rtt01..rttN.
+                names = pq.read_schema(path).names
+                cols = [ c for c in dict.fromkeys(['dest', 'run_ts'] + cols) if c in names ]
+            dfs.append( pq.read_table(path, columns=cols).to_pandas() )
+
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='query historical results store.')
+    parser.add_argument('store',                    type=str,                          help='root directory of the store')
+    parser.add_argument('-k','--kind',              type=str, default='ping',          help='kind of results (ping|traceroute|dig)')
+    parser.add_argument('-d','--dest',              type=str, default=None,            help='destination for history, all when not given')
+    parser.add_argument('-c','--columns',           type=str, nargs='+', default=None, help='columns to read, all when not given')
+    parser.add_argument(     '--days',              type=float, default=None,          help='only runs in last N days')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    since = time.time() - args.days * 86400 if args.days else None
+    store = ResultStore(args.store)
+    if args.dest:
+        df = store.history(args.kind, args.dest, since=since, columns=args.columns)
+    else:
+        df = store.scan(args.kind, since=since, columns=args.columns)
+    df.to_csv(args.output, index=False)
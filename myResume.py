@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+from    collections import OrderedDict
+from    typing   import Union
+import  os
+import  re
+import  sys
+
+from    myJoblogParser import JoblogParser, JobRecord
+from    myLogIO        import openLog, destOf, logErrors
+
+#
+# exit values of each probe which mean 'the probe finished its job'.
+#   ping exits with 1 when no reply is received, it is valid result for us (dead host).
+#
+okExitvals:dict[str,list[int]] = {
+    'ping':        [0, 1],
+    'checkalives': [0, 1],
+    'traceroute':  [0],
+    'doubletree':  [0],
+    'dig':         [0],
+    'exec':        [0],
+    'icmp':        [0, 1],
+}
+
+# probes run in one process without joblog(myIcmpProber.py), a target is done when its log is complete.
+noJoblog:list[str] = ['icmp']
+
+# hop in traceroute output, hop count followed by timeouts, IP address or 'name (IP address)'.
+#   i.e. ' 1  192.168.1.1  0.5 ms ...', ' 2  * * *', ' 3  gw.example.net (10.0.0.1)  1.2 ms ...'
+pattern_hop = re.compile(r'^\s*\d+\s+(\*|[\d.]+\s|[\da-fA-F:]*:[\da-fA-F:]*\s|\S+ \()')
+
+def isHopLine(line:str) -> bool:
+    '''line of a hop in traceroute output, not '64 bytes from ...' of ping etc.'''
+
+    return pattern_hop.match(line + ' ') is not None
+
+def isComplete(logpath:str, probe:str) -> bool:
+    '''check if the log file is not truncated, i.e. the probe reached the end of its output.
+
+    Args:
+        logpath(str):  path of log file.
+        probe(str):    kind of probe (ping|checkalives|traceroute|doubletree|dig|exec|icmp)
+
+    Returns:
+        bool: True when the log looks complete.
+    '''
+
+    if not os.path.isfile(logpath):
+        return False
+
+    try:
+        with openLog(logpath, errors='replace') as logfp:
+            logs = logfp.read().splitlines()
+    except logErrors():
+        return False                                 # truncated by interrupted compressor, i.e. compress=gzip.
+
+    if not any(logs):
+        return False
+
+    if probe in ['ping', 'checkalives', 'icmp']:
+        return any( 'ping statistics' in line for line in logs )           # ending line of ping
+    if probe in ['traceroute', 'doubletree']:
+        return any( isHopLine(line) for line in logs )                    # at least one hop probed, header goes to stderr.
+    if probe in ['dig']:
+        return any( line.startswith(';; Query time:') for line in logs )  # footer of dig
+    return True
+
+
+def logDirOf(oDir:str, probe:Union[str,None]=None) -> str:
+    '''directory of log files in output directory of executor.mk, exec tees stdout into {oDir}/stdout/.'''
+
+    return os.path.join(oDir, 'stdout') if probe == 'exec' else oDir
+
+def listLogFiles(logdir:str, probe:Union[str,None]=None) -> list[str]:
+    '''list log files in output directory of executor.mk,  skip files of executor itself (00-*).
+
+    Args:
+        logdir(str):  output directory of executor.mk.
+        probe(str):   kind of probe, logs of exec are in its stdout/ directory.
+    '''
+
+    logdir = logDirOf(logdir, probe)
+    if not os.path.isdir(logdir):
+        return []
+
+    rtn = []
+    for f in sorted(os.listdir(logdir)):
+        path = os.path.join(logdir, f)
+        if f.startswith('00-') or not os.path.isfile(path):
+            continue
+        rtn.append(path)
+    return rtn
+
+
+def mergeLogFiles(logdirs:list[str], probe:str) -> dict[str,str]:
+    '''merge log files in several output directories into one set.
+
+    Args:
+        logdirs(list[str]): output directories of executor.mk, older one first.
+        probe(str):         kind of probe, to check completeness of each log.
+
+    Returns:
+        dict[str,str]: { log-path, dest }, one path for each dest.
+                       the newest complete log wins, the newest log is taken when none is complete.
+    '''
+
+    found:dict[str,list[str]] = OrderedDict()   # { dest, [log-path, ...] } older first.
+    for logdir in logdirs:
+        for path in listLogFiles(logdir, probe):
+            dest = destOf(path)                  # log may be compressed, {dest}.gz etc.
+            found.setdefault(dest, []).append(path)
+
+    rtn:dict[str,str] = OrderedDict()
+    for dest, paths in found.items():
+        complete = [ p for p in paths if isComplete(p, probe) ]
+        path = complete[-1] if complete else paths[-1]
+        rtn[path] = dest
+    return rtn
+
+
+class ResumePlanner(object):
+    '''pick targets to be (re)scheduled from previous runs of executor.mk.'''
+
+    def __init__(self, probe:str):
+        self.probe = probe
+        self.jobs:dict[str,JobRecord] = {}        # key:target, the last job in joblogs.
+        self.logs:dict[str,str] = {}              # key:target, path of log file.
+
+    def load(self, logdir:str, verbose:bool=False):
+        '''load joblog and log files in one output directory of executor.mk.
+
+        Args:
+            logdir(str):   output directory of previous run.
+            verbose(bool): verbose print or not.
+        '''
+
+        joblog = os.path.join(logdir, '00-joblogs.txt')
+        if os.path.isfile(joblog):
+            jparser = JoblogParser()
+            jparser.run(joblog, verbose=verbose)
+            self.jobs.update(jparser.getResults())
+        elif self.probe not in noJoblog:
+            print(f'... no joblog in {logdir}', file=sys.stderr)
+
+        for path in listLogFiles(logdir, self.probe):
+            self.logs[destOf(path)] = path
+        return self
+
+    def check(self, target:str) -> Union[str,None]:
+        '''check the target should be scheduled again or not.
+
+        Returns:
+            str or None: reason to schedule it (missing|failed|truncated), None when it is done.
+        '''
+
+        job  = self.jobs.get(target)
+        path = self.logs.get(target)
+        if path is None or (job is None and self.probe not in noJoblog):
+            return 'missing'
+        if job is not None and (job.signal != 0 or job.exitval not in okExitvals.get(self.probe, [0])):
+            return 'failed'
+        if not isComplete(path, self.probe):
+            return 'truncated'
+        return None
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='pick targets not done yet in previous runs, from targets in stdin.')
+    parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of targets list')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path to output targets to schedule')
+    parser.add_argument('-d','--prev',              type=str, nargs='+', required=True,help='output directories of previous runs, older one first')
+    parser.add_argument('-p','--probe',             type=str, default='ping',          help='kind of probe (ping|checkalives|traceroute|doubletree|dig|exec|icmp)')
+    parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    planner = ResumePlanner(args.probe)
+    for logdir in args.prev:
+        planner.load(logdir, verbose=args.verbose)
+
+    counts:dict[str,int] = OrderedDict(done=0, missing=0, failed=0, truncated=0)
+    with open(args.input, encoding='utf-8') as ifp, open(args.output, 'w', encoding='utf-8') as ofp:
+        for line in ifp:
+            target = line.strip()
+            if not target:
+                continue
+            reason = planner.check(target)
+            counts[reason or 'done'] += 1
+            if args.verbose:
+                print(f'{target} => {reason}', file=sys.stderr)
+            if reason is None:
+                continue
+            print(target, file=ofp, flush=True)
+
+    print(f'... resume: {dict(counts)}', file=sys.stderr)
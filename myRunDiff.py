@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import  re
+import  sys
+import  numpy    as     np
+import  pandas   as     pd
+
+# default name of dest column in outputs of each parser.
+dstColNames:dict[str,str] = { 'ping': 'dest', 'traceroute': 'dest', 'dig': 'target' }
+
+# prefix of value columns in output of myDigParser.py => record type.
+digColTypes:dict[str,str] = { 'ip': 'A', 'cname': 'CNAME', 'name': 'PTR' }
+
+def readData(path:str) -> pd.DataFrame:
+    '''read output of parsers, CSV, xlsx or parquet by its extension.'''
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.xlsx'):
+        return pd.read_excel(path)
+    return pd.read_csv(path, dtype={'dest': str, 'target': str})
+
+def dataColumns(df:pd.DataFrame, prefix:str) -> list[str]:
+    '''columns named prefix + digits(i.e. rtt01, hop02), sorted by its number.'''
+
+    pattern = re.compile('^' + re.escape(prefix) + r'_?(\d+)$')
+    cols = [ (int(m.group(1)), c) for c in df.columns for m in [pattern.match(str(c))] if m ]
+    return [ c for _,c in sorted(cols) ]
+
+def hopColumns(df:pd.DataFrame, prefix:str='hop') -> list[str]:
+    '''hop columns of traceroute results, without {prefix}00 which holds the src(--src of traceroute parser).'''
+
+    return [ c for c in dataColumns(df, prefix) if int(re.sub(r'\D', '', c)) > 0 ]
+
+def rowNanMedian(arr:np.ndarray) -> np.ndarray:
+    '''median of each row ignoring NaN, NaN for all-NaN rows.
+
+       np.nanmedian loops over rows in python for 2-D input, this sorts once instead (NaN goes last).
+    '''
+
+    n = np.count_nonzero(~np.isnan(arr), axis=1)
+    if arr.shape[1] == 0:
+        return np.full(arr.shape[0], np.nan)
+    s = np.sort(arr, axis=1)
+    rows = np.arange(arr.shape[0])
+    lo = s[rows, np.maximum((n-1)//2, 0)]
+    hi = s[rows, np.minimum(n//2, arr.shape[1]-1)]
+    return np.where(n > 0, (lo + hi) / 2, np.nan)
+
+
+class RunDiff(object):
+    '''diff of two parsed result sets(a: old, b: new), joined on dest.'''
+
+    def __init__(self, a:pd.DataFrame, b:pd.DataFrame, dstColName:str='dest'):
+        self.a = a.rename(columns={dstColName: 'dest'}).drop_duplicates('dest', keep='last')
+        self.b = b.rename(columns={dstColName: 'dest'}).drop_duplicates('dest', keep='last')
+        self.dstColName = dstColName
+
+    def __restore(self, df:pd.DataFrame) -> pd.DataFrame:
+        return df.rename(columns={'dest': self.dstColName})
+
+    @staticmethod
+    def pingMetrics(df:pd.DataFrame, prefix:str='rtt', aliveColName:str='alive') -> pd.DataFrame:
+        '''alive, loss rate and median RTT for each dest, vectorized over rtt columns.'''
+
+        rtt = df[ dataColumns(df, prefix) ].to_numpy(dtype=float)
+        median = rowNanMedian(rtt)
+        loss = np.isnan(rtt).mean(axis=1) if rtt.shape[1] else np.full(len(df), np.nan)
+
+        if aliveColName not in df.columns:
+            alive = ~np.isnan(median)
+        elif df[aliveColName].dtype == bool:
+            alive = df[aliveColName].to_numpy()
+        else:
+            alive = df[aliveColName].astype(str).str.lower().eq('true').to_numpy()
+        return pd.DataFrame({ 'dest': df['dest'].to_numpy(), 'alive': alive, 'loss': loss, 'median': median })
+
+    def ping(self, prefix:str='rtt', lossThreshold:float=0.1, rttThreshold:float=10.0, rttRatio:float=1.5) -> pd.DataFrame:
+        '''liveness flips, loss-rate and median-RTT regressions.
+
+        Args:
+            prefix(str):          prefix of rtt columns.
+            lossThreshold(float): loss regression when loss(b) - loss(a) > this.
+            rttThreshold(float):  RTT regression when median(b) - median(a) > this (msec) ...
+            rttRatio(float):      ... and median(b) / median(a) > this.
+
+        Returns:
+            DataFrame: one row for each dest in a or b.
+        '''
+
+        ma = self.pingMetrics(self.a, prefix)
+        mb = self.pingMetrics(self.b, prefix)
+        df = ma.merge(mb, on='dest', how='outer', suffixes=('_a', '_b'), indicator='presence')
+        df['presence'] = df['presence'].map({'left_only': 'only_a', 'right_only': 'only_b', 'both': 'both'})
+
+        both  = (df['presence'] == 'both').to_numpy()
+        alive_a = df['alive_a'].fillna(False).astype(bool).to_numpy()
+        alive_b = df['alive_b'].fillna(False).astype(bool).to_numpy()
+        df['flip'] = np.select( [both & alive_a & ~alive_b, both & ~alive_a & alive_b], ['down', 'up'], default='' )
+
+        df['loss_delta']   = df['loss_b'] - df['loss_a']
+        df['median_delta'] = df['median_b'] - df['median_a']
+        df['median_ratio'] = df['median_b'] / df['median_a']
+        df['loss_regress'] = (df['loss_delta'] > lossThreshold).to_numpy() & both
+        df['rtt_regress']  = ((df['median_delta'] > rttThreshold) & (df['median_ratio'] > rttRatio)).to_numpy() & both
+        return self.__restore(df)
+
+    def traceroute(self, prefix:str='hop', ignoreTimeouts:bool=True, timeoutIp:str='0.0.0.0') -> pd.DataFrame:
+        '''path changes, with the first divergent hop.
+
+        Args:
+            prefix(str):          prefix of hop columns.
+            ignoreTimeouts(bool): hop of timeout(timeoutIp) matches any hop.
+
+        Returns:
+            DataFrame: one row for each dest in both a and b.
+        '''
+
+        ha = hopColumns(self.a, prefix)
+        hb = hopColumns(self.b, prefix)
+        hops = sorted( set(ha) | set(hb), key=lambda c: int(re.sub(r'\D', '', c)) )
+
+        dests = self.a['dest'][ self.a['dest'].isin(self.b['dest']) ]
+        A = self.a.set_index('dest').reindex(index=dests, columns=hops).astype(object).to_numpy()
+        B = self.b.set_index('dest').reindex(index=dests, columns=hops).astype(object).to_numpy()
+        used = (~pd.isna(A) | ~pd.isna(B)).any(axis=0)         # padding past the longest path of these dests.
+        ncol = len(used) - used[::-1].argmax() if used.any() else 0
+        hops, A, B = hops[:ncol], A[:, :ncol], B[:, :ncol]
+        na = pd.isna(A)
+        nb = pd.isna(B)
+
+        neq = (A != B) & ~(na & nb)
+        if ignoreTimeouts:
+            neq &= ~( (A == timeoutIp) | (B == timeoutIp) )
+
+        changed = neq.any(axis=1)
+        first = np.where(changed, neq.argmax(axis=1), -1) if hops else np.full(len(changed), -1)
+        firstHop = np.array(hops + [None], dtype=object)[first]
+
+        df = pd.DataFrame({ 'dest': dests.to_numpy(), 'path_changed': changed, 'first_divergent_hop': firstHop,
+                            'hops_a': (~na).sum(axis=1), 'hops_b': (~nb).sum(axis=1) })
+        if hops:                                               # hops at the first divergence.
+            rows, col = np.arange(len(df)), np.maximum(first, 0)
+            df['hop_a'] = np.where(changed, A[rows, col], None)
+            df['hop_b'] = np.where(changed, B[rows, col], None)
+        return self.__restore(df)
+
+    @staticmethod
+    def digLong(df:pd.DataFrame) -> pd.DataFrame:
+        '''answers in long format: (dest, type, value), vectorized by melt.'''
+
+        cols:dict[str,str] = {}
+        for prefix, ty in digColTypes.items():
+            for c in dataColumns(df, prefix):
+                cols[c] = ty
+        long = df[ ['dest'] + list(cols.keys()) ].melt(id_vars='dest', var_name='col', value_name='value').dropna(subset=['value'])
+        long['type'] = long['col'].map(cols)
+        return long[ ['dest', 'type', 'value'] ].drop_duplicates()
+
+    def dig(self) -> pd.DataFrame:
+        '''DNS answer set changes, added or removed values for each (dest, type).
+
+        Returns:
+            DataFrame: one row for each changed value, change is 'added' or 'removed'.
+        '''
+
+        la = self.digLong(self.a)
+        lb = self.digLong(self.b)
+        dests = set(self.a['dest']) & set(self.b['dest'])           # changes only for dests in both runs.
+        la = la[ la['dest'].isin(dests) ]
+        lb = lb[ lb['dest'].isin(dests) ]
+
+        df = la.merge(lb, on=['dest', 'type', 'value'], how='outer', indicator='change')
+        df = df[ df['change'] != 'both' ].copy()
+        df['change'] = df['change'].map({'left_only': 'removed', 'right_only': 'added'})
+        return self.__restore( df.sort_values(['dest', 'type', 'change', 'value']).reset_index(drop=True) )
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='diff of two parsed results (old, new) of ping, traceroute or dig.')
+    parser.add_argument('old',                      type=str,                          help='path of old results (CSV|xlsx|parquet)')
+    parser.add_argument('new',                      type=str,                          help='path of new results (CSV|xlsx|parquet)')
+    parser.add_argument('-k','--kind',              type=str, default='ping',          help='kind of results (ping|traceroute|dig)')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output')
+    parser.add_argument('-d','--dstColName',        type=str, default=None,            help='column name of dest, default depends on kind')
+    parser.add_argument('-p','--prefixDataColName', type=str, default=None,            help='prefix for data column names (rtt|hop)')
+    parser.add_argument(     '--loss',              type=float, default=0.1,           help='threshold of loss rate regression')
+    parser.add_argument(     '--rtt',               type=float, default=10.0,          help='threshold of median RTT regression in msec')
+    parser.add_argument(     '--ratio',             type=float, default=1.5,           help='threshold of median RTT ratio regression')
+    parser.add_argument(     '--strict-timeouts',   action="store_true",               help='regard timeout hop(0.0.0.0) as path change')
+    parser.add_argument('-a','--all',               action="store_true",               help='output all dests, not only changed ones')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    dstColName = args.dstColName or dstColNames[args.kind]
+    rdiff = RunDiff(readData(args.old), readData(args.new), dstColName=dstColName)
+
+    if args.kind == 'ping':
+        df = rdiff.ping(prefix=args.prefixDataColName or 'rtt', lossThreshold=args.loss, rttThreshold=args.rtt, rttRatio=args.ratio)
+        changed = (df['flip'] != '') | df['loss_regress'] | df['rtt_regress'] | (df['presence'] != 'both')
+        print(f'... flips up:{(df["flip"]=="up").sum()} down:{(df["flip"]=="down").sum()} loss:{df["loss_regress"].sum()} rtt:{df["rtt_regress"].sum()}', file=sys.stderr)
+    elif args.kind == 'traceroute':
+        df = rdiff.traceroute(prefix=args.prefixDataColName or 'hop', ignoreTimeouts=not args.strict_timeouts)
+        changed = df['path_changed']
+        print(f'... path changed:{changed.sum()} / {len(df)}', file=sys.stderr)
+    elif args.kind == 'dig':
+        df = rdiff.dig()
+        changed = pd.Series(True, index=df.index)
+        print(f'... added:{(df["change"]=="added").sum()} removed:{(df["change"]=="removed").sum()}', file=sys.stderr)
+    else:
+        raise RuntimeError(f'unknown kind: {args.kind}')
+
+    if not args.all:
+        df = df[ changed ]
+    df.to_csv(args.output, index=False)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import  os
+import  re
+import  subprocess
+import  sys
+
+#
+# startup-time budget(msec) of each CLI, measured by 'python -X importtime'.
+#   the cumulative import time of the module itself, i.e. excluding interpreter startup.
+#
+budgets:dict[str,float] = {
+    'myPingLogParser':       80,
+    'myTracerouteLogParser': 80,
+    'myDigParser':           80,
+    'myDigExec':             20,
+    'myIcmpProber':         100,                 # pydantic and asyncio, both needed to probe.
+    'myResume':              20,
+    'myTargetGen':           20,
+    'myPacer':               20,
+    'myAdaptiveWindow':      20,
+    'myLogEngine':           20,
+    'myDoubletree':          20,
+    'myPingShm':             80,                 # imports myPingLogParser.
+    'myMetrics':             20,
+}
+
+# heavy modules which must not be loaded at startup of CLIs above.
+forbidden:list[str] = ['pandas', 'numpy', 'openpyxl', 'jc']
+
+pattern_importtime = re.compile(r'^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|(?P<indent>\s+)(?P<module>\S+)$')
+
+def measure(module:str, repeat:int=3) -> tuple[float, list[str]]:
+    '''measure import time of the module in fresh interpreter.
+
+    Args:
+        module(str):  name of module.
+        repeat(int):  num of measurement, the best one is taken.
+
+    Returns:
+        tuple(msec, modules):  cumulative import time in msec, and top level modules loaded by it.
+    '''
+
+    best = None
+    modules:list[str] = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(repeat):
+        res = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             cwd=here, capture_output=True, text=True, check=True)
+        modules = []
+        msec = None
+        for line in res.stderr.splitlines():
+            m = pattern_importtime.match(line)
+            if m is None:
+                continue
+            modules.append(m.group('module').split('.')[0])
+            if m.group('module') == module:
+                msec = int(m.group('cumulative')) / 1000
+        if msec is not None and (best is None or msec < best):
+            best = msec
+    return best, modules
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='check startup time of CLIs against budgets, by python -X importtime.')
+    parser.add_argument('modules',                  type=str, nargs='*',               help='modules to check, all in budgets when not given')
+    parser.add_argument('-r','--repeat',            type=int, default=3,               help='num of measurement for each module, the best one is taken')
+    parser.add_argument('-s','--scale',             type=float, default=1.0,           help='scale of budgets, for slow hosts')
+    args = parser.parse_args()
+
+    ng = 0
+    for module in args.modules or budgets.keys():
+        msec, modules = measure(module, repeat=args.repeat)
+        budget = budgets.get(module, 100) * args.scale
+        heavy = sorted( set(modules) & set(forbidden) )
+        result = 'OK' if msec <= budget and not heavy else 'NG'
+        if result == 'NG':
+            ng += 1
+        print(f'{result}  {module:<24s} {msec:8.1f} msec  (budget {budget:6.1f})  {" ".join(heavy)}')
+
+    sys.exit(1 if ng else 0)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+from    bisect   import bisect_left, bisect_right
+from    typing   import Any, Iterator, Union
+import  ipaddress
+import  random
+import  sys
+
+class _IntervalSet(object):
+    '''set of integer intervals [start, end], kept merged and sorted. used to dedup addresses without expanding them.
+
+       intervals are kept in sorted chunks of bounded size(as blocked list), so add() costs O(log n + chunk size)
+       instead of shifting one flat list for each insert.
+    '''
+
+    load = 512                                                 # chunk is split when it grows over 2 * load.
+
+    def __init__(self):
+        self.starts:list[list[int]] = []                       # chunks of starts.
+        self.ends:list[list[int]]   = []                       # chunks of ends.
+        self.maxes:list[int]        = []                       # the last end in each chunk.
+
+    def __len__(self):
+        return sum( e-s+1 for s,e in self.intervals() )
+
+    def intervals(self) -> list[tuple[int,int]]:
+        return [ (s,e) for ss,ee in zip(self.starts, self.ends) for s,e in zip(ss, ee) ]
+
+    def __loc(self, x:int) -> tuple[int,int]:
+        '''position(chunk, index) of the first interval with end >= x, (num of chunks, 0) when none.'''
+
+        k = bisect_left(self.maxes, x)
+        if k == len(self.maxes):
+            return k, 0
+        return k, bisect_left(self.ends[k], x)
+
+    def uncovered(self, start:int, end:int) -> list[tuple[int,int]]:
+        '''parts of [start, end] not covered by this set yet.'''
+
+        rtn = []
+        k, i = self.__loc(start)                               # first interval which may overlap.
+        cur = start
+        while k < len(self.starts):
+            ss, ee = self.starts[k], self.ends[k]
+            while i < len(ss) and ss[i] <= end:
+                if ss[i] > cur:
+                    rtn.append( (cur, ss[i]-1) )
+                cur = max(cur, ee[i]+1)
+                i += 1
+            if i < len(ss):
+                break
+            k, i = k+1, 0
+        if cur <= end:
+            rtn.append( (cur, end) )
+        return rtn
+
+    def add(self, start:int, end:int):
+        '''add [start, end], merge with overlapping or adjacent intervals.'''
+
+        k, i = self.__loc(start-1)                             # first interval touching start.
+        if k == len(self.starts):                              # after all intervals.
+            if not self.starts or len(self.starts[-1]) >= 2 * self.load:
+                self.starts.append([]); self.ends.append([]); self.maxes.append(end)
+            k = len(self.starts) -1
+            i = len(self.starts[k])
+
+        m, j = k, i                                            # next of last interval touching end.
+        while True:
+            j = bisect_right(self.starts[m], end+1, j)
+            if j == len(self.starts[m]) and m+1 < len(self.starts) and self.starts[m+1][0] <= end+1:
+                m, j = m+1, 0
+                continue
+            break
+
+        if (m, j) != (k, i):                                   # merge with touching intervals.
+            start = min(start, self.starts[k][i])
+            end   = max(end,   self.ends[m][j-1])
+        if m == k:
+            self.starts[k][i:j] = [start]
+            self.ends[k][i:j]   = [end]
+        else:
+            self.starts[k][i:] = [start]
+            self.ends[k][i:]   = [end]
+            del self.starts[m][:j], self.ends[m][:j]
+            del self.starts[k+1:m], self.ends[k+1:m], self.maxes[k+1:m]
+            if not self.starts[k+1]:
+                del self.starts[k+1], self.ends[k+1], self.maxes[k+1]
+        self.maxes[k] = self.ends[k][-1]
+
+        if len(self.starts[k]) > 2 * self.load:                # split, to keep slices short.
+            h = len(self.starts[k]) // 2
+            self.starts[k+1:k+1] = [ self.starts[k][h:] ]
+            self.ends[k+1:k+1]   = [ self.ends[k][h:] ]
+            del self.starts[k][h:], self.ends[k][h:]
+            self.maxes[k:k+1] = [ self.ends[k][-1], self.ends[k+1][-1] ]
+        return self
+
+
+class _Permutation(object):
+    '''pseudo random permutation over [0, size), in constant memory.
+
+       small Feistel network over the next even power of two, with cycle walking to stay in [0, size).
+    '''
+
+    rounds = 4
+
+    def __init__(self, size:int, seed:Union[int,None]=None):
+        self.size = size
+        bits = max(2, (size-1).bit_length())
+        bits += bits % 2                                       # balanced halves.
+        self.half = bits // 2
+        self.mask = (1 << self.half) - 1
+        rnd = random.Random(seed)
+        self.keys = [ rnd.getrandbits(64) for _ in range(self.rounds) ]
+
+    def __encrypt(self, x:int) -> int:
+        left, right = x >> self.half, x & self.mask
+        for k in self.keys:
+            f = ((right * 0x9E3779B97F4A7C15) ^ k) & 0xFFFFFFFFFFFFFFFF
+            f ^= f >> 29
+            left, right = right, (left ^ f) & self.mask
+        return (left << self.half) | right
+
+    def __getitem__(self, i:int) -> int:
+        x = self.__encrypt(i)
+        while x >= self.size:                                  # cycle walking.
+            x = self.__encrypt(x)
+        return x
+
+    def __iter__(self) -> Iterator[int]:
+        for i in range(self.size):
+            yield self[i]
+
+
+class TargetGenerator(object):
+    '''generator of targets from specs, expanded lazily and deduplicated.
+
+       spec in each line is one of below:
+
+         192.168.1.1                 => single address
+         192.168.1.0/24              => CIDR, network and broadcast address are skipped unless allAddr.
+         192.168.1.10-192.168.1.20   => range, both ends are included.
+         @path/to/file               => read specs from file.
+         fqdn.example.com            => any other string is passed through as it is.
+    '''
+
+    def __init__(self, allAddr:bool=False):
+        self.allAddr = allAddr
+        self.seen:dict[int,_IntervalSet] = { 4:_IntervalSet(), 6:_IntervalSet() }   # key: ip version
+        self.names:dict[str,None] = {}                                                # ordered set of non-IP targets.
+
+    def parseSpec(self, spec:str) -> Union[tuple[int,int,int], str, None]:
+        '''parse one spec into (version, start, end) or name.
+
+        Returns:
+            tuple(version, start, end) for addresses,  str for names, None for empty/comment line.
+        '''
+
+        spec = spec.strip()
+        if not spec or spec.startswith('#'):
+            return None
+
+        try:
+            if '/' in spec:
+                net = ipaddress.ip_network(spec, strict=False)
+                start, end = int(net.network_address), int(net.broadcast_address)
+                if not self.allAddr and net.version == 4 and net.prefixlen < 31:
+                    start, end = start+1, end-1
+                return net.version, start, end
+            if '-' in spec:
+                s, e = spec.split('-', 1)
+                s, e = ipaddress.ip_address(s.strip()), ipaddress.ip_address(e.strip())
+                if s.version != e.version or int(s) > int(e):
+                    raise RuntimeError(f'invalid range: {spec}')
+                return s.version, int(s), int(e)
+            a = ipaddress.ip_address(spec)
+            return a.version, int(a), int(a)
+        except ValueError:
+            return spec                                        # not IP, i.e. FQDN.
+
+    def specs(self, lines:Iterator[str]) -> Iterator[Any]:
+        '''parsed specs from lines, @file is read lazily.'''
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith('@'):
+                with open(line[1:], encoding='utf-8') as fp:
+                    yield from self.specs(fp)
+                continue
+            spec = self.parseSpec(line)
+            if spec is not None:
+                yield spec
+
+    @staticmethod
+    def toStr(version:int, addr:int) -> str:
+        if version == 4:
+            return str(ipaddress.IPv4Address(addr))
+        return str(ipaddress.IPv6Address(addr))
+
+    def expand(self, lines:Iterator[str]) -> Iterator[str]:
+        '''expand specs in input order. output starts as soon as the first spec is read.'''
+
+        for spec in self.specs(lines):
+            if isinstance(spec, str):
+                if spec not in self.names:
+                    self.names[spec] = None
+                    yield spec
+                continue
+
+            version, start, end = spec
+            pieces = self.seen[version].uncovered(start, end)
+            self.seen[version].add(start, end)
+            for s, e in pieces:
+                for addr in range(s, e+1):
+                    yield self.toStr(version, addr)
+
+    def sample(self, lines:Iterator[str], limit:Union[int,None]=None, seed:Union[int,None]=None) -> Iterator[str]:
+        '''expand specs in random order, by permutation over the whole address space.
+
+           only specs(intervals) are kept in memory, never the expanded addresses.
+
+        Args:
+            lines:  specs.
+            limit:  num of targets to pick, all when None.
+            seed:   seed of random.
+        '''
+
+        for spec in self.specs(lines):
+            if isinstance(spec, str):
+                self.names[spec] = None
+            else:
+                self.seen[spec[0]].add(spec[1], spec[2])
+
+        # flatten space into [0, size): v4 intervals, v6 intervals, names.
+        space:list[tuple[int,int,int]] = []                    # (version, start, end), starts at offsets[k]
+        offsets:list[int] = []
+        size = 0
+        for version in [4, 6]:
+            for s, e in self.seen[version].intervals():
+                offsets.append(size)
+                space.append( (version, s, e) )
+                size += e-s+1
+        naddr = size
+        names = list(self.names.keys())
+        size += len(names)
+
+        if size == 0:
+            return
+        if limit is None or limit > size:
+            limit = size
+
+        perm = _Permutation(size, seed=seed)
+        for n in range(limit):
+            i = perm[n]
+            if i >= naddr:
+                yield names[i-naddr]
+                continue
+            k = bisect_right(offsets, i) - 1
+            version, s, _ = space[k]
+            yield self.toStr(version, s + i - offsets[k])
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='expand targets(CIDR, range, file) lazily for executor.mk')
+    parser.add_argument('specs',                    type=str, nargs='*',               help='specs of targets, stdin is read when not given')
+    parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of specs list')
+    parser.add_argument('-l','--limit',             type=int, default=None,            help='num of targets to output')
+    parser.add_argument('-s','--shuf',              action="store_true",               help='output in random order(sampling when --limit)')
+    parser.add_argument('-S','--seed',              type=int, default=None,            help='seed of random, for reproducible sampling')
+    parser.add_argument('-a','--all',               action="store_true",               help='include network and broadcast address of CIDR')
+    parser.add_argument('-r','--resume',            type=str, nargs='+', default=None, help='output directories of previous runs, targets done in them are skipped before --limit')
+    parser.add_argument('-p','--probe',             type=str, default='ping',          help='kind of probe, to check targets done for --resume')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    gen = TargetGenerator(allAddr=args.all)
+    lines = args.specs if args.specs else open(args.input, encoding='utf-8')
+
+    if args.shuf:
+        targets = gen.sample(lines, limit=None if args.resume else args.limit, seed=args.seed)
+    else:
+        targets = gen.expand(lines)
+
+    if args.resume:                                            # skip done targets before limit, as resume | shuf | head without expand.
+        from myResume import ResumePlanner
+        planner = ResumePlanner(args.probe)
+        for logdir in args.resume:
+            planner.load(logdir)
+        targets = ( t for t in targets if planner.check(t) is not None )
+
+    try:
+        for n, target in enumerate(targets):
+            if args.limit is not None and n >= args.limit:
+                break
+            print(target, flush=False)
+        sys.stdout.flush()
+    except BrokenPipeError:                                    # i.e. stopped by head or parallel.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
@@ -2,13 +2,16 @@
 
 from    pydantic  import BaseModel, Extra, IPvAnyAddress, ValidationError, validator, Field
 from    ipaddress import IPv4Address
-import  pandas    as     pd
 
 from    typing   import Any, Union
 import  re
 import  sys
 import  json
 
+from    myProfiler import NullProfiler
+from    myLogIO    import openLog
+from    myParserBase import HostBase, mkdict
+
 class TracerouteRespRecord(BaseModel, extra=Extra.allow):
     '''Datamodel for raw traceroute response record.
     '''
@@ -63,21 +66,12 @@ class TracerouteRespRecord(BaseModel, extra=Extra.allow):
         v = default
         return v                               # return default, in othercases.
 
-class _Host(object):
+class _Host(HostBase):
     '''Holder of parsed results for each host, and helper function.'''
 
     def __init__(self):
-        # keep everything. 'resp' and 'maxHop' is reserved for list[TracerouteRespRecord] and hopCount:int
-        self.params:dict[str,Any] = {'resp':[], 'maxHop':0 }
-
-    def set(self, **kwargs):
-        '''setter of parameters.'''
-        self.params.update(kwargs)
-        return self
-
-    def get(self, key:str, default:Any=None):
-        '''getter of parameter.'''
-        return self.params.get(key, default)
+        # 'resp' and 'maxHop' is reserved for list[TracerouteRespRecord] and hopCount:int
+        super().__init__(resp=[], maxHop=0)
 
     def append(self, rec:TracerouteRespRecord):
         '''store parsed result for each record.'''
@@ -119,9 +113,10 @@ class _Host(object):
 
 
 class TracerouteLogParser(object):
-    def __init__(self):
+    def __init__(self, profiler:NullProfiler=None):
         self.results:dict[str,Any] = {}
         self.maxHops:int=0
+        self.profiler = profiler or NullProfiler()    # phase/counter profiler, for --profile
 
     def getResults(self):
         return self.results, self.maxHops
@@ -136,23 +131,56 @@ class TracerouteLogParser(object):
            verbose(bool):  verbose print while parsing or not
         '''
 
-        with open(logpath, encoding='utf-8') as logfp:
-            tmp = logfp.read()
-            logs = tmp.splitlines()
+        prof = self.profiler
+
+        with prof.phase('read'):
+            with openLog(logpath) as logfp:                  # .gz/.xz/.zst are decompressed in stream.
+                tmp = logfp.read()
+                logs = tmp.splitlines()
+        prof.count('files')
         if not any(logs):
             raise RuntimeError('no content')
 
+        self.parse(logs, logpath, dest, verbose=verbose)
+        return
+
+    def parse(self, logs:list[str], logpath:str, dest:str, verbose:bool=False):
+        '''Parse contents of one Logfile of traceroute, already read.
+
+        Args:
+           logs(list[str]): lines in logfile.
+           logpath(str):    log of traceroute result   (i.e tracerouteCmd dest > logfile. )
+           dest(str):       destination of ping.       (i.e tracerouteCmd dest > logfile. )
+           verbose(bool):   verbose print while parsing or not
+        '''
+
+        prof = self.profiler
         hrec = _Host().set(dest=dest, log=logpath)
         self.results[dest] = hrec
 
-        for line in logs:
-            p, hopCount = self.__parseResp(line, hrec)
-            self.__updateCounter(hopCount)
-            if verbose:
-                print(f'{dest} {line} => {p}   {logpath}', file=sys.stderr)
-        #endof loop
+        nrecs = 0                                    # counters for profiler.
+        nunknown = 0
+        with prof.phase('parse'):
+            for line in logs:
+                p, hopCount = self.__parseResp(line, hrec)
+                self.__updateCounter(hopCount)
+                if hopCount is not None:
+                    nrecs += 1
+                elif p.startswith('#error'):
+                    nunknown += 1
+                if verbose:
+                    print(f'{dest} {line} => {p}   {logpath}', file=sys.stderr)
+            #endof loop
+        prof.count('lines', len(logs)).count('records', nrecs).count('unknown', nunknown)
         return
 
+    def merge(self, other:'TracerouteLogParser'):
+        '''merge results parsed by other parser, i.e. in other process.'''
+
+        self.results.update(other.results)
+        self.maxHops = max(self.maxHops, other.maxHops)
+        return self
+
 
     def __updateCounter(self, hopCount:Union[int,None] ):
         '''helper function to update most biggest hopCount, for later use (pretty-print).'''
@@ -186,6 +214,14 @@ class TracerouteLogParser(object):
         pattern_timeout = r'^(?P<hopCount>\s*\d+)\s*(?P<timeouts>[\*\s]*)\s*$'
 
 
+        if line.startswith('#doubletree'):                 # known hops written by myDoubletree.py, to rebuild full path.
+            l = line.split()
+            if len(l) == 4 and l[1] in ['prefix', 'suffix']:
+                rec = TracerouteRespRecord(hopCount=int(l[2]), ip=l[3], timeouts=0, rebuilt=l[1])
+                hrec.append(rec)
+                return f'rebuilt {line}', rec.hopCount
+            return f'starting {line}', None
+
         result=None
         ok = re.match(pattern_ok, line)
         timeout = re.match(pattern_timeout, line)
@@ -210,27 +246,17 @@ class TracerouteLogParser(object):
 
         return result, hopCount
 
-    def mkDict(self, keys:list[str], vals:list[Any]) -> dict[str,Any]:
-        '''make dict from list of keys and list of vals.
-
-        Args:
-            keys: key of dict
-            vals: val of dict
-
-        Returns:
-            dict[str,Any]: generated dict.
-        '''
-
-        if len(keys) != len(vals):
-              raise RuntimeError(f'num of keys and vals is mismatched, lkeys:{len(keys)}, lvals:{len(vals)}, keys:{keys}   vals:{vals}')
-        return dict(zip(keys, vals))
-
-    def mkData(self, dstColName:str, src:str=None, prefixDataColName:str='hop')->list[dict[str,Any]]:
+    def mkData(self, dstColName:str, src:str=None, prefixDataColName:str='hop', prefixRebuiltColName:str='rebuilt')->list[dict[str,Any]]:
         '''make data for output in list of dict
 
+           hops rebuilt from known path by myDoubletree.py are not probed, they are in their own columns(prefixRebuiltColName),
+           and None in the columns of probed hops. rebuilt columns are made only when some hop is rebuilt.
+
         Args:
             dstColName(str):        the name of dest column,  for CSV header.
             src(str):               the sender node IPaddress
+            prefixDataColName(str): prefix for column names of probed hops.
+            prefixRebuiltColName(str): prefix for column names of rebuilt hops.
 
         Returns:
             list[dict[str,Any]]:    parsed results of traceroute records.
@@ -262,6 +288,13 @@ class TracerouteLogParser(object):
         for c in range(idx_start,count+1):                   # keys for data part(idx_start .. count)
            rtt = nformat.format(c)
            keys.append(rtt)
+        nhops = len(keys)
+
+        rebuilt = { dst: [ r.ip if getattr(r, 'rebuilt', None) else None for r in hrec.get('resp') ] for dst,hrec in recs.items() }
+        nrebuilt = max( (i+1 for r in rebuilt.values() for i,ip in enumerate(r) if ip is not None), default=0 )   # the last rebuilt hop.
+        rformat = prefixRebuiltColName + nformat[len(prefixDataColName):]
+        for c in range(1,nrebuilt+1):                        # keys for rebuilt hops(1 .. nrebuilt)
+           keys.append(rformat.format(c))
         # phase1 done.
 
         #
@@ -272,10 +305,14 @@ class TracerouteLogParser(object):
             if src is not None:
                 vals.append(src)
             v = hrec.getTrace()
-            vals.extend(v)                                   # fill data.
-            for n in range(len(vals), len(keys)):            #   fill None if len(vals)!=len(keys), i.e: reach to dest shorter than others.
+            r = rebuilt[dst]
+            vals.extend( ip if k is None else None for ip,k in zip(v, r) )   # fill data, probed hops only.
+            for n in range(len(vals), nhops):                #   fill None if len(vals)!=len(keys), i.e: reach to dest shorter than others.
                 vals.append(None)
-            rtn.append ( self.mkDict(keys, vals) )
+            if nrebuilt:
+                vals.extend(r[:nrebuilt])                    # fill rebuilt hops.
+                vals.extend( [None] * (len(keys) - len(vals)) )
+            rtn.append ( mkdict(keys, vals) )
         #end loop to make data
         return rtn
 
@@ -283,9 +320,9 @@ class TracerouteLogParser(object):
 
 if __name__ == '__main__':
     import argparse
-    import os
     from   collections import OrderedDict
-    import pandas as pd
+    from   myProfiler import PhaseProfiler
+    from   myLogIO    import writeData, readPathList
 
     parser = argparse.ArgumentParser(description='Ping multiple hosts and collect responses.')
     parser.add_argument('-i','--input',             type=str, default='/dev/stdin',    help='path of log files list')
@@ -294,32 +331,46 @@ if __name__ == '__main__':
     parser.add_argument('-p','--prefixDataColName', type=str, default='hop',           help='prefix for data column names in output csv header')
     parser.add_argument('-s','--src',               type=str, default=None,            help='sender node IP address, to record in CSV')
     parser.add_argument('-v','--verbose',           action="store_true",               help='verbose output or not')
+    parser.add_argument('-S','--store',             type=str, default=None,            help='root directory of historical results store, to append results of this run')
+    parser.add_argument('-P','--profile',           type=str, default=None,            help='path to output profile of each phase in JSON, "-" for stderr')
+    parser.add_argument('-C','--cprofile',          type=str, default=None,            help='path to dump cProfile stats of parsing')
+    parser.add_argument('-m','--merge',             type=str, nargs='+', default=None, help='merge output directories of executor.mk(older one first), instead of --input')
 
     args = parser.parse_args()
     print(args, file=sys.stderr)
 
-    if not args.input:
-        raise RuntimeError('log files required')
+    prof = PhaseProfiler() if args.profile or args.cprofile else NullProfiler()
+    logFiles:dict[str,str] = OrderedDict() # dict of { log-path, routerIP }
 
-    with open(args.input, encoding='utf-8') as fp:
-        tmp = fp.read()
-        content = tmp.splitlines()
+    with prof.phase('pathlist'):
+        if args.merge:
+            from myResume import mergeLogFiles
+            logFiles = mergeLogFiles(args.merge, probe='traceroute')
+        else:
+            if not args.input:
+                raise RuntimeError('log files required')
 
-    if not any(content):
-        print('... empty content', file=sys.stderr)
-
-    logFiles:dict[str,str] = OrderedDict() # dict of { log-path, routerIP }
-    for path in content:
-        f = os.path.basename(path)
-        logFiles[path] = f
+            logFiles = readPathList(args.input)
 
     if args.verbose:
         print(logFiles)
 
-    logparser = TracerouteLogParser()
+    logparser = TracerouteLogParser(profiler=prof)
+    if args.cprofile:
+        prof.startCProfile()
     for path, dest in logFiles.items():
         logparser.run(path, dest, verbose=args.verbose)
+    if args.cprofile:
+        prof.stopCProfile(args.cprofile)
+
+    with prof.phase('mkData'):
+        ldict = logparser.mkData(dstColName=args.dstColName, src=args.src, prefixDataColName=args.prefixDataColName)
+    writeData(ldict, args.output, profiler=prof)
+
+    if args.store:
+        from myResultStore import ResultStore, runTsOf
+        with prof.phase('store'):
+            ResultStore(args.store).append('traceroute', ldict, runTsOf(list(logFiles.keys())), src=args.src, dstColName=args.dstColName)
 
-    ldict = logparser.mkData(dstColName=args.dstColName, src=args.src, prefixDataColName=args.prefixDataColName)
-    df = pd.DataFrame(ldict)
-    df.to_csv(args.output, index=False)
+    if args.profile:
+        prof.dump(args.profile)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+from    typing   import Union
+import  os
+import  sys
+import  numpy    as     np
+import  pandas   as     pd
+
+from    myRunDiff import readData, dataColumns, hopColumns, rowNanMedian, dstColNames
+
+timeoutIp = '0.0.0.0'
+
+def srcOf(path:str) -> str:
+    '''name of source from path of its results, i.e. ping-10.0.0.1.csv.gz => ping-10.0.0.1'''
+
+    name = os.path.basename(path)
+    for ext in ['.gz', '.xz', '.zst', '.csv', '.xlsx', '.parquet']:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+def readSource(path:str, kind:str='ping', src:Union[str,None]=None, dstColName:Union[str,None]=None, prefix:str='hop') -> pd.DataFrame:
+    '''read parsed results of one source, with 'dest' and 'src' columns.
+
+       src is taken from the argument, 'src' column(--src of ping parser), the first hop column(--src of traceroute
+       parser writes it as {prefix}00) or the file name, in this order.
+    '''
+
+    df = readData(path).rename(columns={dstColName or dstColNames[kind]: 'dest'})
+    first = f'{prefix}00'
+    if kind == 'traceroute' and first in df.columns:
+        df = df.rename(columns={first: 'src'}) if 'src' not in df.columns else df.drop(columns=[first])
+    if src is not None or 'src' not in df.columns:
+        df['src'] = src if src is not None else srcOf(path)
+    df['src'] = df['src'].fillna(srcOf(path)).astype(str)
+    return df
+
+
+class VantageMerge(object):
+    '''results of the same targets from many sources, indexed by (dest, src), and aggregates across sources for each dest.'''
+
+    def __init__(self, frames:list[pd.DataFrame]):
+        '''
+        Args:
+            frames(list[DataFrame]): results with 'dest' and 'src' columns, the later one wins for the same (dest, src).
+        '''
+
+        df = pd.concat(frames, ignore_index=True, sort=False) if frames else pd.DataFrame(columns=['dest', 'src'])
+        df = df.drop_duplicates(['dest', 'src'], keep='last')
+        df['dest'] = df['dest'].astype(str).astype('category')      # dozens of sources x millions of dests, categories keep it small.
+        df['src']  = df['src'].astype(str).astype('category')
+        self.df = df.set_index(['dest', 'src']).sort_index()
+
+    @classmethod
+    def fromStore(cls, root:str, kind:str, since:Union[float,None]=None, until:Union[float,None]=None):
+        '''the latest result of each (dest, src) in historical results store.'''
+
+        from myResultStore import ResultStore
+
+        df = ResultStore(root).scan(kind, since=since, until=until)
+        if df.empty:
+            return cls([])
+        if 'src' not in df.columns:
+            df['src'] = None
+        df['src'] = df['src'].fillna('-')
+        df = df.sort_values('run_ts', kind='stable')
+        return cls([df])
+
+    @property
+    def sources(self) -> list[str]:
+        return list(self.df.index.get_level_values('src').unique())
+
+    @staticmethod
+    def __best(df:pd.DataFrame, key:str, ascending:bool=True) -> pd.DataFrame:
+        '''src and value of the best(the first after sort) row for each dest, rows with NaN key are ignored.'''
+
+        s = df.dropna(subset=[key]).sort_values(['dest', key], ascending=[True, ascending], kind='stable')
+        return s.groupby('dest', observed=True, sort=False).head(1).set_index('dest')[['src', key]]
+
+    def pingMetrics(self, prefix:str='rtt', aliveColName:str='alive') -> pd.DataFrame:
+        '''alive, loss rate, min and median RTT for each (dest, src), vectorized over rtt columns.'''
+
+        df  = self.df
+        rtt = df[ dataColumns(df, prefix) ].to_numpy(dtype=float)
+        median = rowNanMedian(rtt)
+        with np.errstate(invalid='ignore'):
+            loss = np.isnan(rtt).mean(axis=1) if rtt.shape[1] else np.full(len(df), np.nan)
+            best = np.fmin.reduce(rtt, axis=1, initial=np.inf) if rtt.shape[1] else np.full(len(df), np.inf)
+        best = np.where(np.isinf(best), np.nan, best)
+
+        if aliveColName not in df.columns:
+            alive = ~np.isnan(median)
+        elif df[aliveColName].dtype == bool:
+            alive = df[aliveColName].to_numpy()
+        else:
+            alive = df[aliveColName].astype(str).str.lower().eq('true').to_numpy()
+        return pd.DataFrame({ 'alive': alive, 'loss': loss, 'min': best, 'median': median }, index=df.index).reset_index()
+
+    def ping(self, prefix:str='rtt', aliveColName:str='alive') -> pd.DataFrame:
+        '''cross-vantage aggregates of ping for each dest.
+
+        Returns:
+            DataFrame: one row for each dest,
+                       num_src, num_alive, reachability(num_alive / num_src), loss_mean, loss_max,
+                       best_src / best_median, worst_src / worst_median(by median RTT of alive sources), rtt_spread(worst - best), min_rtt.
+        '''
+
+        m = self.pingMetrics(prefix, aliveColName)
+        g = m.groupby('dest', observed=True)
+        rtn = pd.DataFrame({
+            'num_src':   g['src'].size(),
+            'num_alive': g['alive'].sum().astype(int),
+            'loss_mean': g['loss'].mean(),
+            'loss_max':  g['loss'].max(),
+            'min_rtt':   g['min'].min(),
+        })
+        rtn['reachability'] = rtn['num_alive'] / rtn['num_src']
+
+        best  = self.__best(m, 'median', ascending=True ).rename(columns={'src': 'best_src',  'median': 'best_median'})
+        worst = self.__best(m, 'median', ascending=False).rename(columns={'src': 'worst_src', 'median': 'worst_median'})
+        rtn = rtn.join(best).join(worst)
+        rtn['rtt_spread'] = rtn['worst_median'] - rtn['best_median']
+        cols = ['num_src', 'num_alive', 'reachability', 'loss_mean', 'loss_max', 'min_rtt',
+                'best_src', 'best_median', 'worst_src', 'worst_median', 'rtt_spread']
+        return rtn[cols].reset_index()
+
+    def tracerouteMetrics(self, prefix:str='hop') -> pd.DataFrame:
+        '''reached, num of hops, timeouts and path hash for each (dest, src), vectorized over hop columns.'''
+
+        df   = self.df
+        hops = hopColumns(df, prefix)                          # {prefix}00 of results in store is src, not a hop.
+        A    = df[hops].astype(object).to_numpy()
+        ok   = ~pd.isna(A)
+        if hops:
+            last  = A.shape[1] - 1 - ok[:, ::-1].argmax(axis=1)          # index of the last hop.
+            nhops = np.where(ok.any(axis=1), last + 1, 0)
+            lastIp = np.where(nhops > 0, A[np.arange(len(df)), np.maximum(last, 0)], None)
+        else:
+            nhops  = np.zeros(len(df), dtype=int)
+            lastIp = np.full(len(df), None, dtype=object)
+
+        dests = df.index.get_level_values('dest').astype(str).to_numpy()
+        paths = pd.util.hash_pandas_object(df[hops].astype(str), index=False).to_numpy() if hops else np.zeros(len(df), dtype='uint64')
+        return pd.DataFrame({
+            'reached':  (lastIp == dests) & (nhops > 0),
+            'hops':     np.where(nhops > 0, nhops, np.nan),
+            'timeouts': (A == timeoutIp).sum(axis=1),
+            'path':     paths,
+        }, index=df.index).reset_index()
+
+    def traceroute(self, prefix:str='hop') -> pd.DataFrame:
+        '''cross-vantage aggregates of traceroute for each dest.
+
+        Returns:
+            DataFrame: one row for each dest,
+                       num_src, num_reached, reachability(num_reached / num_src), distinct_paths, timeouts_mean,
+                       best_src / best_hops, worst_src / worst_hops(by num of hops of sources which reached), hop_spread(worst - best).
+        '''
+
+        m = self.tracerouteMetrics(prefix)
+        g = m.groupby('dest', observed=True)
+        rtn = pd.DataFrame({
+            'num_src':        g['src'].size(),
+            'num_reached':    g['reached'].sum().astype(int),
+            'distinct_paths': g['path'].nunique(),
+            'timeouts_mean':  g['timeouts'].mean(),
+        })
+        rtn['reachability'] = rtn['num_reached'] / rtn['num_src']
+
+        r = m[ m['reached'] ]
+        best  = self.__best(r, 'hops', ascending=True ).rename(columns={'src': 'best_src',  'hops': 'best_hops'})
+        worst = self.__best(r, 'hops', ascending=False).rename(columns={'src': 'worst_src', 'hops': 'worst_hops'})
+        rtn = rtn.join(best).join(worst)
+        rtn['hop_spread'] = rtn['worst_hops'] - rtn['best_hops']
+        cols = ['num_src', 'num_reached', 'reachability', 'distinct_paths', 'timeouts_mean',
+                'best_src', 'best_hops', 'worst_src', 'worst_hops', 'hop_spread']
+        return rtn[cols].reset_index()
+
+    def save(self, path:str):
+        '''save merged dataset, parquet or CSV by its extension.'''
+
+        df = self.df.reset_index()
+        if path.endswith('.parquet'):
+            for c in df.columns[ df.dtypes == object ]:
+                df[c] = df[c].map( lambda v: v if v is None or isinstance(v, (str, bool, int, float)) else str(v) )
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        return self
+
+# >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='merge parsed results of ping or traceroute from many sources, and aggregate them for each dest.')
+    parser.add_argument('inputs',                   type=str, nargs='*',               help='parsed results of each source (CSV|xlsx|parquet), path[=src]')
+    parser.add_argument('-k','--kind',              type=str, default='ping',          help='kind of results (ping|traceroute)')
+    parser.add_argument('-o','--output',            type=str, default='/dev/stdout',   help='path of CSV file to output aggregates')
+    parser.add_argument('-m','--merged',            type=str, default=None,            help='path to output merged dataset indexed by (dest, src), parquet or CSV')
+    parser.add_argument('-d','--dstColName',        type=str, default=None,            help='column name of dest, default depends on kind')
+    parser.add_argument('-p','--prefixDataColName', type=str, default=None,            help='prefix for data column names (rtt|hop)')
+    parser.add_argument('-S','--store',             type=str, default=None,            help='root directory of historical results store, the latest result of each (dest, src) is merged')
+    parser.add_argument(     '--days',              type=float, default=None,          help='only runs in last N days of the store')
+    args = parser.parse_args()
+    print(args, file=sys.stderr)
+
+    if args.kind not in ('ping', 'traceroute'):
+        raise RuntimeError(f'unknown kind: {args.kind}')
+    prefix = args.prefixDataColName or ('rtt' if args.kind == 'ping' else 'hop')
+
+    frames = []
+    if args.store:
+        since = time.time() - args.days * 86400 if args.days else None
+        frames.append( VantageMerge.fromStore(args.store, args.kind, since=since).df.reset_index() )
+    for spec in args.inputs:
+        path, src = spec, None
+        if not os.path.exists(spec) and '=' in spec:
+            path, _, src = spec.rpartition('=')
+        frames.append( readSource(path, kind=args.kind, src=src, dstColName=args.dstColName, prefix=prefix) )
+    if not frames:
+        raise RuntimeError('inputs or --store required')
+
+    vm = VantageMerge(frames)
+    print(f'... {len(vm.df)} results of {vm.df.index.get_level_values("dest").nunique()} dests from {len(vm.sources)} sources', file=sys.stderr)
+    if args.merged:
+        vm.save(args.merged)
+
+    df = vm.ping(prefix) if args.kind == 'ping' else vm.traceroute(prefix)
+    if args.dstColName:
+        df = df.rename(columns={'dest': args.dstColName})
+    df.to_csv(args.output, index=False)